@@ -52,6 +52,50 @@ class SparkSettings:
     sparkConfig: tp.Dict[str, str] = _empty(dict)
 
 
+@dc.dataclass
+class EngineSettings:
+
+    actorThreads: int = 1
+    actorMetrics: bool = False
+    actorQueueSize: tp.Optional[int] = None
+    actorQueueOverflow: str = "REJECT"
+
+    nodeExecutor: str = "inline"
+    nodeWorkers: int = 0
+
+    releaseResults: bool = True
+
+
+@dc.dataclass
+class ResourceSettings:
+
+    maxConcurrentLoads: int = 0
+    maxConcurrentModels: int = 0
+    maxMemoryMb: int = 0
+
+
+@dc.dataclass
+class ResultCacheSettings:
+
+    storageKey: str
+    storagePath: str = "trac_result_cache"
+    maxSizeMb: int = 0
+    maxAgeSeconds: int = 0
+
+
+@dc.dataclass
+class SharedDataSettings:
+
+    maxMemoryMb: int = 0
+
+
+@dc.dataclass
+class CheckpointSettings:
+
+    storageKey: str
+    storagePath: str = "trac_checkpoints"
+
+
 @dc.dataclass
 class SystemConfig:
 
@@ -59,6 +103,11 @@ class SystemConfig:
     storage: tp.Dict[str, StorageConfig] = _empty(dict)
     storageSettings: tp.Optional[StorageSettings] = None
     sparkSettings: tp.Optional[SparkSettings] = None
+    engineSettings: EngineSettings = _empty(EngineSettings)
+    resourceSettings: ResourceSettings = _empty(ResourceSettings)
+    resultCache: tp.Optional[ResultCacheSettings] = None
+    sharedData: tp.Optional[SharedDataSettings] = None
+    checkpoint: tp.Optional[CheckpointSettings] = None
 
 
 @dc.dataclass
@@ -70,7 +119,11 @@ class JobConfig:
     parameters: tp.Dict[str, tp.Any] = _empty(dict)
     inputs: tp.Dict[str, str] = _empty(dict)
     outputs: tp.Dict[str, str] = _empty(dict)
+    models: tp.Dict[str, str] = _empty(dict)
 
     objects: tp.Dict[str, meta.ObjectDefinition] = _empty(dict)
 
+    sweep: tp.Dict[str, tp.List[tp.Any]] = _empty(dict)
+    sweepOutputs: tp.List[tp.Dict[str, str]] = _empty(list)
+
     job: tp.Optional[meta.JobDefinition] = None
@@ -15,16 +15,24 @@
 from __future__ import annotations
 
 import threading
+import asyncio
+import time
+import collections
 import functools as func
 import typing as tp
 import enum
 import dataclasses as dc
 import inspect
+import heapq
+import itertools
+import multiprocessing as mp
+import pickle
 
 import trac.rt.impl.util as util
 
 
 ActorId = str
+TimerId = int
 
 
 class ActorState(enum.Enum):
@@ -38,6 +46,23 @@ class ActorState(enum.Enum):
     FAILED = 6
 
 
+class OverflowPolicy(enum.Enum):
+
+    """
+    What happens when a message is sent to a mailbox that is full
+
+    BLOCK waits for space, only senders outside the actor system can block (e.g. ActorSystem.send()).
+    Actors sending messages are never blocked, since they may be holding up the messages that would make space,
+    for these senders BLOCK behaves like REJECT. REJECT raises an error in the sender, if the sender is an actor
+    and does not handle the error it will fail and its parent gets actor:failed. COALESCE drops the new message
+    if an identical message from the same sender is already waiting, otherwise the message is rejected.
+    """
+
+    BLOCK = 1
+    REJECT = 2
+    COALESCE = 3
+
+
 @dc.dataclass(frozen=True)
 class Msg:
 
@@ -48,10 +73,18 @@ class Msg:
     args: tp.List[tp.Any] = dc.field(default_factory=list)
     kwargs: tp.Dict[str, tp.Any] = dc.field(default_factory=dict)
 
+    # Set by the actor system when the message is posted, used to measure enqueue-to-dispatch latency
+    posted: float = dc.field(default=0.0, init=False, repr=False, compare=False)
+
+    # Set by the actor system when the message is counted against mailbox limits
+    counted: bool = dc.field(default=False, init=False, repr=False, compare=False)
+
 
 @dc.dataclass(frozen=True)
 class Signal(Msg):
-    pass
+
+    # Urgent signals are dispatched ahead of messages already waiting, e.g. to stop an actor that has failed
+    urgent: bool = dc.field(default=False, compare=False)
 
 
 @dc.dataclass(frozen=True)
@@ -63,7 +96,16 @@ class ErrorSignal(Signal):
 
 class Actor:
 
+    # Set process_isolated = True on an actor class to always run it in a separate worker process
+    # Isolated actors, their constructor args and messages must all be picklable
+    process_isolated = False
+
+    # Optional limit on the number of messages waiting for each actor of this class (signals are not counted)
+    mailbox_size: tp.Optional[int] = None
+    mailbox_overflow: OverflowPolicy = OverflowPolicy.REJECT
+
     __class_handlers: tp.Dict[type, tp.Dict[str, tp.Callable]] = dict()
+    __class_validators: tp.Dict[type, tp.Dict[str, _MessageValidator]] = dict()
     __log: tp.Optional[util.logging.Logger] = None
 
     def __init__(self):
@@ -92,21 +134,30 @@ class Actor:
 
     def _inspect_handlers(self) -> tp.Dict[str, tp.Callable]:
 
-        known_handlers = Actor.__class_handlers.get(self.__class__)
+        return Actor._inspect_class(self.__class__)
+
+    @staticmethod
+    def _inspect_class(actor_class: Actor.__class__) -> tp.Dict[str, tp.Callable]:
+
+        known_handlers = Actor.__class_handlers.get(actor_class)
 
         if known_handlers:
             return known_handlers
 
         handlers = dict()
 
-        for member in self.__class__.__dict__.values():
+        for member in actor_class.__dict__.values():
             if isinstance(member, Message):
                 handlers[member.__name__] = member
 
-        Actor.__class_handlers[self.__class__] = handlers
+        # Message validation is compiled once per actor class, so sending a message does not need to inspect handlers
+        validators = {name: _MessageValidator(handler) for name, handler in handlers.items()}
+
+        Actor.__class_validators[actor_class] = validators
+        Actor.__class_handlers[actor_class] = handlers
         return handlers
 
-    def _receive_message(self, system: ActorSystem, ctx: ActorContext, msg: Msg):
+    def _receive_message(self, system: ActorSystem, ctx: ActorContext, msg: Msg) -> tp.Optional[tp.Awaitable]:
 
         try:
             self.__ctx = ctx
@@ -114,7 +165,20 @@ class Actor:
             handler = self.__handlers.get(msg.message)
 
             if handler:
-                handler(self, *msg.args, **msg.kwargs)
+                result = handler(self, *msg.args, **msg.kwargs)
+
+                # Coroutine handlers are completed by the dispatcher, which awaits the returned continuation
+                if inspect.isawaitable(result):
+
+                    if not system._async_handlers:  # noqa
+                        if inspect.iscoroutine(result):
+                            result.close()
+                        raise RuntimeError(
+                            f"Message handler for [{msg.message}] is a coroutine, this requires AsyncActorSystem" +
+                            f" (actor {self.__class__.__name__})")  # TODO: Error
+
+                    return self._receive_message_async(system, ctx, msg, result)
+
                 self._check_for_fail(ctx)
 
             else:
@@ -132,6 +196,27 @@ class Actor:
         finally:
             self.__ctx = None
 
+        return None
+
+    async def _receive_message_async(
+            self, system: ActorSystem, ctx: ActorContext,
+            msg: Msg, pending: tp.Awaitable):
+
+        try:
+            self.__ctx = ctx
+
+            await pending
+            self._check_for_fail(ctx)
+
+        except Exception as error:
+
+            self.__state = ActorState.ERROR
+            self.__error = error
+            system._report_error(ctx.id, msg.message, error)  # noqa
+
+        finally:
+            self.__ctx = None
+
     def _receive_signal(self, system: ActorSystem, ctx: ActorContext, signal: Signal) -> tp.Optional[bool]:
 
         try:
@@ -173,6 +258,17 @@ class Actor:
             self.__state = ActorState.ERROR
             self.__error = failure
 
+    def _begin_stop(self):
+
+        # A deferred STOP puts the actor in STOPPING while its children stop, so it does not get more messages
+        if self.__state == ActorState.RUNNING:
+            self.__state = ActorState.STOPPING
+
+    def _mark_failed(self):
+
+        # Errors during START or STOP fail the actor straight away, there is no STOP signal to process
+        self.__state = ActorState.FAILED
+
     def _require_state(self, allowed_states: tp.List[ActorState]):
 
         if self.__state not in allowed_states:
@@ -202,6 +298,9 @@ class ActorContext:
     def spawn(self, actor_class: Actor.__class__, *args, **kwargs) -> ActorId:
         return self.__system._spawn_actor(self.__id, actor_class, args, kwargs)  # noqa
 
+    def spawn_isolated(self, actor_class: Actor.__class__, *args, **kwargs) -> ActorId:
+        return self.__system._spawn_actor(self.__id, actor_class, args, kwargs, isolated=True)  # noqa
+
     def send(self, target_id: ActorId, message: str, *args, **kwargs):
         self.__system._send_message(self.__id, target_id, message, args, kwargs)  # noqa
 
@@ -211,6 +310,15 @@ class ActorContext:
     def reply(self, message: str, *args, **kwargs):
         self.__system._send_message(self.__id, self.__sender, message, args, kwargs)  # noqa
 
+    def send_after(self, delay: float, target_id: ActorId, message: str, *args, **kwargs) -> TimerId:
+        return self.__system._schedule_message(self.__id, target_id, message, args, kwargs, delay)  # noqa
+
+    def schedule_repeating(self, interval: float, target_id: ActorId, message: str, *args, **kwargs) -> TimerId:
+        return self.__system._schedule_message(self.__id, target_id, message, args, kwargs, interval, interval)  # noqa
+
+    def cancel_timer(self, timer_id: TimerId):
+        self.__system._cancel_timer(timer_id)  # noqa
+
     def stop(self, target_id: tp.Optional[ActorId] = None):
 
         if target_id:
@@ -226,7 +334,7 @@ class ActorContext:
         self.__error = error
 
         if self.__message not in [SignalNames.START, SignalNames.STOP]:
-            self.__system._stop_actor(self.__id, self.__id)  # noqa
+            self.__system._stop_actor(self.__id, self.__id, urgent=True)  # noqa
 
 
 class Message:
@@ -240,7 +348,96 @@ class Message:
         self.type_hints = tp.get_type_hints(method)
 
     def __call__(self, *args, **kwargs):
-        self.__method(*args, **kwargs)
+        return self.__method(*args, **kwargs)
+
+
+class _MessageValidator:
+
+    """
+    Pre-compiled signature check for a single message handler
+
+    Parameter names, required parameters and type checks are worked out once, when the actor class is first seen.
+    Type checks are only applied to hints that can be checked with isinstance(), i.e. plain classes and unions
+    of plain classes. Other hints (e.g. generics or Any) accept any value.
+    """
+
+    __slots__ = ["param_names", "param_index", "param_types", "required", "min_args", "max_args", "has_types"]
+
+    def __init__(self, handler: Message):
+
+        params = handler.params
+        type_hints = handler.type_hints
+
+        self.param_names = tuple(p.name for p in params)
+        self.param_index = {p.name: i for i, p in enumerate(params)}
+        self.param_types = tuple(self._compile_type_hint(type_hints.get(p.name)) for p in params)
+
+        self.required = tuple(i for i, p in enumerate(params) if p.default is inspect.Parameter.empty)
+        self.min_args = self.required[-1] + 1 if self.required else 0
+        self.max_args = len(params)
+        self.has_types = any(t is not None for t in self.param_types)
+
+    def check(self, args, kwargs, check_types: bool = True) -> tp.Optional[str]:
+
+        n_args = len(args)
+
+        if n_args + len(kwargs) > self.max_args:
+            return "too many arguments"
+
+        # Missing params - fast path when all required params are passed positionally
+        if n_args < self.min_args:
+            for param_index in self.required:
+                param_name = self.param_names[param_index]
+                if param_index >= n_args and param_name not in kwargs:
+                    return f"missing required parameter '{param_name}'"
+
+        # Extra (unknown) kw params, including params that were already passed positionally
+        for param_name in kwargs:
+            param_index = self.param_index.get(param_name)
+            if param_index is None or param_index < n_args:
+                return f"unknown parameter '{param_name}'"
+
+        if not (check_types and self.has_types):
+            return None
+
+        # Positional arg types
+        for param_index in range(n_args):
+            param_type = self.param_types[param_index]
+            if param_type is not None and not isinstance(args[param_index], param_type):
+                return f"wrong parameter type for '{self.param_names[param_index]}'"
+
+        # Kw arg types, if param has taken a default value then no type check is needed
+        for param_name, kw_arg in kwargs.items():
+            param_type = self.param_types[self.param_index[param_name]]
+            if kw_arg is not None and param_type is not None and not isinstance(kw_arg, param_type):
+                return f"wrong parameter type for '{param_name}'"
+
+        return None
+
+    @classmethod
+    def _compile_type_hint(cls, type_hint: tp.Any) -> tp.Union[type, tp.Tuple[type, ...], None]:
+
+        if type_hint is None or type_hint is tp.Any:
+            return None
+
+        # Minimum supported Python is 3.7, which does not provide get_origin and get_args
+        origin = getattr(type_hint, "__origin__", None)
+        args = getattr(type_hint, "__args__", None)
+
+        if origin is None:
+            return type_hint if isinstance(type_hint, type) else None
+
+        if origin is tp.Union and args:
+            union_types = tuple(cls._compile_type_hint(arg) for arg in args)
+            if any(t is None or isinstance(t, tuple) for t in union_types):
+                return None
+            return union_types
+
+        # Generics are checked against their origin class only (e.g. List[int] -> list)
+        if isinstance(origin, type):
+            return origin
+
+        return None
 
 
 class SignalNames:
@@ -255,23 +452,252 @@ class SignalNames:
     FAILED = "actor:failed"
 
 
-@dc.dataclass(frozen=True)
 class ActorNode:
 
-    parent_id: ActorId
-    actor_id: ActorId
-    actor: Actor
+    """
+    Registry entry for a single actor, nodes are updated in place while holding the system lock
+    """
+
+    __slots__ = [
+        "parent_id", "actor_id", "actor", "actor_class",
+        "children", "next_child_number", "stop_requested", "deferred_stop",
+        "queued", "pending"]
+
+    def __init__(
+            self, parent_id: ActorId, actor_id: ActorId, actor: tp.Optional[Actor],
+            actor_class: tp.Optional[Actor.__class__] = None):
+
+        self.parent_id = parent_id
+        self.actor_id = actor_id
+        self.actor = actor
+
+        # For process isolated actors, this is the class of the real actor rather than the local proxy
+        self.actor_class = actor_class or actor.__class__
+
+        self.children: tp.Set[ActorId] = set()
+        self.next_child_number = 0
+
+        # Set once the actor has been asked to stop, and for parents waiting on their children to stop
+        self.stop_requested = False
+        self.deferred_stop: tp.Optional[Msg] = None
+
+        # Messages waiting for bounded mailboxes, these are updated under the system's queue lock
+        self.queued = 0
+        self.pending: tp.Optional[tp.Dict[tp.Hashable, int]] = None
+
+    def add_child(self, child_id: ActorId):
+        self.children.add(child_id)
+        self.next_child_number += 1
+
+    def remove_child(self, child_id: ActorId):
+        self.children.discard(child_id)
+
+
+@dc.dataclass(frozen=True)
+class TimingStats:
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+@dc.dataclass(frozen=True)
+class ActorMetrics:
+
+    """
+    Point-in-time snapshot of actor system metrics, all times are in seconds
+    """
+
+    uptime: float
+
+    messages_posted: int
+    messages_dispatched: int
+
+    queue_depth: int
+    queue_depth_peak: int
+    queue_depth_samples: tp.List[tp.Tuple[float, int]]
+
+    dispatch_latency: TimingStats
+    handler_time: tp.Dict[tp.Tuple[str, str], TimingStats]
+
+    actors_spawned: int
+    actors_stopped: int
+    actors_failed: int
 
-    children: tp.FrozenSet[ActorId] = dc.field(default_factory=frozenset)
-    next_child_number: int = 0
+    dropped_not_found: int
+    dropped_not_running: int
 
-    def with_child(self, child_id: ActorId):
-        children = self.children.union([child_id])
-        return ActorNode(self.parent_id, self.actor_id, self.actor, children, self.next_child_number + 1)
+    messages_rejected: int
+    messages_coalesced: int
+    senders_blocked: int
 
-    def without_child(self, child_id: ActorId):
-        children = frozenset(filter(lambda c: c != child_id, self.children))
-        return ActorNode(self.parent_id, self.actor_id, self.actor, children, self.next_child_number)
+    # Messages waiting for each actor with a bounded mailbox
+    mailbox_depth: tp.Dict[ActorId, int] = dc.field(default_factory=dict)
+
+    def format(self) -> str:
+
+        lines = [
+            f"Actor system metrics after {self.uptime:.3f}s:",
+            f"  messages: posted = {self.messages_posted}, dispatched = {self.messages_dispatched}" +
+            f", dropped (not found) = {self.dropped_not_found}, dropped (not running) = {self.dropped_not_running}",
+            f"  queue depth: current = {self.queue_depth}, peak = {self.queue_depth_peak}",
+            f"  mailbox limits: rejected = {self.messages_rejected}, coalesced = {self.messages_coalesced}" +
+            f", senders blocked = {self.senders_blocked}",
+            f"  dispatch latency: mean = {self.dispatch_latency.mean() * 1000:.3f}ms" +
+            f", max = {self.dispatch_latency.max * 1000:.3f}ms",
+            f"  actors: spawned = {self.actors_spawned}, stopped = {self.actors_stopped}" +
+            f", failed = {self.actors_failed}",
+            f"  handler time (actor class, message, count, total, mean, max):"]
+
+        by_total_time = sorted(self.handler_time.items(), key=lambda item: item[1].total, reverse=True)
+
+        for (actor_class, message), stats in by_total_time:
+            lines.append(
+                f"    {actor_class} [{message}]: {stats.count}, {stats.total * 1000:.3f}ms" +
+                f", {stats.mean() * 1000:.3f}ms, {stats.max * 1000:.3f}ms")
+
+        return "\n".join(lines)
+
+
+class _Timing:
+
+    __slots__ = ["count", "total", "max"]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def snapshot(self) -> TimingStats:
+        return TimingStats(self.count, self.total, self.max)
+
+
+class _MetricsCollector:
+
+    """
+    Metrics are recorded from every dispatch thread, all updates are made under a single lock
+    """
+
+    SAMPLE_INTERVAL = 0.1
+    MAX_SAMPLES = 1000
+
+    def __init__(self):
+
+        self.__lock = threading.Lock()
+        self.__start_time = time.perf_counter()
+
+        self.__posted = 0
+        self.__dispatched = 0
+        self.__depth_peak = 0
+        self.__depth_samples: tp.Deque[tp.Tuple[float, int]] = collections.deque(maxlen=self.MAX_SAMPLES)
+        self.__next_sample = self.__start_time
+
+        self.__dispatch_latency = _Timing()
+        self.__handler_time: tp.Dict[tp.Tuple[str, str], _Timing] = dict()
+
+        self.__spawned = 0
+        self.__stopped = 0
+        self.__failed = 0
+        self.__not_found = 0
+        self.__not_running = 0
+        self.__rejected = 0
+        self.__coalesced = 0
+        self.__blocked = 0
+
+    def message_posted(self, now: float):
+
+        with self.__lock:
+            self.__posted += 1
+            depth = self.__posted - self.__dispatched
+            if depth > self.__depth_peak:
+                self.__depth_peak = depth
+            self._sample_depth(now, depth)
+
+    def message_dispatched(self, now: float, posted: float):
+
+        with self.__lock:
+            self.__dispatched += 1
+            self.__dispatch_latency.record(now - posted)
+            self._sample_depth(now, self.__posted - self.__dispatched)
+
+    def handler_completed(self, actor_class: str, message: str, elapsed: float):
+
+        key = (actor_class, message)
+
+        with self.__lock:
+            timing = self.__handler_time.get(key)
+            if timing is None:
+                timing = self.__handler_time[key] = _Timing()
+            timing.record(elapsed)
+
+    def actor_spawned(self):
+        with self.__lock:
+            self.__spawned += 1
+
+    def actor_removed(self, failed: bool):
+        with self.__lock:
+            if failed:
+                self.__failed += 1
+            else:
+                self.__stopped += 1
+
+    def dropped_not_found(self):
+        with self.__lock:
+            self.__not_found += 1
+
+    def dropped_not_running(self):
+        with self.__lock:
+            self.__not_running += 1
+
+    def message_rejected(self):
+        with self.__lock:
+            self.__rejected += 1
+
+    def message_coalesced(self):
+        with self.__lock:
+            self.__coalesced += 1
+
+    def sender_blocked(self):
+        with self.__lock:
+            self.__blocked += 1
+
+    def snapshot(self) -> ActorMetrics:
+
+        with self.__lock:
+
+            return ActorMetrics(
+                uptime=time.perf_counter() - self.__start_time,
+                messages_posted=self.__posted,
+                messages_dispatched=self.__dispatched,
+                queue_depth=self.__posted - self.__dispatched,
+                queue_depth_peak=self.__depth_peak,
+                queue_depth_samples=list(self.__depth_samples),
+                dispatch_latency=self.__dispatch_latency.snapshot(),
+                handler_time={key: timing.snapshot() for key, timing in self.__handler_time.items()},
+                actors_spawned=self.__spawned,
+                actors_stopped=self.__stopped,
+                actors_failed=self.__failed,
+                dropped_not_found=self.__not_found,
+                dropped_not_running=self.__not_running,
+                messages_rejected=self.__rejected,
+                messages_coalesced=self.__coalesced,
+                senders_blocked=self.__blocked)
+
+    def _sample_depth(self, now: float, depth: int):
+
+        # Queue depth is sampled at a fixed interval, the most recent samples are kept
+        if now >= self.__next_sample:
+            self.__depth_samples.append((now - self.__start_time, depth))
+            self.__next_sample = now + self.SAMPLE_INTERVAL
 
 
 class ActorSystem:
@@ -279,34 +705,56 @@ class ActorSystem:
     __DELIMITER = "/"
     __ROOT_ID = __DELIMITER
 
-    def __init__(self, main_actor: Actor, system_thread: str = "actor_system"):
+    _async_handlers = False
+
+    def __init__(
+            self, main_actor: Actor, system_thread: str = "actor_system",
+            dispatch_threads: int = 1, check_types: bool = True,
+            collect_metrics: bool = False, dump_metrics: bool = False,
+            max_queue_size: tp.Optional[int] = None,
+            queue_overflow: OverflowPolicy = OverflowPolicy.REJECT):
+
         super().__init__()
 
         self._log = util.logger_for_object(self)
+        self.__check_types = check_types
+        self.__dump_metrics = dump_metrics
 
+        # Metrics are opt-in, recording them takes a lock on every message
+        # Dumping metrics at shutdown turns on collection
+        self.__metrics: tp.Optional[_MetricsCollector] = \
+            _MetricsCollector() if collect_metrics or dump_metrics else None
+
+        # Lookups read the registry without locking, dict get / set are atomic
+        # Anything that changes the registry or the nodes in it must hold the system lock
         self.__actors: tp.Dict[ActorId, ActorNode] = {self.__ROOT_ID: ActorNode("", self.__ROOT_ID, None)}
-        self.__message_queue: tp.List[Msg] = list()
 
-        self.__system_thread = threading.Thread(
-            name=system_thread,
-            target=self._actor_system_main)
+        self.__dispatcher = self._new_dispatcher(system_thread, dispatch_threads)
 
         self.__system_lock = threading.Lock()
-        self.__system_up = threading.Event()
-        self.__system_msg = threading.Event()
         self.__system_error: tp.Optional[Exception] = None
 
+        self.__timers: tp.Dict[TimerId, _Timer] = dict()
+        self.__timer_ids = itertools.count(1)
+
+        # Mailbox limits, the system-wide limit applies to all messages waiting across every actor
+        self.__max_queue_size = max_queue_size
+        self.__queue_overflow = queue_overflow
+        self.__queue_space = threading.Condition(threading.Lock())
+        self.__queued = 0
+
+        self.__main_actor = main_actor
         self.__main_id = self._register_actor(self.__ROOT_ID, main_actor, do_start=False)
 
     # Public API
 
     def start(self, wait=False):
 
-        self.__system_thread.start()
+        self.__dispatcher.start()
         self._start_actor("/system", self.__main_id)
 
         if wait:
-            self.__system_up.wait()  # TODO: Startup timeout
+            self.__dispatcher.wait_for_startup()  # TODO: Startup timeout
 
     def stop(self):
 
@@ -314,7 +762,10 @@ class ActorSystem:
 
     def wait_for_shutdown(self):
 
-        self.__system_thread.join()   # TODO: Timeout
+        self.__dispatcher.wait_for_shutdown()   # TODO: Timeout
+
+        if self.__dump_metrics:
+            self._log.info(self.metrics().format())
 
     def shutdown_code(self) -> int:
 
@@ -328,15 +779,43 @@ class ActorSystem:
 
         self._send_message("/external", self.__main_id, message, args, kwargs)
 
-    def _spawn_actor(self, parent_id: ActorId, actor_class: Actor.__class__, args, kwargs):
+    def metrics(self) -> ActorMetrics:
+
+        if self.__metrics is None:
+            raise RuntimeError("Actor metrics are not enabled for this actor system")  # TODO: Error
+
+        with self.__system_lock:
+            actor_nodes = list(self.__actors.values())
+
+        with self.__queue_space:
+            mailbox_depth = {node.actor_id: node.queued for node in actor_nodes if node.queued}
+
+        return dc.replace(self.__metrics.snapshot(), mailbox_depth=mailbox_depth)
+
+    def _new_dispatcher(self, system_thread: str, dispatch_threads: int) -> _Dispatcher:
 
-        actor = actor_class(*args, **kwargs)
+        # With a single dispatch thread, messages are processed in the order they are sent
+        # With multiple threads, each actor still processes one message at a time from its own mailbox
 
-        return self._register_actor(parent_id, actor, do_start=True)
+        if dispatch_threads > 1:
+            return _ThreadPoolDispatcher(self, system_thread, dispatch_threads)
+        else:
+            return _SingleThreadDispatcher(self, system_thread)
+
+    def _spawn_actor(self, parent_id: ActorId, actor_class: Actor.__class__, args, kwargs, isolated: bool = False):
+
+        if isolated or actor_class.process_isolated:
+            actor = _ProcessActor(actor_class, args, kwargs)
+        else:
+            actor = actor_class(*args, **kwargs)
 
-    def _register_actor(self, parent_id: ActorId, actor: Actor, do_start: bool = True):
+        return self._register_actor(parent_id, actor, do_start=True, actor_class=actor_class)
 
-        actor_class = actor.__class__
+    def _register_actor(
+            self, parent_id: ActorId, actor: Actor, do_start: bool = True,
+            actor_class: tp.Optional[Actor.__class__] = None):
+
+        actor_class = actor_class or actor.__class__
 
         with self.__system_lock:
 
@@ -344,12 +823,14 @@ class ActorSystem:
             parent_node = self.__actors.get(parent_id)
             actor_id = self._new_actor_id(parent_node, actor_class)
 
-            parent_node = parent_node.with_child(actor_id)
-            actor_node = ActorNode(parent_id, actor_id, actor)
+            actor_node = ActorNode(parent_id, actor_id, actor, actor_class)
 
-            self.__actors[parent_id] = parent_node
+            parent_node.add_child(actor_id)
             self.__actors[actor_id] = actor_node
 
+        if self.__metrics is not None:
+            self.__metrics.actor_spawned()
+
         if do_start:
             self._start_actor(parent_id, actor_id)
 
@@ -361,7 +842,10 @@ class ActorSystem:
 
         return actor_id
 
-    def _stop_actor(self, sender_id: ActorId, target_id: ActorId):
+    def _stop_actor(self, sender_id: ActorId, target_id: ActorId, urgent: bool = False) -> bool:
+
+        # A normal stop waits behind messages already sent to the actor, an urgent stop (after a failure) does not
+        # Returns whether the stop was sent as urgent
 
         if not (sender_id == target_id or self._parent_id(target_id) == sender_id or sender_id == "/system"):
 
@@ -378,23 +862,43 @@ class ActorSystem:
             self._log.warning(
                 f"Signal ignored: [{SignalNames.STOP}] -> {target_id}" +
                 f" (target actor not found)")
-            return
+            if self.__metrics is not None:
+                self.__metrics.dropped_not_found()
+            return False
 
-        for child_id in target.children:
-            self._stop_actor(target_id, child_id)
+        with self.__system_lock:
+            target.stop_requested = True
+            children = list(target.children)
+
+        # An actor that has not processed START yet has its START waiting in the normal lane
+        # An urgent stop would overtake it, so the stop is queued normally behind the START
+        # Children must stop before their parent, so the parent cannot overtake children that are stopped normally
+
+        if target.actor is not None and target.actor.state() == ActorState.NOT_STARTED:
+            urgent = False
+
+        for child_id in children:
+            if not self._stop_actor(target_id, child_id, urgent):
+                urgent = False
 
-        self._send_signal(sender_id, target_id, SignalNames.STOP)
+        self._send_signal(sender_id, target_id, SignalNames.STOP, urgent=urgent)
 
-    def _send_signal(self, sender_id: ActorId, target_id: ActorId, signal: str, error: tp.Optional[Exception] = None):
+        return urgent
+
+    def _send_signal(
+            self, sender_id: ActorId, target_id: ActorId, signal: str,
+            error: tp.Optional[Exception] = None, urgent: bool = False):
 
         if not signal.startswith(SignalNames.PREFIX):
             raise RuntimeError("Invalid signal")  # TODO: Error
 
+        # Failures are always urgent
         if signal == SignalNames.FAILED:
-            msg = ErrorSignal(sender_id, target_id, signal, error=error)
+            msg = ErrorSignal(sender_id, target_id, signal, urgent=True, error=error)
         else:
-            msg = Signal(sender_id, target_id, signal)
-        self.__message_queue.append(msg)
+            msg = Signal(sender_id, target_id, signal, urgent=urgent)
+
+        self._post_message(msg)
 
     def _send_message(self, sender_id: ActorId, target_id: ActorId, message: str, args, kwargs):
 
@@ -407,56 +911,255 @@ class ActorSystem:
         target = self._lookup_actor_node(target_id)
 
         if target is not None:
-            target_class = target.actor.__class__
+            target_class = target.actor_class
             self._check_message_signature(target_id, target_class, message, args, kwargs)
 
         msg = Msg(sender_id, target_id, message, _args, _kwargs)
-        self.__message_queue.append(msg)
 
-    def _actor_system_main(self):
+        if self._admit_message(target, msg):
+            self._post_message(msg)
 
-        self._message_loop()
+    def _admit_message(self, target: tp.Optional[ActorNode], msg: Msg) -> bool:
 
-    def _message_loop(self):
+        actor_limit = target.actor_class.mailbox_size if target is not None else None
+        system_limit = self.__max_queue_size
 
-        self.__system_up.set()
+        if actor_limit is None and system_limit is None:
+            return True
 
-        main_actor = self._lookup_actor(self.__main_id)
+        coalesce_key = self._coalesce_key(target, msg)
 
-        while main_actor.state() not in [ActorState.STOPPED, ActorState.FAILED]:
+        with self.__queue_space:
 
-            if len(self.__message_queue):
-                next_msg = self.__message_queue.pop(0)
-            else:
-                next_msg = None
+            while True:
+
+                actor_full = actor_limit is not None and target.queued >= actor_limit
+                system_full = system_limit is not None and self.__queued >= system_limit
+
+                if not actor_full and not system_full:
+                    break
+
+                policy = target.actor_class.mailbox_overflow if actor_full else self.__queue_overflow
+
+                if policy == OverflowPolicy.COALESCE and coalesce_key is not None and target.pending and \
+                        target.pending.get(coalesce_key):
+                    if self.__metrics is not None:
+                        self.__metrics.message_coalesced()
+                    return False
+
+                if policy == OverflowPolicy.BLOCK and not self.__dispatcher.is_dispatch_thread():
+                    if self.__metrics is not None:
+                        self.__metrics.sender_blocked()
+                    self.__queue_space.wait()
+                    continue
+
+                if self.__metrics is not None:
+                    self.__metrics.message_rejected()
+
+                error = f"Message rejected: [{msg.message}] -> {msg.target}" + \
+                    (" (mailbox is full)" if actor_full else " (system queue is full)")
+
+                self._log.warning(error)
+                raise RuntimeError(error)  # TODO: Error
+
+            if system_limit is not None:
+                self.__queued += 1
+
+            if actor_limit is not None:
+                target.queued += 1
+
+            if coalesce_key is not None:
+                if target.pending is None:
+                    target.pending = dict()
+                target.pending[coalesce_key] = target.pending.get(coalesce_key, 0) + 1
+
+        object.__setattr__(msg, "counted", True)
+        return True
+
+    def _release_message(self, msg: Msg):
+
+        target = self._lookup_actor_node(msg.target)
+        coalesce_key = self._coalesce_key(target, msg)
+
+        with self.__queue_space:
 
-            if next_msg:
-                if next_msg.message.startswith(SignalNames.PREFIX):
-                    self._process_signal(next_msg)
+            if self.__max_queue_size is not None:
+                self.__queued -= 1
+
+            if target is not None and target.actor_class.mailbox_size is not None:
+                target.queued -= 1
+
+            if coalesce_key is not None:
+                remaining = target.pending[coalesce_key] - 1
+                if remaining:
+                    target.pending[coalesce_key] = remaining
                 else:
-                    self._process_message(next_msg)
-            else:
-                self.__system_msg.wait(0.01)
+                    target.pending.pop(coalesce_key)
+
+            self.__queue_space.notify_all()
+
+    def _coalesce_key(self, target: tp.Optional[ActorNode], msg: Msg) -> tp.Optional[tp.Hashable]:
+
+        # Pending messages are only tracked if they could be coalesced
+        if target is None:
+            return None
+
+        if target.actor_class.mailbox_overflow != OverflowPolicy.COALESCE and \
+                self.__queue_overflow != OverflowPolicy.COALESCE:
+            return None
+
+        try:
+            key = (msg.sender, msg.message, tuple(msg.args), tuple(sorted(msg.kwargs.items())))
+            hash(key)
+        except TypeError:
+            return None  # Messages with unhashable args cannot be coalesced
+
+        return key
+
+    def _schedule_message(
+            self, sender_id: ActorId, target_id: ActorId, message: str, args, kwargs,
+            delay: float, interval: tp.Optional[float] = None) -> TimerId:
+
+        if message.startswith(SignalNames.PREFIX):
+            raise RuntimeError("Signals cannot be sent like messages")  # TODO: Error
+
+        if delay < 0 or (interval is not None and interval <= 0):
+            error = f"Invalid timer: [{message}] -> {target_id} (delay and interval must be positive)"
+            self._log.error(error)
+            raise RuntimeError(error)  # TODO: Error
+
+        target = self._lookup_actor_node(target_id)
+
+        # Message signature is checked up front, so errors are reported to the actor that set the timer
+        if target is not None:
+            target_class = target.actor_class
+            self._check_message_signature(target_id, target_class, message, args, kwargs)
+
+        with self.__system_lock:
+            timer_id = next(self.__timer_ids)
+            timer = _Timer(timer_id, sender_id, target_id, message, args or [], kwargs or {}, delay, interval)
+            self.__timers[timer_id] = timer
+
+        self.__dispatcher.schedule(timer)
+
+        return timer_id
+
+    def _cancel_timer(self, timer_id: TimerId):
+
+        # Cancelled timers are left in the dispatcher's queue and skipped when they come due
+        with self.__system_lock:
+            timer = self.__timers.pop(timer_id, None)
+            if timer is not None:
+                timer.cancelled = True
+
+    def _fire_timer(self, timer: _Timer):
+
+        if timer.cancelled:
+            return
+
+        # Timers belong to the actor that set them, they go away when either the owner or the target is gone
+        if self._lookup_actor_node(timer.sender) is None or self._lookup_actor_node(timer.target) is None:
+            self._log.warning(f"Timer ignored: [{timer.message}] -> {timer.target}  (actor not found)")
+            if self.__metrics is not None:
+                self.__metrics.dropped_not_found()
+            self._cancel_timer(timer.timer_id)
+            return
+
+        msg = Msg(timer.sender, timer.target, timer.message, timer.args, timer.kwargs)
+
+        # If the target's mailbox is full, this occurrence of the timer is skipped
+        try:
+            if self._admit_message(self._lookup_actor_node(timer.target), msg):
+                self._post_message(msg)
+        except RuntimeError:
+            pass
+
+        if timer.interval is None:
+            self._cancel_timer(timer.timer_id)
+            return
+
+        # If the dispatcher has fallen behind, skip missed intervals instead of firing them back to back
+        timer.deadline = max(timer.deadline + timer.interval, time.monotonic())
+        self.__dispatcher.schedule(timer)
+
+    def _post_message(self, msg: Msg):
+
+        if self.__metrics is not None:
+            now = time.perf_counter()
+            object.__setattr__(msg, "posted", now)
+            self.__metrics.message_posted(now)
+
+        self.__dispatcher.post(msg)
+
+    def _dispatch_message(self, msg: Msg) -> tp.Optional[tp.Awaitable]:
+
+        if self.__metrics is not None:
+            self.__metrics.message_dispatched(time.perf_counter(), msg.posted)
+
+        if msg.counted:
+            self._release_message(msg)
+
+        if msg.message.startswith(SignalNames.PREFIX):
+            self._process_signal(msg)
+            return None
+        else:
+            return self._process_message(msg)
+
+    def _main_actor_stopped(self) -> bool:
+
+        # Dispatchers check this after every message, the system goes down when the main actor stops
+        main_actor = self.__main_actor
+
+        if main_actor.state() not in [ActorState.STOPPED, ActorState.FAILED]:
+            return False
 
         self.__system_error = main_actor.error()
+        return True
 
-    def _process_message(self, msg: Msg):
+    def _process_message(self, msg: Msg) -> tp.Optional[tp.Awaitable]:
 
         target = self._lookup_actor_node(msg.target)
 
         if target is None:
             # Unhandled messages are dropped, with just a warning in the log
             self._log.warning(f"Message ignored: [{msg.message}] -> {msg.target}  (target actor not found)")
-            return
+            if self.__metrics is not None:
+                self.__metrics.dropped_not_found()
+            return None
 
         if target.actor.state() != ActorState.RUNNING:
             self._log.warning(f"Message ignored: [{msg.message}] -> {msg.target}  (target actor not running)")
-            return
+            if self.__metrics is not None:
+                self.__metrics.dropped_not_running()
+            return None
 
         parent_id = target.parent_id
         ctx = ActorContext(self, msg.message, msg.target, parent_id, msg.sender)
 
-        target.actor._receive_message(self, ctx, msg)  # noqa
+        if self.__metrics is None:
+            return target.actor._receive_message(self, ctx, msg)  # noqa
+
+        start_time = time.perf_counter()
+        result = target.actor._receive_message(self, ctx, msg)  # noqa
+
+        # For async handlers, handler time includes time spent waiting
+        if result is not None:
+            return self._time_async_handler(target.actor_class, msg.message, start_time, result)
+
+        self.__metrics.handler_completed(
+            target.actor_class.__name__, msg.message,
+            time.perf_counter() - start_time)
+
+        return None
+
+    async def _time_async_handler(
+            self, actor_class: Actor.__class__, message: str,
+            start_time: float, pending: tp.Awaitable):
+
+        try:
+            await pending
+        finally:
+            self.__metrics.handler_completed(actor_class.__name__, message, time.perf_counter() - start_time)
 
     def _process_signal(self, signal: Msg):
 
@@ -465,12 +1168,28 @@ class ActorSystem:
         if target is None:
             # Unhandled messages are dropped, with just a warning in the log
             self._log.warning(f"Signal ignored: [{signal.message}] -> {signal.target}  (target actor not found)")
+            if self.__metrics is not None:
+                self.__metrics.dropped_not_found()
+            return
+
+        # The root node has no actor, it only receives lifecycle notifications from the main actor
+        if target.actor is None:
+            return
+
+        if signal.message == SignalNames.STOP and self.__dispatcher.concurrent and self._defer_stop(target, signal):
             return
 
         parent_id = target.parent_id
         ctx = ActorContext(self, signal.message, signal.target, parent_id, signal.sender)
+
+        start_time = time.perf_counter()
         result = target.actor._receive_signal(self, ctx, signal)  # noqa
 
+        if self.__metrics is not None:
+            self.__metrics.handler_completed(
+                target.actor_class.__name__, signal.message,
+                time.perf_counter() - start_time)
+
         # Generate lifecycle notifications
 
         if signal.message == SignalNames.STOP:
@@ -487,19 +1206,55 @@ class ActorSystem:
         if isinstance(signal, ErrorSignal):
             if signal.target == self._parent_id(signal.sender) and result is not True:
                 target.actor._Actor__error = signal.error  # TODO: Error could be wrapped to indicate propagation?
-                self._stop_actor("/system", signal.target)
+                self._stop_actor("/system", signal.target, urgent=True)
                 self._send_signal(signal.sender, target.parent_id, SignalNames.FAILED, signal.error)
 
         # Remove dead actors
         # If the actor is now stopped or failed, take it out of the registry
 
         if target.actor.state() in [ActorState.STOPPED, ActorState.FAILED]:
+
+            if self.__metrics is not None:
+                self.__metrics.actor_removed(failed=target.actor.state() == ActorState.FAILED)
+            deferred_stop = None
+
             with self.__system_lock:
-                self.__actors.pop(signal.target)
+                self.__actors.pop(signal.target, None)
                 parent = self.__actors.get(target.parent_id)
                 if parent is not None:
-                    parent = parent.without_child(signal.target)
-                    self.__actors[target.parent_id] = parent
+                    parent.remove_child(signal.target)
+                    if not parent.children:
+                        deferred_stop = parent.deferred_stop
+                        parent.deferred_stop = None
+
+            # If the parent was waiting for its last child to stop, it can now stop itself
+            if deferred_stop is not None:
+                self._post_message(deferred_stop)
+
+    def _defer_stop(self, target: ActorNode, signal: Msg) -> bool:
+
+        # With concurrent dispatch, children can still be stopping on other threads when their parent gets STOP
+        # To keep the same lifecycle order as single threaded dispatch, the parent waits for its children to stop
+        # Its STOP signal is posted again when the last child is removed, in the meantime it will not get messages
+
+        with self.__system_lock:
+
+            if not target.children:
+                return False
+
+            target.deferred_stop = signal
+
+            # Children spawned after the stop was requested have not been asked to stop yet
+            not_stopping = [
+                child_id for child_id in target.children
+                if not self.__actors[child_id].stop_requested]
+
+        target.actor._begin_stop()  # noqa
+
+        for child_id in not_stopping:
+            self._stop_actor(target.actor_id, child_id, signal.urgent)
+
+        return True
 
     def _report_error(self, actor_id: ActorId, message: str, error: Exception):
 
@@ -516,23 +1271,21 @@ class ActorSystem:
         # Dp not send STOP signal for errors that occur while processing START or STOP
         # In this case, directly set the state to FAILED and send a FAILED notification to the parent
         if message in [SignalNames.START, SignalNames.STOP]:
-            actor_node.actor._Actor__state = ActorState.FAILED
+            actor_node.actor._mark_failed()  # noqa
             self._send_signal(actor_id, actor_node.parent_id, SignalNames.FAILED, error)  # TODO: Wrap for propagation?
 
         # Otherwise stop the actor, a FAILED notification will be generated when the STOP signal is processed
         else:
-            self._stop_actor("/system", actor_id)
+            self._stop_actor("/system", actor_id, urgent=True)
 
     def _lookup_actor_node(self, actor_id: ActorId) -> tp.Optional[ActorNode]:
 
-        with self.__system_lock:
-            return self.__actors.get(actor_id)
+        return self.__actors.get(actor_id)
 
     def _lookup_actor(self, actor_id: ActorId) -> tp.Optional[Actor]:
 
-        with self.__system_lock:
-            actor_node = self.__actors.get(actor_id)
-            return actor_node.actor if actor_node is not None else None
+        actor_node = self.__actors.get(actor_id)
+        return actor_node.actor if actor_node is not None else None
 
     def _new_actor_id(self, parent_node: ActorNode, actor_class: Actor.__class__) -> ActorId:
 
@@ -552,62 +1305,785 @@ class ActorSystem:
 
     def _check_message_signature(self, target_id: ActorId, target_class: Actor.__class__, message: str, args, kwargs):
 
-        target_handler = Actor._Actor__class_handlers.get(target_class).get(message)  # noqa
+        validator = Actor._Actor__class_validators.get(target_class).get(message)  # noqa
 
-        if target_handler is None:
+        if validator is None:
             error = f"Invalid message: [{message}] -> {target_id} (unknown message '{message}')"
             self._log.error(error)
             raise RuntimeError(error)
 
-        target_params = target_handler.params
-        type_hints = target_handler.type_hints
+        problem = validator.check(args, kwargs, self.__check_types)
 
-        if len(args) + len(kwargs) > len(target_params):
-            error = f"Invalid message: [{message}] -> {target_id} (too many arguments)"
+        if problem is not None:
+            error = f"Invalid message: [{message}] -> {target_id} ({problem})"
             self._log.error(error)
             raise RuntimeError(error)
 
-        pos_params = target_params[:len(args)]
-        kw_params = target_params[len(args):]
-        kw_param_names = set(map(lambda p: p.name, kw_params))
 
-        # Missing params
-        for param in kw_params:
-            if param.default is inspect._empty and param.name not in kwargs:  # noqa
-                error = f"Invalid message: [{message}] -> {target_id} (missing required parameter '{param.name}')"
-                self._log.error(error)
-                raise RuntimeError(error)
+class _Timer:
 
-        # Extra (unknown) kw params
-        for param_name in kwargs.keys():
-            if param_name not in kw_param_names:
-                error = f"Invalid message: [{message}] -> {target_id} (unknown parameter '{param_name}')"
-                self._log.error(error)
-                raise RuntimeError(error)
+    __slots__ = [
+        "timer_id", "sender", "target", "message", "args", "kwargs",
+        "deadline", "interval", "cancelled"]
 
-        # Positional arg types
-        for pos_param, pos_arg in zip(pos_params, args):
+    def __init__(
+            self, timer_id: TimerId, sender: ActorId, target: ActorId, message: str, args, kwargs,
+            delay: float, interval: tp.Optional[float]):
 
-            type_hint = type_hints.get(pos_param.name)
+        self.timer_id = timer_id
+        self.sender = sender
+        self.target = target
+        self.message = message
+        self.args = args
+        self.kwargs = kwargs
+        self.deadline = time.monotonic() + delay
+        self.interval = interval
+        self.cancelled = False
 
-            # If no type hint is available, allow anything through
-            if type_hint is not None and not isinstance(pos_arg, type_hint):
-                error = f"Invalid message: [{message}] -> {target_id} (wrong parameter type for '{pos_param.name}')"
-                self._log.error(error)
-                raise RuntimeError(error)
 
-        # Kw arg types
-        for kw_param in kw_params:
+class _TimerQueue:
 
-            kw_arg = kwargs.get(kw_param.name)
-            type_hint = type_hints.get(kw_param.name)
+    """
+    Heap of timers ordered by deadline, not thread safe (dispatchers use it under their own lock)
+    """
 
-            # If param has taken a default value, no type check is needed
-            if kw_arg is None:
-                continue
+    def __init__(self):
+        self.__heap: tp.List[tp.Tuple[float, int, _Timer]] = []
+        self.__seq = itertools.count()
+
+    def push(self, timer: _Timer):
+        heapq.heappush(self.__heap, (timer.deadline, next(self.__seq), timer))
+
+    def pop_due(self) -> tp.List[_Timer]:
+
+        if not self.__heap:
+            return []
+
+        now = time.monotonic()
+        due = []
 
-            # If no type hint is available, allow anything through
-            if type_hint is not None and not isinstance(kw_arg, type_hint):
-                error = f"Invalid message: [{message}] -> {target_id} (wrong parameter type for '{kw_param.name}')"
-                self._log.error(error)
-                raise RuntimeError(error)
+        while self.__heap and self.__heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self.__heap)
+            if not timer.cancelled:
+                due.append(timer)
+
+        return due
+
+    def wait_time(self) -> tp.Optional[float]:
+
+        # Time until the next timer is due, or None to wait indefinitely
+        if not self.__heap:
+            return None
+
+        return max(self.__heap[0][0] - time.monotonic(), 0)
+
+
+class _Dispatcher:
+
+    """
+    A dispatcher decides which thread processes each message, ActorSystem decides how it is processed
+
+    Urgent signals (failures and the stops they cause) are queued in a separate lane and dispatched ahead of any
+    waiting messages. Everything else, including lifecycle signals for a normal stop, is queued with the messages.
+    Within each lane messages are dispatched in the order they were posted.
+    """
+
+    concurrent = False
+
+    def __init__(self, system: ActorSystem):
+        self._system = system
+        self._system_up = threading.Event()
+
+    def start(self):
+        pass
+
+    def post(self, msg: Msg):
+        pass
+
+    def schedule(self, timer: _Timer):
+        pass
+
+    def is_dispatch_thread(self) -> bool:
+        return False
+
+    def wait_for_startup(self):
+        self._system_up.wait()
+
+    def wait_for_shutdown(self):
+        pass
+
+
+class _SingleThreadDispatcher(_Dispatcher):
+
+    """
+    Process all messages on a single thread, in the order they are sent (urgent signals first)
+    """
+
+    def __init__(self, system: ActorSystem, thread_name: str):
+
+        super().__init__(system)
+
+        self.__urgent_queue: tp.Deque[Msg] = collections.deque()
+        self.__message_queue: tp.Deque[Msg] = collections.deque()
+        self.__message_available = threading.Condition(threading.Lock())
+        self.__timers = _TimerQueue()
+
+        self.__thread = threading.Thread(name=thread_name, target=self._message_loop)
+
+    def start(self):
+
+        self.__thread.start()
+
+    def post(self, msg: Msg):
+
+        # Wake the message loop if it is waiting for messages
+        with self.__message_available:
+            if _is_urgent(msg):
+                self.__urgent_queue.append(msg)
+            else:
+                self.__message_queue.append(msg)
+            self.__message_available.notify()
+
+    def schedule(self, timer: _Timer):
+
+        # Wake the message loop so it can wait again with the new timeout
+        with self.__message_available:
+            self.__timers.push(timer)
+            self.__message_available.notify()
+
+    def is_dispatch_thread(self) -> bool:
+
+        return threading.current_thread() is self.__thread
+
+    def wait_for_shutdown(self):
+
+        self.__thread.join()
+
+    def _message_loop(self):
+
+        self._system_up.set()
+
+        while not self._system._main_actor_stopped():  # noqa
+
+            # Block until a message is available or a timer is due, there is no need to poll
+            # The main actor can only stop while processing a message, so it is safe to wait here
+            with self.__message_available:
+
+                due_timers = self.__timers.pop_due()
+
+                while not due_timers and not self.__urgent_queue and not self.__message_queue:
+                    self.__message_available.wait(self.__timers.wait_time())
+                    due_timers = self.__timers.pop_due()
+
+                if self.__urgent_queue:
+                    next_msg = self.__urgent_queue.popleft()
+                elif self.__message_queue:
+                    next_msg = self.__message_queue.popleft()
+                else:
+                    next_msg = None
+
+            # Timers post their messages to the back of the queue
+            for timer in due_timers:
+                self._system._fire_timer(timer)  # noqa
+
+            if next_msg is not None:
+                self._system._dispatch_message(next_msg)  # noqa
+
+
+def _is_urgent(msg: Msg) -> bool:
+    return isinstance(msg, Signal) and msg.urgent
+
+
+class _Mailbox:
+
+    __slots__ = ["actor_id", "urgent", "messages", "ticket", "held"]
+
+    def __init__(self, actor_id: ActorId):
+        self.actor_id = actor_id
+        self.urgent: tp.Deque[Msg] = collections.deque()
+        self.messages: tp.Deque[Msg] = collections.deque()
+        self.ticket = 0
+        self.held = False
+
+    def append(self, msg: Msg):
+        if _is_urgent(msg):
+            self.urgent.append(msg)
+        else:
+            self.messages.append(msg)
+
+    def popleft(self) -> Msg:
+        if self.urgent:
+            return self.urgent.popleft()
+        else:
+            return self.messages.popleft()
+
+    def has_messages(self) -> bool:
+        return bool(self.urgent) or bool(self.messages)
+
+
+class _ThreadPoolDispatcher(_Dispatcher):
+
+    """
+    Process messages on a pool of worker threads, each actor has its own mailbox
+
+    A mailbox is only ever held by one worker at a time, so each actor still sees one message at a time,
+    in the order messages were sent to it. Workers take one message from a mailbox and then put the mailbox
+    to the back of the ready queue, so a busy actor cannot starve the others. Mailboxes exist only while
+    they have messages waiting or in progress.
+
+    Mailboxes with urgent signals waiting go in a separate ready queue, which workers always check first.
+    When an urgent signal arrives for a mailbox already waiting in the regular queue, the mailbox is queued again
+    with a new ticket and the old queue entry is skipped.
+    """
+
+    concurrent = True
+
+    def __init__(self, system: ActorSystem, thread_name: str, thread_count: int):
+
+        super().__init__(system)
+
+        self.__mailboxes: tp.Dict[ActorId, _Mailbox] = dict()
+        self.__ready_urgent: tp.Deque[tp.Tuple[int, _Mailbox]] = collections.deque()
+        self.__ready: tp.Deque[tp.Tuple[int, _Mailbox]] = collections.deque()
+        self.__ready_available = threading.Condition(threading.Lock())
+        self.__timers = _TimerQueue()
+        self.__shutdown = False
+
+        self.__threads = [
+            threading.Thread(name=f"{thread_name}-{i}", target=self._worker_loop)
+            for i in range(thread_count)]
+
+    def start(self):
+
+        for thread in self.__threads:
+            thread.start()
+
+        self._system_up.set()
+
+    def post(self, msg: Msg):
+
+        with self.__ready_available:
+
+            mailbox = self.__mailboxes.get(msg.target)
+
+            # If the mailbox exists it is either ready or held by a worker, either way it will be picked up
+            # A ready mailbox is moved up to the urgent queue when its first urgent signal arrives
+            if mailbox is not None:
+                mailbox.append(msg)
+                if not mailbox.held and len(mailbox.urgent) == 1 and _is_urgent(msg):
+                    self._schedule(mailbox)
+                return
+
+            mailbox = _Mailbox(msg.target)
+            mailbox.append(msg)
+
+            self.__mailboxes[msg.target] = mailbox
+            self._schedule(mailbox)
+
+    def schedule(self, timer: _Timer):
+
+        # Any idle worker can fire timers, wake one so it waits again with the new timeout
+        with self.__ready_available:
+            self.__timers.push(timer)
+            self.__ready_available.notify()
+
+    def is_dispatch_thread(self) -> bool:
+
+        return threading.current_thread() in self.__threads
+
+    def wait_for_shutdown(self):
+
+        for thread in self.__threads:
+            thread.join()
+
+    def _worker_loop(self):
+
+        while True:
+
+            with self.__ready_available:
+
+                mailbox = None
+                due_timers = []
+
+                while mailbox is None and not due_timers:
+
+                    # Children always stop before their parents, so once the main actor has stopped
+                    # there are no actors left. Any messages still waiting are for actors that are already gone
+                    if self.__shutdown:
+                        return
+
+                    due_timers = self.__timers.pop_due()
+                    mailbox = self._next_ready()
+
+                    if mailbox is None and not due_timers:
+                        self.__ready_available.wait(self.__timers.wait_time())
+
+                if mailbox is not None:
+                    mailbox.held = True
+                    next_msg = mailbox.popleft()
+
+            for timer in due_timers:
+                self._system._fire_timer(timer)  # noqa
+
+            if mailbox is None:
+                continue
+
+            self._system._dispatch_message(next_msg)  # noqa
+
+            with self.__ready_available:
+
+                mailbox.held = False
+
+                if mailbox.has_messages():
+                    self._schedule(mailbox)
+                else:
+                    self.__mailboxes.pop(mailbox.actor_id)
+
+                if not self.__shutdown and self._system._main_actor_stopped():  # noqa
+                    self.__shutdown = True
+                    self.__ready_available.notify_all()
+
+    def _schedule(self, mailbox: _Mailbox):
+
+        # Only the entry with the latest ticket is live, any earlier entries for the same mailbox are skipped
+        mailbox.ticket += 1
+        ready_queue = self.__ready_urgent if mailbox.urgent else self.__ready
+        ready_queue.append((mailbox.ticket, mailbox))
+
+        self.__ready_available.notify()
+
+    def _next_ready(self) -> tp.Optional[_Mailbox]:
+
+        for ready_queue in (self.__ready_urgent, self.__ready):
+            while ready_queue:
+                ticket, mailbox = ready_queue.popleft()
+                if ticket == mailbox.ticket and not mailbox.held:
+                    return mailbox
+
+        return None
+
+
+class _AsyncioDispatcher(_Dispatcher):
+
+    """
+    Process messages on an asyncio event loop, running in a single dedicated thread
+
+    Each actor has its own mailbox, drained by its own task. Message handlers can be coroutines,
+    while a handler is waiting other actors can process messages but the waiting actor gets no new
+    messages until its handler completes. Messages posted from other threads are passed to the loop
+    with call_soon_threadsafe().
+
+    Urgent signals overtake messages within each mailbox, but mailbox tasks for different actors take turns on the loop.
+    """
+
+    concurrent = True
+
+    def __init__(self, system: ActorSystem, thread_name: str):
+
+        super().__init__(system)
+
+        self.__mailboxes: tp.Dict[ActorId, _Mailbox] = dict()
+        self.__shutdown: tp.Optional[asyncio.Event] = None
+
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(name=thread_name, target=self._run_loop)
+
+    def start(self):
+
+        self.__thread.start()
+
+    def post(self, msg: Msg):
+
+        if threading.current_thread() is self.__thread:
+            self._post_on_loop(msg)
+
+        elif not self.__loop.is_closed():
+            self.__loop.call_soon_threadsafe(self._post_on_loop, msg)
+
+    def schedule(self, timer: _Timer):
+
+        if threading.current_thread() is self.__thread:
+            self._schedule_on_loop(timer)
+
+        elif not self.__loop.is_closed():
+            self.__loop.call_soon_threadsafe(self._schedule_on_loop, timer)
+
+    def is_dispatch_thread(self) -> bool:
+
+        return threading.current_thread() is self.__thread
+
+    def wait_for_shutdown(self):
+
+        self.__thread.join()
+
+    def _schedule_on_loop(self, timer: _Timer):
+
+        delay = max(timer.deadline - time.monotonic(), 0)
+        self.__loop.call_later(delay, self._system._fire_timer, timer)  # noqa
+
+    def _post_on_loop(self, msg: Msg):
+
+        mailbox = self.__mailboxes.get(msg.target)
+
+        # If the mailbox exists, its task is still running and will pick up the new message
+        if mailbox is not None:
+            mailbox.append(msg)
+            return
+
+        mailbox = _Mailbox(msg.target)
+        mailbox.append(msg)
+
+        self.__mailboxes[msg.target] = mailbox
+        self.__loop.create_task(self._drain_mailbox(mailbox))
+
+    async def _drain_mailbox(self, mailbox: _Mailbox):
+
+        while mailbox.has_messages():
+
+            next_msg = mailbox.popleft()
+            pending = self._system._dispatch_message(next_msg)  # noqa
+
+            if pending is not None:
+                await pending
+
+            if self._system._main_actor_stopped():  # noqa
+                self.__shutdown.set()
+
+            # Let other actors take a turn, so a busy mailbox cannot starve the loop
+            await asyncio.sleep(0)
+
+        self.__mailboxes.pop(mailbox.actor_id)
+
+    def _run_loop(self):
+
+        asyncio.set_event_loop(self.__loop)
+        self.__shutdown = asyncio.Event()
+
+        try:
+            self.__loop.run_until_complete(self._main())
+
+            # Anything still running belongs to actors that are already gone (same as the thread dispatchers)
+            remaining = asyncio.all_tasks(self.__loop)
+
+            for task in remaining:
+                task.cancel()
+
+            self.__loop.run_until_complete(asyncio.gather(*remaining, return_exceptions=True))
+
+        finally:
+            self.__loop.close()
+
+    async def _main(self):
+
+        self._system_up.set()
+
+        await self.__shutdown.wait()
+
+
+class AsyncActorSystem(ActorSystem):
+
+    """
+    An actor system that runs on an asyncio event loop instead of OS threads
+
+    Message handlers (methods marked with @Message) can be declared async, so actors can await I/O without
+    blocking other actors. Regular handlers and the ActorContext API work exactly as for ActorSystem.
+    """
+
+    _async_handlers = True
+
+    def __init__(
+            self, main_actor: Actor, system_thread: str = "actor_system", check_types: bool = True,
+            collect_metrics: bool = False, dump_metrics: bool = False,
+            max_queue_size: tp.Optional[int] = None,
+            queue_overflow: OverflowPolicy = OverflowPolicy.REJECT):
+
+        super().__init__(
+            main_actor, system_thread, check_types=check_types,
+            collect_metrics=collect_metrics, dump_metrics=dump_metrics,
+            max_queue_size=max_queue_size, queue_overflow=queue_overflow)
+
+    def _new_dispatcher(self, system_thread: str, dispatch_threads: int) -> _Dispatcher:
+
+        return _AsyncioDispatcher(self, system_thread)
+
+
+class _ProcessActor(Actor):
+
+    """
+    Local proxy for an actor that runs in a separate worker process
+
+    The real actor is created in the worker process when the proxy starts. Messages for the actor are pickled and
+    sent to the worker over a pipe, where they are processed one at a time. Messages the actor sends are passed
+    back and sent from the proxy, which has the same ID as the real actor. If the actor fails, or the worker process
+    dies unexpectedly (e.g. a crash in native code), the proxy fails and its parent gets actor:failed as normal.
+
+    Isolated actors can send messages and stop actors, but cannot spawn children or set timers.
+    """
+
+    __OWN_MESSAGES = ["_forward_message", "_process_failed"]
+
+    def __init__(self, actor_class: Actor.__class__, args, kwargs):
+
+        super().__init__()
+
+        # The real actor is never created locally, messages are still checked against its handlers before sending
+        Actor._inspect_class(actor_class)  # noqa
+
+        self.__actor_class = actor_class
+        self.__args = args
+        self.__kwargs = kwargs
+
+        self.__system: tp.Optional[ActorSystem] = None
+        self.__actor_id: tp.Optional[ActorId] = None
+
+        self.__process: tp.Optional[mp.Process] = None
+        self.__conn: tp.Optional[mp.connection.Connection] = None
+        self.__reader: tp.Optional[threading.Thread] = None
+
+        self.__lock = threading.Lock()
+        self.__stopping = False
+        self.__stopped = False
+        self.__posted_failure: tp.Optional[Exception] = None
+        self.__stop_failure: tp.Optional[Exception] = None
+
+    def on_start(self):
+
+        self.__system = self.actors()._ActorContext__system  # noqa
+        self.__actor_id = self.actors().id
+
+        # Always use spawn, forking a process with running dispatch threads is not safe
+        mp_context = mp.get_context("spawn")
+        local_conn, remote_conn = mp_context.Pipe()
+
+        self.__conn = local_conn
+        self.__process = mp_context.Process(
+            name=f"actor:{self.__actor_id}", target=_run_process_actor, daemon=True,
+            args=(remote_conn, self.__actor_class, self.__args, self.__kwargs, self.__actor_id, self.actors().parent))
+
+        self.__process.start()
+        remote_conn.close()
+
+        self.__reader = threading.Thread(name=f"actor:{self.__actor_id}", target=self._read_replies, daemon=True)
+        self.__reader.start()
+
+        self.__conn.send(("signal", self.actors().parent, SignalNames.START))
+
+    def on_stop(self):
+
+        with self.__lock:
+            self.__stopping = True
+
+        try:
+            self.__conn.send(("signal", self.actors().id, SignalNames.STOP))
+        except (OSError, ValueError):
+            pass  # The worker has already gone down, the reader thread will report it
+
+        self.__reader.join()
+        self.__process.join()
+        self.__conn.close()
+
+        # A failure may have been posted just before the proxy was asked to stop, in which case it was never handled
+        failure = self.__stop_failure
+
+        if failure is None and self.__posted_failure is not None and self.error() is None:
+            failure = self.__posted_failure
+
+        if failure is not None:
+            raise failure
+
+    def _receive_message(self, system: ActorSystem, ctx: ActorContext, msg: Msg) -> tp.Optional[tp.Awaitable]:
+
+        # Everything except the proxy's own messages is passed through to the worker process
+        if msg.message not in self.__OWN_MESSAGES:
+            msg = Msg(msg.sender, msg.target, "_forward_message", [msg])
+
+        return super()._receive_message(system, ctx, msg)
+
+    @Message
+    def _forward_message(self, msg: Msg):
+
+        self.__conn.send(("message", msg.sender, msg.message, msg.args, msg.kwargs))
+
+    @Message
+    def _process_failed(self, error: Exception):
+
+        self.actors().fail(error)
+
+    def _read_replies(self):
+
+        try:
+
+            while not self.__stopped:
+
+                for reply in self.__conn.recv():
+                    self._process_reply(reply)
+
+        except (EOFError, OSError):
+            pass
+
+        if not self.__stopped:
+
+            self.__process.join()
+
+            error = RuntimeError(
+                f"Worker process for actor {self.__actor_id} exited unexpectedly" +
+                f" (exit code {self.__process.exitcode})")  # TODO: Error
+
+            self._report_failure(error)
+
+    def _process_reply(self, reply: tuple):
+
+        reply_type = reply[0]
+
+        try:
+
+            if reply_type == "send":
+                _, target_id, message, args, kwargs = reply
+                self.__system._send_message(self.__actor_id, target_id, message, args, kwargs)  # noqa
+
+            elif reply_type == "stop":
+                _, target_id, urgent = reply
+                self.__system._stop_actor(self.__actor_id, target_id, urgent)  # noqa
+
+            elif reply_type == "failed":
+                _, error = reply
+                self._report_failure(error)
+
+            elif reply_type == "stopped":
+                self.__stopped = True
+
+        except Exception as error:
+            self._report_failure(error)
+
+    def _report_failure(self, error: Exception):
+
+        # Failures are handled on the proxy's dispatch thread, unless the proxy is already stopping
+        with self.__lock:
+
+            if self.__stopping:
+                if self.__stop_failure is None:
+                    self.__stop_failure = error
+                return
+
+            if self.__posted_failure is not None:
+                return
+
+            self.__posted_failure = error
+
+        failure_msg = Msg(self.__actor_id, self.__actor_id, "_process_failed", [error])
+        self.__system._post_message(failure_msg)  # noqa
+
+
+class _ProcessHost:
+
+    """
+    Runs an isolated actor inside its worker process, standing in for the actor system
+
+    ActorContext calls on the host are collected while each message is processed and sent back to the proxy
+    as a single batch when processing is complete.
+    """
+
+    _async_handlers = False
+
+    def __init__(self, conn: mp.connection.Connection, actor_id: ActorId, parent_id: ActorId):
+
+        self.__conn = conn
+        self.__actor_id = actor_id
+        self.__parent_id = parent_id
+
+        self.__replies: tp.List[tuple] = []
+        self.__failure_reported = False
+
+    def run(self, actor_class: Actor.__class__, args, kwargs):
+
+        try:
+            actor = actor_class(*args, **kwargs)
+        except Exception as error:
+            self.__conn.send([("failed", self._portable_error(error))])
+            return
+
+        while True:
+
+            request = self.__conn.recv()
+            request_type, sender_id, message = request[:3]
+
+            ctx = ActorContext(self, message, self.__actor_id, self.__parent_id, sender_id)  # noqa
+
+            if request_type == "signal":
+                signal = Signal(sender_id, self.__actor_id, message)
+                actor._receive_signal(self, ctx, signal)  # noqa
+
+            elif actor.state() == ActorState.RUNNING:
+                msg = Msg(sender_id, self.__actor_id, message, request[3], request[4])
+                actor._receive_message(self, ctx, msg)  # noqa
+
+            is_stop = request_type == "signal" and message == SignalNames.STOP
+
+            self._send_replies(actor, is_stop)
+
+            if is_stop:
+                return
+
+    def _send_replies(self, actor: Actor, is_stop: bool):
+
+        replies = self.__replies
+        self.__replies = []
+
+        # If the actor failed, the proxy stops itself when it gets the failure, so self-stops are not needed
+        if actor.error() is not None and not self.__failure_reported:
+            replies = [r for r in replies if not (r[0] == "stop" and r[1] == self.__actor_id)]
+            replies.append(("failed", self._portable_error(actor.error())))
+            self.__failure_reported = True
+
+        if is_stop:
+            replies.append(("stopped",))
+
+        if replies:
+            self.__conn.send(replies)
+
+    def _spawn_actor(self, parent_id: ActorId, actor_class: Actor.__class__, args, kwargs, isolated: bool = False):
+        raise RuntimeError("Process isolated actors cannot spawn child actors")  # TODO: Error
+
+    def _send_message(self, sender_id: ActorId, target_id: ActorId, message: str, args, kwargs):
+        self.__replies.append(("send", target_id, message, args, kwargs))
+
+    def _stop_actor(self, sender_id: ActorId, target_id: ActorId, urgent: bool = False):
+        self.__replies.append(("stop", target_id, urgent))
+
+    def _schedule_message(self, *args, **kwargs):
+        raise RuntimeError("Process isolated actors cannot set timers")  # TODO: Error
+
+    def _cancel_timer(self, timer_id: TimerId):
+        raise RuntimeError("Process isolated actors cannot set timers")  # TODO: Error
+
+    def _report_error(self, actor_id: ActorId, message: str, error: Exception):
+
+        # Errors are picked up from the actor state and sent back once processing is complete
+        log = util.logger_for_object(self)
+        log.error(f"{actor_id} [{message}]: {str(error)}")
+
+    @staticmethod
+    def _portable_error(error: Exception) -> Exception:
+
+        # Not every exception can be pickled, fall back to a plain runtime error with the same message
+        try:
+            pickle.loads(pickle.dumps(error))
+            return error
+        except Exception:  # noqa
+            return RuntimeError(f"{type(error).__name__}: {str(error)}")
+
+
+def _run_process_actor(
+        conn: mp.connection.Connection, actor_class: Actor.__class__, args, kwargs,
+        actor_id: ActorId, parent_id: ActorId):
+
+    # Worker processes are started with spawn, so logging needs to be set up again
+    util.configure_logging()
+
+    try:
+        host = _ProcessHost(conn, actor_id, parent_id)
+        host.run(actor_class, args, kwargs)
+    except (EOFError, OSError):
+        pass  # The engine went away, nothing to report to
+    finally:
+        conn.close()
@@ -25,6 +25,7 @@ import trac.rt.config as cfg
 import trac.rt.impl.repositories as _repos
 import trac.rt.impl.storage as _storage
 import trac.rt.impl.util as util
+import trac.rt.exec.graph_builder as _graph
 
 
 class DevModeTranslator:
@@ -43,7 +44,7 @@ class DevModeTranslator:
 
         if not job_config.job_id:
 
-            job_id = uuid.uuid4()
+            job_id = str(uuid.uuid4())
             job_config = copy.copy(job_config)
             job_config.job_id = job_id
 
@@ -85,17 +86,81 @@ class DevModeTranslator:
             if not (isinstance(input_value, str) and input_value in original_objects):
                 process_input_or_output(input_key, input_value, is_input=True)
 
-        for output_key, output_value in original_outputs.items():
-            if not (isinstance(output_value, str) and output_value in original_outputs):
-                process_input_or_output(output_key, output_value, is_input=False)
+        # For a parameter sweep, outputs are generated separately for each grid point
+
+        if job_config.sweep and not job_config.sweepOutputs:
+
+            translated_sweep_outputs = cls._process_sweep_outputs(
+                sys_config, job_config, original_outputs, translated_objects)
+
+            translated_outputs = dict()
+
+        else:
+
+            translated_sweep_outputs = job_config.sweepOutputs
+
+            for output_key, output_value in original_outputs.items():
+                if not (isinstance(output_value, str) and output_value in original_outputs):
+                    process_input_or_output(output_key, output_value, is_input=False)
 
         job_config = copy.copy(job_config)
         job_config.objects = translated_objects
         job_config.inputs = translated_inputs
         job_config.outputs = translated_outputs
+        job_config.sweepOutputs = translated_sweep_outputs
 
         return job_config, sys_config
 
+    @classmethod
+    def _process_sweep_outputs(
+            cls, sys_config: cfg.SystemConfig, job_config: cfg.JobConfig,
+            original_outputs: tp.Dict[str, tp.Any], translated_objects: tp.Dict[str, meta.ObjectDefinition]) \
+            -> tp.List[tp.Dict[str, str]]:
+
+        sweep_points = _graph.GraphBuilder.sweep_points(job_config)
+        sweep_outputs = []
+
+        cls._log.info(f"Generating outputs for a parameter sweep with {len(sweep_points)} grid points")
+
+        for point_index in range(len(sweep_points)):
+
+            point_outputs = dict()
+
+            for output_key, output_value in original_outputs.items():
+
+                # Each grid point writes to its own file, named for the index of the grid point
+                point_value = cls._sweep_output_path(output_key, output_value, point_index)
+
+                data_id = uuid.uuid4()
+                storage_id = uuid.uuid4()
+
+                data_obj, storage_obj = cls._process_job_io(
+                    sys_config, output_key, point_value, data_id, storage_id,
+                    new_unique_file=True)
+
+                translated_objects[str(data_id)] = data_obj
+                translated_objects[str(storage_id)] = storage_obj
+                point_outputs[output_key] = str(data_id)
+
+            sweep_outputs.append(point_outputs)
+
+        return sweep_outputs
+
+    @classmethod
+    def _sweep_output_path(cls, output_key, output_value, point_index: int):
+
+        def point_path(storage_path):
+            orig_path = pathlib.PurePath(storage_path)
+            return str(orig_path.with_stem(f"{orig_path.stem}-point-{point_index}"))
+
+        if isinstance(output_value, str):
+            return point_path(output_value)
+
+        if isinstance(output_value, dict) and output_value.get("path"):
+            return {**output_value, "path": point_path(output_value["path"])}
+
+        raise RuntimeError(f"Invalid configuration for output '{output_key}'")
+
     @classmethod
     def _process_job_io(cls, sys_config, data_key, data_value, data_id, storage_id, new_unique_file=False):
 
@@ -14,14 +14,30 @@
 
 from __future__ import annotations
 
+import logging
 import typing as tp
+import collections
+import enum
+import uuid
+import heapq
+import itertools
+import threading
+import time
+import concurrent.futures as cf
+import multiprocessing as mp
+import pickle
 from copy import copy
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
 import trac.rt.config as config
+import trac.rt.metadata as meta
 import trac.rt.impl.util as util
 import trac.rt.impl.repositories as repos
 import trac.rt.impl.storage as _storage
+import trac.rt.impl.data as _data
+import trac.rt.impl.result_cache as _cache
+import trac.rt.impl.checkpoint as _checkpoint
+import trac.rt.impl.shared_data as _shared
 
 import trac.rt.exec.actors as actors
 import trac.rt.exec.graph_builder as _graph
@@ -52,6 +68,9 @@ class GraphContext:
 
     """
     Represents the state of an execution graph being processed by the TRAC engine
+
+    The graph context is owned by GraphProcessor, which updates it in place as nodes are processed.
+    Other actors should be given a snapshot, which will not change while they are using it.
     """
 
     nodes: tp.Dict[NodeId, GraphContextNode]
@@ -60,6 +79,469 @@ class GraphContext:
     succeeded_nodes: tp.Set[NodeId] = field(default_factory=set)
     failed_nodes: tp.Set[NodeId] = field(default_factory=set)
 
+    order: tp.List[NodeId] = field(default_factory=list)
+    """Node IDs in topological order, if the graph has been validated"""
+
+    def snapshot(self, node_ids: tp.Iterable[NodeId]) -> GraphContext:
+
+        # Only completed nodes should be included, their state does not change once processing is complete
+        nodes = {node_id: self.nodes[node_id] for node_id in node_ids if node_id in self.nodes}
+
+        return GraphContext(nodes)
+
+
+class NodeExecutor:
+
+    """
+    Runs node functions on behalf of NodeProcessor
+
+    Executors decide where node functions run. The completion callback receives either the node result or an error,
+    for executors other than InlineExecutor it is called on the executor's own thread.
+    """
+
+    NodeCallback = tp.Callable[[tp.Any, tp.Optional[Exception]], None]
+
+    max_workers: tp.Optional[int] = None
+    """Number of node functions the executor can run at once, None means there is no fixed limit"""
+
+    def submit(self, function: _func.NodeFunction, ctx: _func.NodeContext, callback: NodeCallback):
+        pass
+
+    def shutdown(self):
+        pass
+
+    @staticmethod
+    def _run_function(function: _func.NodeFunction, ctx: _func.NodeContext, callback: NodeCallback):
+
+        try:
+            result = function(ctx)
+        except Exception as e:
+            callback(None, e)
+        else:
+            callback(result, None)
+
+    @staticmethod
+    def _complete_future(future: cf.Future, callback: NodeCallback):
+
+        error = future.exception()
+
+        if error is not None:
+            callback(None, error)
+        else:
+            callback(future.result(), None)
+
+
+class InlineExecutor(NodeExecutor):
+
+    """
+    Run node functions directly on the calling thread, i.e. inside the NodeProcessor message handler
+    """
+
+    def submit(self, function: _func.NodeFunction, ctx: _func.NodeContext, callback: NodeExecutor.NodeCallback):
+
+        self._run_function(function, ctx, callback)
+
+
+class ThreadPoolExecutor(NodeExecutor):
+
+    """
+    Run node functions on a pool of threads, so long running nodes do not block the engine
+    """
+
+    def __init__(self, max_workers: tp.Optional[int] = None):
+
+        self._pool = cf.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="node")
+        self.max_workers = self._pool._max_workers  # noqa
+
+    def submit(self, function: _func.NodeFunction, ctx: _func.NodeContext, callback: NodeExecutor.NodeCallback):
+
+        future = self._pool.submit(function, ctx)
+        future.add_done_callback(lambda f: self._complete_future(f, callback))
+
+    def shutdown(self):
+
+        self._pool.shutdown(wait=True)
+
+
+class ProcessPoolExecutor(NodeExecutor):
+
+    """
+    Run node functions in a pool of worker processes, so CPU bound model code can run in parallel
+
+    Node functions and their inputs are pickled to send to the worker processes. Functions that cannot be pickled
+    (e.g. because they hold open resources) are run on a thread pool instead, with a warning in the log.
+    The same applies if the pool fails to send the inputs for a node. Once a call has been sent it is never
+    run again, so if its result cannot be sent back the node fails.
+    """
+
+    _PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+
+    def __init__(self, max_workers: tp.Optional[int] = None):
+
+        self._log = util.logger_for_object(self)
+        self._pool = cf.ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn"))
+        self._fallback = ThreadPoolExecutor(max_workers)
+        self.max_workers = self._pool._max_workers  # noqa
+
+    def submit(self, function: _func.NodeFunction, ctx: _func.NodeContext, callback: NodeExecutor.NodeCallback):
+
+        # Worker processes only need the prior node results, not the node functions that produced them
+        results_ctx = {
+            node_id: GraphContextNode(node.node, node.dependencies, result=node.result, error=node.error)
+            for node_id, node in ctx.items()}
+
+        # Node functions are small, checking them up front avoids sending inputs for a call that cannot be sent
+        # Inputs are only pickled once, by the pool, errors come back through the future
+
+        try:
+            pickle.dumps(function)
+        except Exception as e:  # noqa
+            self._use_fallback(function, ctx, callback, e)
+            return
+
+        send_marker = _SendMarker()
+
+        future = self._pool.submit(_run_in_worker, function, results_ctx, send_marker)
+        future.add_done_callback(lambda f: self._complete_worker_future(f, function, ctx, callback, send_marker))
+
+    def _complete_worker_future(
+            self, future: cf.Future, function: _func.NodeFunction, ctx: _func.NodeContext,
+            callback: NodeExecutor.NodeCallback, send_marker: _SendMarker):
+
+        # Errors from the node function are returned by the worker
+        # So any error raised by the pool happened sending the call or its result
+
+        error = future.exception()
+
+        if error is None:
+            result, error = future.result()
+            callback(result, error)
+
+        elif not send_marker.sent and isinstance(error, self._PICKLE_ERRORS):
+            self._use_fallback(function, ctx, callback, error)
+
+        elif isinstance(error, self._PICKLE_ERRORS):
+            result_error = RuntimeError(
+                f"Result of node function {type(function).__name__} cannot be sent back" +
+                f" from the worker process ({str(error)})")  # TODO: Error
+            callback(None, result_error)
+
+        else:
+            callback(None, error)
+
+    def _use_fallback(
+            self, function: _func.NodeFunction, ctx: _func.NodeContext,
+            callback: NodeExecutor.NodeCallback, error: Exception):
+
+        self._log.warning(f"Node function {type(function).__name__} cannot run in a worker process ({str(error)})")
+        self._fallback.submit(function, ctx, callback)
+
+    def shutdown(self):
+
+        self._pool.shutdown(wait=True)
+        self._fallback.shutdown()
+
+
+class _SendMarker:
+
+    """
+    Passed as the last argument when a call is sent to a worker process, to tell if the call was sent
+
+    Arguments are pickled in order, so once the marker is pickled the function and its inputs have been pickled too.
+    """
+
+    def __init__(self):
+        self.sent = False
+
+    def __reduce__(self):
+        self.sent = True
+        return _SendMarker, ()
+
+
+def _run_in_worker(
+        function: _func.NodeFunction, ctx: _func.NodeContext,
+        _: tp.Optional[_SendMarker] = None) -> tp.Tuple[tp.Any, tp.Optional[Exception]]:
+
+    try:
+        return function(ctx), None
+    except Exception as e:
+        return None, e
+
+
+def create_node_executor(engine_settings: config.EngineSettings) -> NodeExecutor:
+
+    executor_type = engine_settings.nodeExecutor.lower()
+    max_workers = engine_settings.nodeWorkers or None
+
+    if executor_type == "inline":
+        return InlineExecutor()
+
+    if executor_type == "thread":
+        return ThreadPoolExecutor(max_workers)
+
+    if executor_type == "process":
+        return ProcessPoolExecutor(max_workers)
+
+    raise RuntimeError(f"Unknown node executor type: [{engine_settings.nodeExecutor}]")  # TODO: Error
+
+
+class NodeCostModel:
+
+    """
+    Estimate the cost of graph nodes in seconds, so the graph processor can run the critical path first
+
+    Loading data is estimated from the size of the input file. Models are estimated from previous runs
+    of the same model entry point, the cost model is owned by the engine so timings carry over between jobs.
+    Inline nodes cost nothing, anything else gets a small default cost.
+    """
+
+    LOAD_BYTES_PER_SECOND = 50 * 1024 * 1024
+    DEFAULT_MODEL_COST = 1.0
+    DEFAULT_NODE_COST = 0.1
+
+    # Approximate size of each field type (bytes on disk, bytes in memory)
+    # Strings and decimals are held as Python objects in Pandas, so they take a lot more space in memory
+    FIELD_SIZES = {
+        meta.BasicType.BOOLEAN: (6, 1),
+        meta.BasicType.INTEGER: (8, 8),
+        meta.BasicType.FLOAT: (12, 8),
+        meta.BasicType.DECIMAL: (12, 112),
+        meta.BasicType.STRING: (16, 65),
+        meta.BasicType.DATE: (10, 8),
+        meta.BasicType.DATETIME: (20, 8)}
+
+    DEFAULT_FIELD_SIZE = (12, 8)
+    DEFAULT_MEMORY_FACTOR = 2.0
+
+    def __init__(self):
+        self._log = util.logger_for_object(self)
+        self._lock = threading.Lock()
+        self._model_timings: tp.Dict[str, tp.Tuple[int, float]] = dict()
+
+    def estimate(self, node: GraphContextNode) -> float:
+
+        if isinstance(node.function, GraphProcessor.INLINE_FUNCTIONS):
+            return 0.0
+
+        if isinstance(node.function, _func.LoadDataFunc):
+            try:
+                return node.function.data_size() / self.LOAD_BYTES_PER_SECOND
+            except Exception as e:  # noqa
+                self._log.warning(f"Data size not available for {str(node.node.id)} ({str(e)})")
+                return self.DEFAULT_NODE_COST
+
+        if isinstance(node.node, _graph.ModelNode):
+
+            with self._lock:
+                timing = self._model_timings.get(node.node.model_def.entryPoint)
+
+            if timing is None:
+                return self.DEFAULT_MODEL_COST
+
+            count, total = timing
+            return total / count
+
+        return self.DEFAULT_NODE_COST
+
+    def estimate_memory(self, node: GraphContextNode) -> int:
+
+        # Only loading data is estimated for now, model outputs are not known until the model runs
+
+        if not isinstance(node.function, _func.LoadDataFunc):
+            return 0
+
+        try:
+            data_size = node.function.data_size()
+        except Exception as e:  # noqa
+            self._log.warning(f"Data size not available for {str(node.node.id)} ({str(e)})")
+            return 0
+
+        schema = node.node.data_def.schema
+        fields = schema.field if schema is not None and schema.field else []
+
+        if not fields:
+            return int(data_size * self.DEFAULT_MEMORY_FACTOR)
+
+        field_sizes = [self.FIELD_SIZES.get(f.fieldType, self.DEFAULT_FIELD_SIZE) for f in fields]
+        row_size_on_disk = sum(disk_size + 1 for disk_size, _ in field_sizes)  # +1 for separators
+        row_size_in_memory = sum(memory_size for _, memory_size in field_sizes)
+
+        return int(data_size / row_size_on_disk * row_size_in_memory)
+
+    def record(self, node: GraphContextNode, elapsed: float):
+
+        if not isinstance(node.node, _graph.ModelNode):
+            return
+
+        entry_point = node.node.model_def.entryPoint
+
+        with self._lock:
+            count, total = self._model_timings.get(entry_point, (0, 0.0))
+            self._model_timings[entry_point] = (count + 1, total + elapsed)
+
+
+class ResourceBudget:
+
+    """
+    Limits on the resources used by running nodes, shared by all the graph processors in the engine
+
+    There are separate limits for the number of concurrent loads and concurrent models, and an approximate
+    ceiling on the memory held by loaded data. Limits set to zero in the config are not applied.
+
+    Nodes are admitted before they run. Nodes that do not fit wait in the ready queue of their graph processor.
+    Graph processors register a callback, which is called when resources are released so they can try again.
+
+    If there is a fixed number of worker slots, they are shared fairly between jobs. A job can always use
+    its fair share of the slots. It can go over its share while no other job is waiting for a slot,
+    so one big job does not starve smaller ones but slots are not left idle.
+    """
+
+    LOAD = "load"
+    MODEL = "model"
+    OTHER = "other"
+
+    def __init__(self, settings: tp.Optional[config.ResourceSettings] = None, worker_slots: tp.Optional[int] = None):
+
+        if settings is None:
+            settings = config.ResourceSettings()
+
+        self._limits = {
+            self.LOAD: settings.maxConcurrentLoads or None,
+            self.MODEL: settings.maxConcurrentModels or None}
+
+        self._memory_limit = settings.maxMemoryMb * 1024 * 1024 or None
+        self._worker_slots = worker_slots
+
+        self._lock = threading.Lock()
+        self._running: tp.Dict[str, int] = dict()
+        self._memory = 0
+        self._waiters: tp.List[tp.Callable[[], None]] = []
+
+        self._job_workers: tp.Dict[str, int] = dict()
+        self._jobs_waiting: tp.Set[str] = set()
+
+    def register_job(self, job_key: str):
+
+        with self._lock:
+            self._job_workers.setdefault(job_key, 0)
+
+    def unregister_job(self, job_key: str):
+
+        with self._lock:
+            self._job_workers.pop(job_key, None)
+            self._jobs_waiting.discard(job_key)
+
+        # Other jobs may be able to use more slots now
+        self._notify_waiters()
+
+    def try_acquire(
+            self, kind: str, memory: int = 0, overcommit: bool = False,
+            job_key: tp.Optional[str] = None) -> bool:
+
+        # Overcommit lets a caller exceed the memory ceiling, when it has nothing else running that could free up
+        # memory. The count limits are always applied, running nodes always release their slots when they complete.
+
+        with self._lock:
+
+            if not self._has_worker_slot(job_key):
+                if job_key is not None:
+                    self._jobs_waiting.add(job_key)
+                return False
+
+            running = self._running.get(kind, 0)
+            limit = self._limits.get(kind)
+
+            if limit is not None and running >= limit:
+                return False
+
+            if self._memory_limit is not None and memory > 0 and not overcommit:
+                if self._memory > 0 and self._memory + memory > self._memory_limit:
+                    return False
+
+            self._running[kind] = running + 1
+            self._memory += memory
+
+            if job_key is not None:
+                self._job_workers[job_key] = self._job_workers.get(job_key, 0) + 1
+                self._jobs_waiting.discard(job_key)
+
+            return True
+
+    def _has_worker_slot(self, job_key: tp.Optional[str]) -> bool:
+
+        if self._worker_slots is None or job_key is None:
+            return True
+
+        if sum(self._job_workers.values()) >= self._worker_slots:
+            return False
+
+        fair_share = max(1, self._worker_slots // max(1, len(self._job_workers)))
+
+        if self._job_workers.get(job_key, 0) < fair_share:
+            return True
+
+        # Over the fair share, only allowed if nobody else is waiting
+        return not any(waiting != job_key for waiting in self._jobs_waiting)
+
+    def release_slot(self, kind: str, job_key: tp.Optional[str] = None):
+
+        with self._lock:
+
+            self._running[kind] -= 1
+
+            if job_key is not None and job_key in self._job_workers:
+                self._job_workers[job_key] -= 1
+
+        self._notify_waiters()
+
+    def job_workers(self, job_key: str) -> int:
+
+        with self._lock:
+            return self._job_workers.get(job_key, 0)
+
+    def release_memory(self, memory: int):
+
+        if memory == 0:
+            return
+
+        with self._lock:
+            self._memory -= memory
+
+        self._notify_waiters()
+
+    def running(self, kind: str) -> int:
+
+        with self._lock:
+            return self._running.get(kind, 0)
+
+    def memory(self) -> int:
+
+        with self._lock:
+            return self._memory
+
+    def add_waiter(self, callback: tp.Callable[[], None]):
+
+        with self._lock:
+            if callback not in self._waiters:
+                self._waiters.append(callback)
+
+    def remove_waiter(self, callback: tp.Callable[[], None]):
+
+        with self._lock:
+            if callback in self._waiters:
+                self._waiters.remove(callback)
+
+    def _notify_waiters(self):
+
+        # Waiters are notified once, they register again if they are still waiting
+
+        with self._lock:
+            waiters = self._waiters
+            self._waiters = []
+
+        for callback in waiters:
+            callback()
+
 
 class GraphBuilder(actors.Actor):
 
@@ -71,22 +553,31 @@ class GraphBuilder(actors.Actor):
     def __init__(
             self, job_config: config.JobConfig,
             repositories: repos.Repositories,
-            storage: _storage.StorageManager):
+            storage: _storage.StorageManager,
+            result_cache: tp.Optional[_cache.ResultCache] = None,
+            shared_data: tp.Optional[_shared.SharedDataRegistry] = None):
 
         super().__init__()
         self.job_config = job_config
         self.graph: tp.Optional[GraphContext] = None
 
-        self._resolver = _func.FunctionResolver(repositories, storage)
+        self._resolver = _func.FunctionResolver(repositories, storage, result_cache, shared_data)
         self._log = util.logger_for_object(self)
 
     def on_start(self):
 
         self._log.info("Building execution graph")
 
-        graph_data = _graph.GraphBuilder.build_job(self.job_config)
+        # Invalid graphs fail the job here, before any node is dispatched
+        try:
+            graph_data = _graph.GraphBuilder.build_job(self.job_config)
+        except Exception as e:
+            self._log.error(f"Execution graph is not valid: {str(e)}")
+            self.actors().send_parent("job_failed", e)
+            return
+
         graph_nodes = {node_id: GraphContextNode(node, {}) for node_id, node in graph_data.nodes.items()}
-        graph = GraphContext(graph_nodes, pending_nodes=set(graph_nodes.keys()))
+        graph = GraphContext(graph_nodes, pending_nodes=set(graph_nodes.keys()), order=graph_data.order)
 
         self._log.info("Resolving graph nodes to executable code")
 
@@ -113,140 +604,516 @@ class GraphProcessor(actors.Actor):
     If there is an error with any node, the job is considered to have failed
     In this case, nodes already running are allowed to complete but no new nodes are submitted
     Once all running nodes are stopped, an error is reported to the parent
+
+    Scheduling is incremental, each pending node keeps a count of its unresolved dependencies
+    and a reverse index maps each node to its dependents. When a node completes, only its dependents
+    are updated and any that have no dependencies left go on the ready queue. Failures propagate
+    through the same index. A failed tolerant dependency counts as resolved.
+
+    Node results are released as soon as all the dependents of a node have completed, so intermediate
+    data is not held for the whole job. Nodes with no dependents keep their results. Released nodes are
+    replaced in the graph rather than updated, because results of context push / pop nodes hold references
+    to the nodes they map. Set release_results = False to keep all results (useful for debugging).
+
+    When more nodes are ready than the executor has workers, nodes on the longest remaining path to the end
+    of the graph run first. Path lengths are weighted by the node cost estimates from NodeCostModel.
+
+    Load and model nodes must also fit in the engine's ResourceBudget before they run. Memory for loaded
+    data is held in the budget until the result is released. A graph with no nodes running, where nothing else
+    fits in the budget, is allowed to go over the memory ceiling. Otherwise it could wait forever for memory
+    held by its own results.
+
+    Mapping, context push / pop and no-op nodes are evaluated inline by the graph processor, they only
+    shuffle references around so there is no point spawning an actor for them. NodeProcessor actors
+    are used for nodes that do real work, i.e. loading and saving data and running models.
+
+    If a job checkpoint is supplied, results of the nodes that do real work are saved as they complete.
+    When a job is resumed, nodes with saved results are not run again. Neither are nodes that only lead to
+    nodes with saved results, e.g. loads for a model that has already run. Saved results are only loaded for
+    nodes that still have dependents to run.
     """
 
-    def __init__(self, graph: GraphContext):
+    # Node functions that are cheap enough to run directly in the graph processor
+    INLINE_FUNCTIONS = (
+        _func.NoopNode,
+        _func.ContextPushFunc,
+        _func.ContextPopFunc,
+        _func.IdentityFunc,
+        _func.KeyedItemFunc,
+        _func.DataViewFunc,
+        _func.DataItemFunc)
+
+    def __init__(
+            self, graph: GraphContext, executor: NodeExecutor,
+            release_results: bool = True,
+            cost_model: tp.Optional[NodeCostModel] = None,
+            budget: tp.Optional[ResourceBudget] = None,
+            checkpoint: tp.Optional[_checkpoint.JobCheckpoint] = None):
+
         super().__init__()
         self.graph = graph
+        self.executor = executor
+        self.release_results = release_results
+        self.cost_model = cost_model or NodeCostModel()
+        self.budget = budget or ResourceBudget()
+        self.checkpoint = checkpoint
         self.processors: tp.Dict[NodeId, actors.ActorId] = dict()
         self._log = util.logger_for_object(self)
 
+        self._remaining_deps: tp.Dict[NodeId, int] = dict()
+        self._dependents: tp.Dict[NodeId, tp.List[tp.Tuple[NodeId, _graph.DependencyType]]] = dict()
+
+        # Inline nodes do not need a worker, they are kept separate so they never wait for a free slot
+        # Other nodes are queued by resource kind, so nodes waiting on one budget do not hold up the others
+        self._ready_inline: tp.Deque[NodeId] = collections.deque()
+        self._ready_nodes: tp.Dict[str, tp.List[tp.Tuple[float, int, NodeId]]] = {
+            ResourceBudget.LOAD: [], ResourceBudget.MODEL: [], ResourceBudget.OTHER: []}
+        self._ready_seq = itertools.count()
+        self._priority: tp.Dict[NodeId, float] = dict()
+        self._start_times: tp.Dict[NodeId, float] = dict()
+        self._model_timings: tp.Dict[NodeId, float] = dict()
+
+        self._node_kinds: tp.Dict[NodeId, str] = dict()
+        self._node_memory: tp.Dict[NodeId, int] = dict()
+        self._budget_callback: tp.Optional[tp.Callable[[], None]] = None
+
+        self._consumers: tp.Dict[NodeId, int] = dict()
+        self._result_memory = _ResultMemory()
+        self._released_count = 0
+
+        self._status_reported = False
+
     def on_start(self):
 
         self._log.info("Begin processing graph")
+
+        # Budget callbacks come from other actors, sending a message is thread safe
+        ctx = self.actors()
+        self_id = ctx.id
+        self._budget_callback = lambda: ctx.send(self_id, "submit_viable_nodes")
+        self.budget.register_job(self_id)
+
+        if self.checkpoint is not None:
+            self._restore_checkpoint()
+
+        self._build_schedule()
         self.actors().send(self.actors().id, "submit_viable_nodes")
 
-    @actors.Message
-    def submit_viable_nodes(self):
+    def on_stop(self):
 
-        node_processors = dict()
+        # Give back anything still held in the budget, normally just memory for results that were not released
 
-        def process_graph(graph: GraphContext) -> GraphContext:
+        self.budget.remove_waiter(self._budget_callback)
 
-            pending_nodes = copy(graph.pending_nodes)
-            active_nodes = copy(graph.active_nodes)
-            failed_nodes = copy(graph.failed_nodes)
+        for kind in self._node_kinds.values():
+            self.budget.release_slot(kind, self.actors().id)
 
-            for node_id in graph.pending_nodes:
+        for memory in self._node_memory.values():
+            self.budget.release_memory(memory)
+
+        self._node_kinds.clear()
+        self._node_memory.clear()
+
+        self.budget.unregister_job(self.actors().id)
+
+    def _restore_checkpoint(self):
+
+        saved_nodes = self.checkpoint.saved_nodes(self.graph.pending_nodes)
+
+        if not saved_nodes:
+            return
+
+        dependents: tp.Dict[NodeId, tp.List[NodeId]] = dict()
+
+        for node_id in self.graph.pending_nodes:
+            for dep_id in self.graph.nodes[node_id].dependencies:
+                dependents.setdefault(dep_id, []).append(node_id)
+
+        # A node is covered if it has a saved result, or if it has dependents and they are all covered
+        # Walking the topological order backwards resolves all the dependents before the node itself
+        # Dependents that are not in the order (i.e. in or after a cycle) count as not covered
+
+        covered: tp.Dict[NodeId, bool] = dict()
+
+        for node_id in reversed(self._pending_order()):
+            node_dependents = dependents.get(node_id, [])
+            covered[node_id] = node_id in saved_nodes or (
+                len(node_dependents) > 0 and
+                all(covered.get(dep_id, False) for dep_id in node_dependents))
+
+        # Covered nodes are marked as succeeded without running
+        # Saved results are only needed if there is a dependent that will still run
+
+        restored_count = 0
+        loaded_count = 0
+
+        for node_id, is_covered in covered.items():
+
+            if not is_covered:
+                continue
+
+            if node_id in saved_nodes and not all(covered.get(dep_id, False) for dep_id in dependents.get(node_id, [])):
+                result = self.checkpoint.load(node_id)
+                self.graph.nodes[node_id].result = result
+                self._result_memory.add(node_id, result)
+                loaded_count += 1
+
+            self.graph.pending_nodes.discard(node_id)
+            self.graph.succeeded_nodes.add(node_id)
+            restored_count += 1
+
+        self._log.info(
+            f"Resuming from checkpoint: {restored_count} nodes do not need to run, " +
+            f"loaded {loaded_count} saved results")
+
+    def _build_schedule(self):
+
+        ready_nodes = []
+        failed_upstream = []
+
+        for node_id in self.graph.pending_nodes:
+
+            node = self.graph.nodes[node_id]
+            remaining = 0
+
+            for dep_id, dep_type in node.dependencies.items():
+
+                self._consumers[dep_id] = self._consumers.get(dep_id, 0) + 1
+
+                if dep_id in self.graph.succeeded_nodes:
+                    continue
+
+                if dep_id in self.graph.failed_nodes:
+                    if dep_type.tolerant:
+                        continue
+                    failed_upstream.append(dep_id)
+
+                # Dependencies missing from the graph are never resolved, which is reported as a deadlock
+                # This can only happen for graphs that were not validated when they were built
+                self._dependents.setdefault(dep_id, []).append((node_id, dep_type))
+                remaining += 1
+
+            self._remaining_deps[node_id] = remaining
+
+            if remaining == 0:
+                ready_nodes.append(node_id)
+
+        # Priorities are needed to queue nodes, so they must be set up before any nodes are ready
+        self._build_priorities()
+
+        for node_id in ready_nodes:
+            self._node_ready(node_id)
+
+        for failed_id in failed_upstream:
+            self._propagate_failure(failed_id)
+
+    def _build_priorities(self):
+
+        # Priority is the estimated cost of the longest path from a node to the end of the graph
+        # Walking the topological order backwards, all dependents are done before the node itself
+        # Nodes that are not in the order (i.e. in or after a cycle) can never run, so they need no priority
+
+        priority = self._priority
+
+        for node_id in reversed(self._pending_order()):
+            dependents = self._dependents.get(node_id, [])
+            downstream = max((priority.get(dep_id, 0.0) for dep_id, _ in dependents), default=0.0)
+            priority[node_id] = self.cost_model.estimate(self.graph.nodes[node_id]) + downstream
+
+    def _pending_order(self) -> tp.List[NodeId]:
+
+        # Graphs from the graph builder come with their topological order, otherwise it is worked out here
+
+        if self.graph.order:
+            return [node_id for node_id in self.graph.order if node_id in self.graph.pending_nodes]
+
+        return _graph.GraphBuilder.topological_order({
+            node_id: self.graph.nodes[node_id].dependencies
+            for node_id in self.graph.pending_nodes})
+
+    def _node_ready(self, node_id: NodeId):
+
+        node = self.graph.nodes[node_id]
+
+        if isinstance(node.function, self.INLINE_FUNCTIONS):
+            self._ready_inline.append(node_id)
+        else:
+            entry = (-self._priority.get(node_id, 0.0), next(self._ready_seq), node_id)
+            heapq.heappush(self._ready_nodes[self._resource_kind(node)], entry)
+
+    @staticmethod
+    def _resource_kind(node: GraphContextNode):
+
+        if isinstance(node.node, _graph.LoadDataNode):
+            return ResourceBudget.LOAD
+
+        if isinstance(node.node, _graph.ModelNode):
+            return ResourceBudget.MODEL
+
+        return ResourceBudget.OTHER
+
+    def _has_free_slot(self):
+
+        max_workers = self.executor.max_workers
+        return max_workers is None or len(self.graph.active_nodes) < max_workers
+
+    def _has_viable_nodes(self):
+
+        return bool(self._ready_inline) or (any(self._ready_nodes.values()) and self._has_free_slot())
+
+    def _next_admitted_node(self) -> tp.Optional[NodeId]:
+
+        # Try the head of each ready queue in priority order, the first one that fits in the budget is admitted
+
+        if not self._has_free_slot():
+            return None
+
+        candidates = []
+
+        for kind, queue in self._ready_nodes.items():
+
+            # Nodes can be skipped due to an upstream failure after they were queued
+            while queue and queue[0][2] not in self.graph.pending_nodes:
+                heapq.heappop(queue)
+
+            if queue:
+                candidates.append((queue[0], kind))
+
+        candidates.sort()
+
+        # Only go over the memory ceiling if nothing else can run and nothing is running to free up memory
+        overcommit_options = [False, True] if not self.graph.active_nodes else [False]
+
+        for overcommit in overcommit_options:
+            for (_, _, node_id), kind in candidates:
 
                 node = self.graph.nodes[node_id]
+                memory = self.cost_model.estimate_memory(node) if kind == ResourceBudget.LOAD else 0
+
+                if self.budget.try_acquire(kind, memory, overcommit, self.actors().id):
+                    heapq.heappop(self._ready_nodes[kind])
+                    self._node_kinds[node_id] = kind
+                    self._node_memory[node_id] = memory
+                    return node_id
+
+        # Wait for resources to be released before trying again
+        if candidates:
+            self.budget.add_waiter(self._budget_callback)
+
+        return None
 
-                if self._upstream_failure(node, graph):
+    @actors.Message
+    def submit_viable_nodes(self):
 
-                    self._log.warning(f"SKIP {str(node_id)} (upstream failure)")
+        while True:
 
-                    pending_nodes.discard(node_id)
-                    failed_nodes.add(node_id)
+            # Inline nodes resolve their dependents immediately, which puts them on the ready queues for this loop
+            if self._ready_inline:
 
-                elif self._is_viable_node(node, graph):
+                node_id = self._ready_inline.popleft()
 
-                    node_ref = self.actors().spawn(NodeProcessor, self.graph, node_id, node)
-                    node_processors[node_id] = node_ref
+                # Nodes can be skipped due to an upstream failure after they were queued
+                if node_id in self.graph.pending_nodes:
+                    self._evaluate_inline(node_id, self.graph.nodes[node_id])
 
-                    pending_nodes.discard(node_id)
-                    active_nodes.add(node_id)
+                continue
 
-            processed_graph = copy(self.graph)
-            processed_graph.pending_nodes = pending_nodes
-            processed_graph.active_nodes = active_nodes
-            processed_graph.failed_nodes = failed_nodes
+            node_id = self._next_admitted_node()
 
-            return processed_graph
+            if node_id is None:
+                break
 
-        current_graph = self.graph
-        new_graph = process_graph(current_graph)
+            node = self.graph.nodes[node_id]
 
-        # Let errors propagate as far as they can without any nodes being evaluated
-        while len(new_graph.failed_nodes) > len(current_graph.failed_nodes):
-            current_graph = new_graph
-            new_graph = process_graph(current_graph)
+            # Node processors get a snapshot holding just the dependencies of the node
+            node_graph = self.graph.snapshot(node.dependencies)
+            node_ref = self.actors().spawn(NodeProcessor, node_graph, node_id, node, self.executor, self.checkpoint)
+            self.processors[node_id] = node_ref
+            self._start_times[node_id] = time.monotonic()
 
-        self.graph = new_graph
-        self.processors = {**self.processors, **node_processors}
+            self.graph.pending_nodes.discard(node_id)
+            self.graph.active_nodes.add(node_id)
 
         # Job may have completed due to error propagation
         self.check_job_status(do_submit=False)
 
-    @classmethod
-    def _is_viable_node(cls, node: GraphContextNode, graph: GraphContext):
+    def _evaluate_inline(self, node_id: NodeId, node: GraphContextNode):
 
-        return all(dep in graph.succeeded_nodes for dep in node.dependencies)
+        self.graph.pending_nodes.discard(node_id)
 
-    @classmethod
-    def _upstream_failure(cls, node: GraphContextNode, graph: GraphContext):
+        if isinstance(node.node, _graph.MappingNode):
+            self._log.info(f"MAPPING [{_display_node_type(node.node)}]: {str(node_id)}")
+            _log_mapping_info(self._log, node.node)
 
-        return any(not dep_type.tolerant and dep in graph.failed_nodes
-                   for dep, dep_type in node.dependencies.items())
+        try:
+            # Inline functions only read the results of their own dependencies, no snapshot is needed
+            node.result = node.function(self.graph.nodes)
+            self.graph.succeeded_nodes.add(node_id)
+            self._result_memory.add(node_id, node.result)
+            self._resolve_dependency(node_id)
 
-    @actors.Message
-    def node_succeeded(self, node_id: NodeId, result):
+        except Exception as e:
+            self._log.error(f"FAILED [{_display_node_type(node.node)}]: {str(node_id)}")
+            self._log.exception(e)
+            node.error = e
+            self.graph.failed_nodes.add(node_id)
+            self._propagate_failure(node_id)
+
+        self._node_complete(node_id)
+
+    def _resolve_dependency(self, node_id: NodeId):
+
+        for dependent_id, _ in self._dependents.pop(node_id, []):
+
+            remaining = self._remaining_deps[dependent_id] - 1
+            self._remaining_deps[dependent_id] = remaining
+
+            if remaining == 0:
+                self._node_ready(dependent_id)
+
+    def _propagate_failure(self, failed_id: NodeId):
+
+        # Single pass over the reverse index, every downstream node with a hard dependency fails as well
+        # Tolerant dependents treat the failed node as resolved, they can still run
+
+        pending_nodes = self.graph.pending_nodes
+        failed_nodes = self.graph.failed_nodes
+
+        failures = collections.deque([failed_id])
+
+        while failures:
+
+            node_id = failures.popleft()
+
+            for dependent_id, dep_type in self._dependents.pop(node_id, []):
+
+                if dependent_id not in pending_nodes:
+                    continue
+
+                if dep_type.tolerant:
+                    remaining = self._remaining_deps[dependent_id] - 1
+                    self._remaining_deps[dependent_id] = remaining
+                    if remaining == 0:
+                        self._node_ready(dependent_id)
+
+                else:
+                    self._log.warning(f"SKIP {str(dependent_id)} (upstream failure)")
+                    pending_nodes.discard(dependent_id)
+                    failed_nodes.add(dependent_id)
+                    failures.append(dependent_id)
+                    self._node_complete(dependent_id)
+
+    def _node_complete(self, node_id: NodeId):
+
+        # Once a node is complete, it no longer needs the results of its dependencies
+
+        if not self.release_results:
+            return
+
+        if self._consumers.get(node_id) == 0:
+            self._release_result(node_id)
+
+        for dep_id in self.graph.nodes[node_id].dependencies:
+
+            consumers = self._consumers.get(dep_id)
+
+            if consumers is None:
+                continue
+
+            self._consumers[dep_id] = consumers - 1
+
+            if consumers == 1:
+                self._release_result(dep_id)
+
+    def _release_result(self, node_id: NodeId):
+
+        # Results can only be released after a node succeeds, skipped consumers may finish earlier
+        if node_id not in self.graph.succeeded_nodes:
+            return
+
+        node = self.graph.nodes[node_id]
+
+        if node.result is None:
+            return
+
+        # Replace the node instead of updating it, existing references to the node are not affected
+        released_node = copy(node)
+        released_node.result = None
 
-        old_node = self.graph.nodes[node_id]
-        node = copy(old_node)
-        node.result = result
+        self.graph.nodes[node_id] = released_node
+        self._result_memory.release(node_id)
+        self._released_count += 1
 
-        nodes = {**self.graph.nodes, node_id: node}
+        self.budget.release_memory(self._node_memory.pop(node_id, 0))
 
-        active_nodes = copy(self.graph.active_nodes)
-        active_nodes.remove(node_id)
+    @actors.Message
+    def node_succeeded(self, node_id: NodeId, result):
 
-        succeeded_nodes = copy(self.graph.succeeded_nodes)
-        succeeded_nodes.add(node_id)
+        # Nobody else can see this node until it is complete, so it is safe to update in place
+        self.graph.nodes[node_id].result = result
+        self.graph.active_nodes.remove(node_id)
+        self.graph.succeeded_nodes.add(node_id)
+        self._result_memory.add(node_id, result)
+        self.budget.release_slot(self._node_kinds.pop(node_id), self.actors().id)
+        self._stop_processor(node_id)
 
-        new_graph = copy(self.graph)
-        new_graph.nodes = nodes
-        new_graph.active_nodes = active_nodes
-        new_graph.succeeded_nodes = succeeded_nodes
+        elapsed = time.monotonic() - self._start_times.pop(node_id)
+        self.cost_model.record(self.graph.nodes[node_id], elapsed)
 
-        self.graph = new_graph
+        if isinstance(self.graph.nodes[node_id].node, _graph.ModelNode):
+            self._model_timings[node_id] = elapsed
+
+        self._resolve_dependency(node_id)
+        self._node_complete(node_id)
         self.check_job_status()
 
     @actors.Message
     def node_failed(self, node_id: NodeId, error):
 
-        old_node = self.graph.nodes[node_id]
-        node = copy(old_node)
-        node.error = error
+        self.graph.nodes[node_id].error = error
+        self.graph.active_nodes.remove(node_id)
+        self._start_times.pop(node_id, None)
+        self.graph.failed_nodes.add(node_id)
+        self.budget.release_slot(self._node_kinds.pop(node_id), self.actors().id)
+        self.budget.release_memory(self._node_memory.pop(node_id, 0))
+        self._stop_processor(node_id)
 
-        nodes = {**self.graph.nodes, node_id: node}
+        self._propagate_failure(node_id)
+        self._node_complete(node_id)
+        self.check_job_status()
 
-        active_nodes = copy(self.graph.active_nodes)
-        active_nodes.remove(node_id)
+    def _stop_processor(self, node_id: NodeId):
 
-        failed_nodes = copy(self.graph.failed_nodes)
-        failed_nodes.add(node_id)
+        # Node processors hold their node and a snapshot of its dependencies, including the results
+        # They are stopped once they report, otherwise released results would stay in memory until the job ends
 
-        new_graph = copy(self.graph)
-        new_graph.nodes = nodes
-        new_graph.active_nodes = active_nodes
-        new_graph.failed_nodes = failed_nodes
+        processor_id = self.processors.pop(node_id, None)
 
-        self.graph = new_graph
-        self.check_job_status()
+        if processor_id is not None:
+            self.actors().stop(processor_id)
 
     def check_job_status(self, do_submit=True):
 
-        # Do not check final status if there are pending nodes to be submitted
-        if do_submit and any(self.graph.pending_nodes):
-            self.actors().send(self.actors().id, "submit_viable_nodes")
+        # Messages queued before the job completed can still arrive, the final status is only reported once
+        if self._status_reported:
+            return
+
+        # Do not check final status if there are nodes ready to be submitted
+        if self._has_viable_nodes():
+            if do_submit:
+                self.actors().send(self.actors().id, "submit_viable_nodes")
             return
 
         # If processing is complete, report the final status to the engine
         if not any(self.graph.active_nodes):
 
+            self._status_reported = True
+            self._log_memory_report()
+            self._log_timing_report()
+
             if any(self.graph.pending_nodes):
                 self._log.error("Processor has become deadlocked (cyclic dependency error)")
-                self.actors().send_parent("job_failed")
+                self.actors().send_parent("job_failed", RuntimeError("Processor has become deadlocked"))
 
             elif any(self.graph.failed_nodes):
 
@@ -262,19 +1129,134 @@ class GraphProcessor(actors.Actor):
             else:
                 self.actors().send_parent("job_succeeded")
 
+    def _log_memory_report(self):
+
+        memory = self._result_memory
+
+        self._log.info(
+            f"Result memory: peak = {_format_bytes(memory.peak)}, " +
+            f"without release = {_format_bytes(memory.total)}, " +
+            f"released {self._released_count} of {len(self.graph.succeeded_nodes)} results")
+
+    def _log_timing_report(self):
+
+        # Summary for jobs that run many models, e.g. a parameter sweep, one line per model would be too much
+
+        timings = self._model_timings
+
+        if len(timings) < 2:
+            return
+
+        total = sum(timings.values())
+        slowest_id = max(timings, key=timings.get)
+
+        self._log.info(
+            f"Model timings: {len(timings)} runs, total = {total:.3f}s, " +
+            f"min = {min(timings.values()):.3f}s, mean = {total / len(timings):.3f}s, " +
+            f"max = {timings[slowest_id]:.3f}s")
+
+        slowest_node = self.graph.nodes[slowest_id].node
+
+        if slowest_node.parameters is not None:
+            self._log.info(f"Slowest model run: {str(slowest_id)}, parameters = {slowest_node.parameters}")
+        else:
+            self._log.info(f"Slowest model run: {str(slowest_id)}")
+
+
+class _ResultMemory:
+
+    """
+    Track the memory held by node results in the graph processor
+
+    Data frames are counted once, no matter how many nodes refer to them. A frame stops being counted
+    when the last node referring to it is released. The total is the memory that would be held if
+    no results were released.
+    """
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self.total = 0
+        self._frames: tp.Dict[int, tp.List[int]] = dict()
+        self._node_frames: tp.Dict[NodeId, tp.List[int]] = dict()
+
+    def add(self, node_id: NodeId, result: tp.Any):
+
+        frame_keys = []
+
+        for df in self._data_frames(result):
+
+            frame_key = id(df)
+
+            if frame_key in frame_keys:
+                continue
+
+            frame_keys.append(frame_key)
+            frame_info = self._frames.get(frame_key)
+
+            if frame_info is None:
+                frame_size = int(df.memory_usage(deep=True).sum())
+                frame_info = self._frames[frame_key] = [frame_size, 0]
+                self.current += frame_size
+                self.total += frame_size
+                self.peak = max(self.peak, self.current)
+
+            frame_info[1] += 1
+
+        self._node_frames[node_id] = frame_keys
+
+    def release(self, node_id: NodeId):
+
+        for frame_key in self._node_frames.pop(node_id, []):
+
+            frame_info = self._frames[frame_key]
+            frame_info[1] -= 1
+
+            if frame_info[1] == 0:
+                self.current -= frame_info[0]
+                del self._frames[frame_key]
+
+    def _data_frames(self, result: tp.Any) -> tp.Iterator[tp.Any]:
+
+        if isinstance(result, GraphContextNode):
+            yield from self._data_frames(result.result)
+
+        elif isinstance(result, _data.DataItem):
+            if result.pandas is not None:
+                yield result.pandas
+
+        elif isinstance(result, _data.DataView):
+            for part in result.parts.values():
+                for item in part:
+                    yield from self._data_frames(item)
+
+        elif isinstance(result, dict):
+            for item in result.values():
+                yield from self._data_frames(item)
+
+
+def _format_bytes(n_bytes: int) -> str:
+
+    return f"{n_bytes / (1024 * 1024):.1f} MB"
+
 
 class NodeProcessor(actors.Actor):
 
     """
     Processor responsible for running individual nodes in an execution graph
-    TODO: How to decide when to allocate an actors.Worker (long running, separate thread)
+    Node functions are run by the node executor, the result is sent to GraphProcessor when the function completes
     """
 
-    def __init__(self, graph: GraphContext, node_id: str, node: GraphContextNode):
+    def __init__(
+            self, graph: GraphContext, node_id: str, node: GraphContextNode, executor: NodeExecutor,
+            checkpoint: tp.Optional[_checkpoint.JobCheckpoint] = None):
+
         super().__init__()
         self.graph = graph
         self.node_id = node_id
         self.node = node
+        self.executor = executor
+        self.checkpoint = checkpoint
         self._log = util.logger_for_object(self)
 
     def on_start(self):
@@ -292,49 +1274,71 @@ class NodeProcessor(actors.Actor):
     @actors.Message
     def evaluate_node(self):
 
-        node_type = self._display_node_type()
+        node_type = _display_node_type(self.node.node)
         is_mapping_node = isinstance(self.node.node, _graph.MappingNode)
 
-        try:
+        if is_mapping_node:
+            self._log.info(f"MAPPING [{node_type}]: {str(self.node_id)}")
+            _log_mapping_info(self._log, self.node.node)
+        else:
+            self._log.info(f"START [{node_type}]: {str(self.node_id)}")
+
+        # The callback can run on an executor thread after this handler has returned
+        # Sending messages is thread safe, so the actor context is held on to for sending the result
+        ctx = self.actors()
+
+        def node_complete(result, error: tp.Optional[Exception]):
+
+            if error is None:
+                self._save_checkpoint(result)
+                ctx.send_parent("node_succeeded", self.node_id, result)
+                if not is_mapping_node:
+                    self._log.info(f"DONE [{node_type}]: {str(self.node_id)}")
 
-            if is_mapping_node:
-                self._log.info(f"MAPPING [{node_type}]: {str(self.node_id)}")
-                self._log_mapping_info(self.node.node)
             else:
-                self._log.info(f"START [{node_type}]: {str(self.node_id)}")
+                ctx.send_parent("node_failed", self.node_id, error)
+                self._log.error(f"FAILED [{node_type}]: {str(self.node_id)}")
+                self._log.exception(error)
+
+        self.executor.submit(self.node.function, self.graph.nodes, node_complete)
 
-            result = self.node.function(self.graph.nodes)
-            self.actors().send_parent("node_succeeded", self.node_id, result)
+    def _save_checkpoint(self, result):
 
-            if not is_mapping_node:
-                self._log.info(f"DONE [{node_type}]: {str(self.node_id)}")
+        # Saving is done before the result is reported, so a result is never used before it is saved
+        # A checkpoint that cannot be saved does not fail the node, the job can still complete without it
+
+        if self.checkpoint is None:
+            return
+
+        try:
+            self.checkpoint.save(self.node_id, result)
 
         except Exception as e:
-            self.actors().send_parent("node_failed", self.node_id, e)
-            self._log.error(f"FAILED [{node_type}]: {str(self.node_id)}")
-            self._log.exception(e)
+            self._log.warning(f"Checkpoint could not be saved for {str(self.node_id)}: {str(e)}")
 
-    def _display_node_type(self):
 
-        # Just remove "Node" from "xxxNode"
-        return type(self.node.node).__name__[:-4]
+def _display_node_type(node: _graph.Node):
 
-    def _log_mapping_info(self, node: _graph.Node):
+    # Just remove "Node" from "xxxNode"
+    return type(node).__name__[:-4]
 
-        if isinstance(node, _graph.IdentityNode):
-            self._log.info(f"  * <- {str(node.src_id)}")
 
-        elif isinstance(node, _graph.KeyedItemNode):
-            self._log.info(f"  * <- {node.src_item} | {str(node.src_id)}")
+def _log_mapping_info(log: logging.Logger, node: _graph.Node):
 
-        elif isinstance(node, _graph.DataItemNode):
-            self._log.info(f"  * <- part-root | {str(node.data_view_id)}")
+    if isinstance(node, _graph.IdentityNode):
+        log.info(f"  * <- {str(node.src_id)}")
 
-        elif isinstance(node, _graph.DataViewNode):
-            self._log.info(f"  part-root <- {str(node.root_item)}")
+    elif isinstance(node, _graph.KeyedItemNode):
+        log.info(f"  * <- {node.src_item} | {str(node.src_id)}")
 
-        else:
-            self._log.warning("  (mapping info cannot be displayed)")
+    elif isinstance(node, _graph.DataItemNode):
+        log.info(f"  * <- part-root | {str(node.data_view_id)}")
+
+    elif isinstance(node, _graph.DataViewNode):
+        log.info(f"  part-root <- {str(node.root_item)}")
+
+    else:
+        log.warning("  (mapping info cannot be displayed)")
 
 
 class JobProcessor(actors.Actor):
@@ -344,26 +1348,62 @@ class JobProcessor(actors.Actor):
     This includes setup (GraphBuilder), execution (GraphProcessor) and reporting results
     """
 
-    def __init__(self, job_id, job_config, repositories: repos.Repositories, storage: _storage.StorageManager):
+    def __init__(
+            self, job_id, job_config,
+            repositories: repos.Repositories,
+            storage: _storage.StorageManager,
+            executor: NodeExecutor,
+            cost_model: NodeCostModel,
+            budget: ResourceBudget,
+            release_results: bool = True,
+            result_cache: tp.Optional[_cache.ResultCache] = None,
+            checkpoint: tp.Optional[_checkpoint.JobCheckpoint] = None,
+            shared_data: tp.Optional[_shared.SharedDataRegistry] = None):
+
         super().__init__()
         self.job_id = job_id
         self.job_config = job_config
         self._repos = repositories
         self._storage = storage
+        self._executor = executor
+        self._cost_model = cost_model
+        self._budget = budget
+        self._release_results = release_results
+        self._result_cache = result_cache
+        self._checkpoint = checkpoint
+        self._shared_data = shared_data
         self._log = util.logger_for_object(self)
 
     def on_start(self):
         self._log.info("Starting job")
-        self.actors().spawn(GraphBuilder, self.job_config, self._repos, self._storage)
+        self.actors().spawn(
+            GraphBuilder, self.job_config, self._repos, self._storage,
+            self._result_cache, self._shared_data)
+
+    def on_stop(self):
+
+        # Shared data loaded for this job can be evicted once no other job is using it
+        if self._shared_data is not None:
+            self._shared_data.release_job(self.job_id)
 
     @actors.Message
     def job_graph(self, graph: GraphContext):
-        self.actors().spawn(GraphProcessor, graph)
+        self.actors().spawn(
+            GraphProcessor, graph, self._executor,
+            self._release_results, self._cost_model, self._budget, self._checkpoint)
         self.actors().stop(self.actors().sender)
 
     @actors.Message
     def job_succeeded(self):
         self._log.info(f"Job succeeded {self.job_id}")
+
+        # The checkpoint is only needed to resume a failed job
+        if self._checkpoint is not None:
+            try:
+                self._checkpoint.remove()
+            except Exception as e:
+                self._log.warning(f"Checkpoint could not be removed: {str(e)}")
+
         self.actors().send_parent("job_succeeded", self.job_id)
 
     @actors.Message
@@ -372,11 +1412,34 @@ class JobProcessor(actors.Actor):
         self.actors().send_parent("job_failed", self.job_id, error)
 
 
+class JobStatus(enum.Enum):
+
+    RUNNING = 1
+    SUCCEEDED = 2
+    FAILED = 3
+
+
+@dataclass(frozen=True)
+class JobState:
+
+    job_id: str
+    status: JobStatus
+    actor_id: tp.Optional[actors.ActorId] = None
+    error: tp.Optional[Exception] = None
+
+
 @dataclass
 class EngineContext:
 
-    jobs: tp.Dict
-    data: tp.Dict
+    """
+    Engine state, replaced rather than updated so it can be read safely from outside the engine
+
+    Data loaded by jobs is shared through the data registry, if sharing is enabled in the config.
+    The registry is updated by running jobs, it is thread safe so it can also be read from outside.
+    """
+
+    jobs: tp.Dict[str, JobState]
+    data: tp.Optional[_shared.SharedDataRegistry] = None
 
 
 class TracEngine(actors.Actor):
@@ -384,6 +1447,11 @@ class TracEngine(actors.Actor):
     """
     TracEngine is the main actor that controls all operations in the TRAC runtime
     Messages may be passed in externally via ActorSystem, e.g. commands to launch jobs
+
+    Each job runs in its own JobProcessor, any number of jobs can run at once. Jobs are identified by the
+    job ID in their config, if there is no job ID one is generated. Jobs share the node executor and the
+    resource budget, worker slots are divided fairly between jobs that are running. If data sharing is enabled,
+    jobs loading the same data item share one copy of the data (see SharedDataRegistry).
     """
 
     def __init__(
@@ -394,32 +1462,81 @@ class TracEngine(actors.Actor):
 
         super().__init__()
 
-        self.engine_ctx = EngineContext(jobs={}, data={})
+        self.engine_ctx = EngineContext(jobs={})
 
         self._log = util.logger_for_object(self)
         self._sys_config = sys_config
         self._repos = repositories
         self._storage = storage
         self._batch_mode = batch_mode
+        self._executor: tp.Optional[NodeExecutor] = None
+        self._cost_model = NodeCostModel()
+        self._budget: tp.Optional[ResourceBudget] = None
+        self._result_cache: tp.Optional[_cache.ResultCache] = None
 
     def on_start(self):
 
+        self._executor = create_node_executor(self._sys_config.engineSettings)
+        self._budget = ResourceBudget(self._sys_config.resourceSettings, self._executor.max_workers)
+
+        if self._sys_config.resultCache is not None:
+            self._result_cache = _cache.ResultCache(self._sys_config.resultCache, self._storage)
+
+        if self._sys_config.sharedData is not None:
+            shared_data = _shared.SharedDataRegistry(self._sys_config.sharedData)
+            self.engine_ctx = EngineContext(self.engine_ctx.jobs, shared_data)
+
         self._log.info("Engine is up and running")
 
     def on_stop(self):
 
+        if self._executor is not None:
+            self._executor.shutdown()
+
         self._log.info("Engine shutdown complete")
 
+    def job_status(self, job_id: str) -> tp.Optional[JobState]:
+
+        """
+        Get the state of a job, this is safe to call from outside the engine
+        """
+
+        return self.engine_ctx.jobs.get(job_id)
+
     @actors.Message
-    def submit_job(self, job_info: object):
+    def submit_job(self, job_config: config.JobConfig):
+
+        if not job_config.job_id:
+            job_config = replace(job_config, job_id=str(uuid.uuid4()))
+
+        job_id = job_config.job_id
+        existing_job = self.engine_ctx.jobs.get(job_id)
+
+        # The runtime rejects duplicates before they are sent, this catches submissions that were already in flight
+        if existing_job is not None and existing_job.status == JobStatus.RUNNING:
+            self._log.error(f"Job rejected, a job with this ID is already running: {job_id}")
+            return
+
+        self._log.info(f"A job has been submitted: {job_id}")
+
+        # Resubmitting a failed job picks up the checkpoint it left behind
+        if self._sys_config.checkpoint is not None:
+            checkpoint = _checkpoint.JobCheckpoint(self._sys_config.checkpoint, self._storage, job_config)
+        else:
+            checkpoint = None
 
-        job_id = 'test_job'
+        job_actor_id = self.actors().spawn(
+            JobProcessor, job_id, job_config,
+            self._repos, self._storage, self._executor, self._cost_model, self._budget,
+            self._sys_config.engineSettings.releaseResults,
+            self._result_cache, checkpoint, self.engine_ctx.data)
 
-        self._log.info("A job has been submitted")
+        job_state = JobState(job_id, JobStatus.RUNNING, job_actor_id)
+        self._update_job(job_state)
 
-        job_actor_id = self.actors().spawn(JobProcessor, job_id, job_info, self._repos, self._storage)
+    def _update_job(self, job_state: JobState):
 
-        jobs = {**self.engine_ctx.jobs, job_id: job_actor_id}
+        jobs = {**self.engine_ctx.jobs, job_state.job_id: job_state}
         self.engine_ctx = EngineContext(jobs, self.engine_ctx.data)
 
     @actors.Message
@@ -436,8 +1553,13 @@ class TracEngine(actors.Actor):
 
     def _clean_up_job(self, job_id: str, error: tp.Optional[Exception] = None):
 
-        jobs = copy(self.engine_ctx.jobs)
-        job_actor_id = jobs.pop(job_id)
+        # Completed jobs are kept in the engine context so their status can still be queried
+
+        job_state = self.engine_ctx.jobs[job_id]
+        job_actor_id = job_state.actor_id
+
+        final_status = JobStatus.FAILED if error else JobStatus.SUCCEEDED
+        self._update_job(JobState(job_id, final_status, error=error))
 
         if self._batch_mode:
 
@@ -23,6 +23,9 @@ import trac.rt.config as config
 import trac.rt.impl.repositories as _repos
 import trac.rt.impl.storage as _storage
 import trac.rt.impl.data as _data
+import trac.rt.impl.result_cache as _cache
+import trac.rt.impl.shared_data as _shared
+import trac.rt.impl.util as util
 
 import abc
 import typing as tp
@@ -151,7 +154,7 @@ class DataIoFunc(NodeFunction, abc.ABC):
     def __init__(self, storage: _storage.StorageManager):
         self.storage = storage
 
-    def _choose_copy(self, data_item: str, storage_def: meta.StorageDefinition) -> meta.StorageCopy:
+    def _choose_incarnation(self, data_item: str, storage_def: meta.StorageDefinition) -> meta.StorageIncarnation:
 
         storage_info = storage_def.dataItems.get(data_item)
 
@@ -165,6 +168,12 @@ class DataIoFunc(NodeFunction, abc.ABC):
         if incarnation is None:
             raise RuntimeError("Data item not available (it has been expunged)")  # TODO: Error
 
+        return incarnation
+
+    def _choose_copy(self, data_item: str, storage_def: meta.StorageDefinition) -> meta.StorageCopy:
+
+        incarnation = self._choose_incarnation(data_item, storage_def)
+
         copy = next(filter(
             lambda c: c.copyStatus == meta.CopyStatus.COPY_AVAILABLE
             and self.storage.has_data_storage(c.storageKey),
@@ -178,15 +187,31 @@ class DataIoFunc(NodeFunction, abc.ABC):
 
 class LoadDataFunc(DataIoFunc):
 
-    def __init__(self, node: LoadDataNode, storage: _storage.StorageManager):
+    def __init__(
+            self, node: LoadDataNode, storage: _storage.StorageManager,
+            shared_data: tp.Optional[_shared.SharedDataRegistry] = None,
+            job_key: tp.Optional[str] = None):
+
         super().__init__(storage)
         self.node = node
+        self.shared_data = shared_data
+        self.job_key = job_key
 
     def __call__(self, ctx: NodeContext) -> NodeResult:
 
         data_item = self.node.data_item
         data_copy = self._choose_copy(data_item, self.node.storage_def)
 
+        if self.shared_data is None:
+            df = self._load_pandas(data_copy)
+        else:
+            shared_key = self._shared_key(data_copy)
+            df = self.shared_data.load(shared_key, self.job_key, lambda: self._load_pandas(data_copy))
+
+        return _data.DataItem(pandas=df)
+
+    def _load_pandas(self, data_copy: meta.StorageCopy):
+
         file_storage = self.storage.get_file_storage(data_copy.storageKey)
         data_storage = self.storage.get_data_storage(data_copy.storageKey)
 
@@ -194,17 +219,33 @@ class LoadDataFunc(DataIoFunc):
 
         if stat.file_type == _storage.FileType.FILE:
 
-            df = data_storage.read_pandas_table(
+            return data_storage.read_pandas_table(
                 self.node.data_def.schema,
                 data_copy.storagePath, data_copy.storageFormat,
                 storage_options={})
 
-            return _data.DataItem(pandas=df)
-
         else:
 
             raise NotImplementedError("Directory storage format not available yet")
 
+    def _shared_key(self, data_copy: meta.StorageCopy) -> _shared.SharedDataKey:
+
+        # The schema controls which columns are loaded, so it is part of the key
+        incarnation = self._choose_incarnation(self.node.data_item, self.node.storage_def)
+        schema = self.node.data_def.schema
+        columns = tuple(f.fieldName for f in schema.field) if schema is not None and schema.field else None
+
+        return (
+            self.node.data_item, incarnation.incarnationIndex,
+            data_copy.storageKey, data_copy.storagePath, columns)
+
+    def data_size(self) -> int:
+
+        data_copy = self._choose_copy(self.node.data_item, self.node.storage_def)
+        file_storage = self.storage.get_file_storage(data_copy.storageKey)
+
+        return file_storage.size(data_copy.storagePath)
+
 
 class SaveDataFunc(DataIoFunc):
 
@@ -242,19 +283,65 @@ class SaveDataFunc(DataIoFunc):
 
 class ModelFunc(NodeFunction):
 
-    def __init__(self, node: ModelNode, job_config: config.JobConfig, model_class: api.TracModel.__class__):
+    def __init__(
+            self, node: ModelNode, job_config: config.JobConfig, model_class: api.TracModel.__class__,
+            storage: _storage.StorageManager, result_cache: tp.Optional[_cache.ResultCache] = None):
+
         super().__init__()
         self.node = node
         self.job_config = job_config
         self.model_class = model_class
+        self.storage = storage
+        self.result_cache = result_cache
+        self._log = util.logger_for_object(self)
 
     def __call__(self, ctx: NodeContext) -> NodeResult:
 
+        if self.result_cache is None or not self.node.cache_result:
+            return self._run_model(ctx)
+
+        fingerprint = _cache.model_fingerprint(
+            self.node.model_def, self.model_class,
+            self.job_config, self.storage, self._parameters())
+
+        if fingerprint is None:
+            return self._run_model(ctx)
+
+        # The cache is only an optimisation, errors reading or writing it never change the result of the model
+
+        try:
+            cached_outputs = self.result_cache.get(fingerprint, self.node.model_def.output)
+
+        except Exception as e:
+            self._log.warning(f"Cached result could not be read for {self.node.model_def.entryPoint}: {str(e)}")
+            cached_outputs = None
+
+        if cached_outputs is not None:
+            self._log.info(f"Using cached result for model {self.node.model_def.entryPoint} ({fingerprint})")
+            return cached_outputs
+
+        model_outputs = self._run_model(ctx)
+
+        try:
+            self.result_cache.put(fingerprint, model_outputs)
+
+        except Exception as e:
+            self._log.warning(f"Result could not be cached for {self.node.model_def.entryPoint}: {str(e)}")
+
+        return model_outputs
+
+    def _run_model(self, ctx: NodeContext) -> NodeResult:
+
         # Create a context containing only items in the current namespace, addressed by name
         local_ctx = {
             nid.name: n.result for nid, n in ctx.items()
             if nid.namespace == self.node.id.namespace}
 
+        if self.node.copy_inputs:
+            local_ctx = {
+                name: self._copy_data_view(item) if isinstance(item, _data.DataView) else item
+                for name, item in local_ctx.items()}
+
         # Add empty data views to the local context to hold model outputs
         local_ctx.update({
             output_name: _data.DataView(schema=self.node.model_def.output[output_name], parts={})
@@ -263,7 +350,7 @@ class ModelFunc(NodeFunction):
         # Run the model against the mapped local context
         model_ctx = ModelContext(
             self.node.model_def, self.model_class,
-            parameters=self.job_config.parameters,
+            parameters=self._parameters(),
             data=local_ctx)
 
         model = self.model_class()
@@ -276,14 +363,39 @@ class ModelFunc(NodeFunction):
 
         return model_outputs
 
+    def _parameters(self) -> tp.Dict[str, tp.Any]:
+
+        if self.node.parameters is not None:
+            return self.node.parameters
+
+        return self.job_config.parameters
+
+    @staticmethod
+    def _copy_data_view(data_view: _data.DataView) -> _data.DataView:
+
+        parts = {
+            part_key: [
+                _data.DataItem(pandas=item.pandas.copy(), pyspark=item.pyspark, column_filter=item.column_filter)
+                if item.pandas is not None else item
+                for item in items]
+            for part_key, items in data_view.parts.items()}
+
+        return _data.DataView(data_view.schema, parts)
+
 
 class FunctionResolver:
 
     __ResolveFunc = tp.Callable[['FunctionResolver', config.JobConfig, Node], NodeFunction]
 
-    def __init__(self, repositories: _repos.Repositories, storage: _storage.StorageManager):
+    def __init__(
+            self, repositories: _repos.Repositories, storage: _storage.StorageManager,
+            result_cache: tp.Optional[_cache.ResultCache] = None,
+            shared_data: tp.Optional[_shared.SharedDataRegistry] = None):
+
         self._repos = repositories
         self._storage = storage
+        self._result_cache = result_cache
+        self._shared_data = shared_data
 
     def resolve_node(self, job_config, node: Node) -> NodeFunction:
 
@@ -300,7 +412,7 @@ class FunctionResolver:
         return resolve_func(self, job_config, node)
 
     def resolve_load_data(self, job_config: config.JobConfig, node: LoadDataNode):
-        return LoadDataFunc(node, self._storage)
+        return LoadDataFunc(node, self._storage, self._shared_data, job_config.job_id)
 
     def resolve_save_data(self, job_config: config.JobConfig, node: SaveDataNode):
         return SaveDataFunc(node, self._storage)
@@ -310,7 +422,7 @@ class FunctionResolver:
         model_loader = self._repos.get_model_loader(node.model_def.repository)
         model_class = model_loader.load_model(node.model_def)
 
-        return ModelFunc(node, job_config, model_class)
+        return ModelFunc(node, job_config, model_class, self._storage, self._result_cache)
 
     __basic_node_mapping: tp.Dict[Node.__class__, NodeFunction.__class__] = {
         ContextPushNode: ContextPushFunc,
@@ -326,6 +438,7 @@ class FunctionResolver:
         SaveDataNode: resolve_save_data,
         ModelNode: resolve_model_node,
 
+        FlowResultNode: lambda s, j, n: NoopNode(),
         JobOutputMetadataNode: lambda s, j, n: NoopNode(),
         JobResultMetadataNode: lambda s, j, n: NoopNode(),
         JobNode: lambda s, j, n: NoopNode()
@@ -26,6 +26,17 @@ class NodeNamespace:
     name: str
     parent: tp.Optional[NodeNamespace] = None
 
+    def __post_init__(self):
+        # Namespaces are nested, so the generated hash walks the whole chain every time a node ID is hashed
+        object.__setattr__(self, "_hash", hash((self.name, self.parent)))
+
+    def __hash__(self):
+        return self._hash  # noqa
+
+    def __reduce__(self):
+        # String hashes are not the same in every process, so the hash is worked out again when unpickled
+        return NodeNamespace, (self.name, self.parent)
+
     def __str__(self):
         return ", ".join(self.components())
 
@@ -84,6 +95,29 @@ class Graph:
     nodes: NodeMap
     root_id: NodeId
 
+    order: tp.List[NodeId] = dc.field(default_factory=list)
+    """Node IDs in topological order (dependencies first), set once the graph has been validated"""
+
+
+class GraphAccumulator:
+
+    """
+    Mutable set of nodes for a graph that is being built
+
+    Build steps add their nodes in place and move the root ID forward as they go, so building a graph
+    takes time in proportion to the number of nodes. The immutable graph is created once, when it is complete.
+    """
+
+    def __init__(self, root_id: NodeId):
+        self.nodes: NodeMap = dict()
+        self.root_id = root_id
+
+    def add_node(self, node: Node):
+        self.nodes[node.id] = node
+
+    def build_graph(self) -> Graph:
+        return Graph(self.nodes, self.root_id)
+
 
 @dc.dataclass(frozen=True)
 class IdentityNode(Node):
@@ -232,6 +266,15 @@ class ModelNode(Node):
 
     explicit_deps: dc.InitVar[tp.Optional[tp.List[NodeId]]] = None
 
+    parameters: tp.Optional[tp.Dict[str, tp.Any]] = None
+    """Parameters for this model run, if they are different from the job parameters (e.g. in a sweep)"""
+
+    copy_inputs: bool = False
+    """Give the model its own copy of its inputs, for inputs that are shared with other models"""
+
+    cache_result: bool = True
+    """Allow the result to be cached, models that read intermediate results (e.g. in a flow) cannot be fingerprinted"""
+
     def __post_init__(self, explicit_deps):
 
         input_dependencies = {input_id: DependencyType.HARD for input_id in self.input_ids}
@@ -241,6 +284,17 @@ class ModelNode(Node):
             self.dependencies.update({dep: DependencyType.HARD for dep in explicit_deps})
 
 
+@dc.dataclass(frozen=True)
+class FlowResultNode(Node):
+
+    """Marks the completion of a flow, once all the models in the flow have run"""
+
+    model_ids: tp.FrozenSet[NodeId]
+
+    def __post_init__(self):
+        object.__setattr__(self, 'dependencies', {model_id: DependencyType.HARD for model_id in self.model_ids})
+
+
 @dc.dataclass(frozen=True)
 class JobOutputMetadataNode(Node):
 
@@ -12,6 +12,9 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import itertools
+import collections
+
 import trac.rt.config.config as config
 
 from .graph import *
@@ -27,38 +30,136 @@ class GraphBuilder:
         if target_def is None:
             raise RuntimeError(f"No definition available for job target '{job_config.target}'")  # TODO: Error
 
-        # Only calculation jobs are supported at present
-        return GraphBuilder.build_calculation_job(job_config)
+        # Calculation jobs with a parameter grid are run as a sweep
+        if job_config.sweep:
+            job_graph = GraphBuilder.build_sweep_job(job_config)
+        else:
+            job_graph = GraphBuilder.build_calculation_job(job_config)
+
+        # Problems with the graph are found here, before any part of the job runs
+        return GraphBuilder.validate_graph(job_graph)
+
+    @classmethod
+    def validate_graph(cls, graph: Graph) -> Graph:
+
+        """
+        Check that every node in the graph can run and put the nodes in topological order
+
+        All dependencies must be nodes in the graph and there must be no cycles, otherwise the job would
+        deadlock part way through. Errors give the missing nodes or the nodes that make up a cycle.
+        Returns the same graph with its topological order set, which the scheduler can reuse.
+        """
+
+        missing = [
+            f"[{dep_id}] needed by [{node_id}]"
+            for node_id, node in graph.nodes.items()
+            for dep_id in node.dependencies
+            if dep_id not in graph.nodes]
+
+        if missing:
+            raise RuntimeError(  # TODO: Error
+                "Missing dependencies in the execution graph: " + ", ".join(missing))
+
+        order = cls.topological_order({node_id: node.dependencies for node_id, node in graph.nodes.items()})
+
+        if len(order) < len(graph.nodes):
+
+            sorted_ids = set(order)
+            unsorted_ids = set(node_id for node_id in graph.nodes if node_id not in sorted_ids)
+            cycle = cls._find_cycle(graph, unsorted_ids)
+
+            raise RuntimeError(  # TODO: Error
+                "Cyclic dependency in the execution graph (each node depends on the next): " +
+                " -> ".join(f"[{node_id}]" for node_id in cycle))
+
+        return Graph(graph.nodes, graph.root_id, order)
+
+    @staticmethod
+    def topological_order(dependencies: tp.Dict[NodeId, tp.Iterable[NodeId]]) -> tp.List[NodeId]:
+
+        """
+        Sort node IDs so every node comes after its dependencies (Kahn's algorithm)
+
+        Dependencies on IDs that are not being sorted are ignored. Nodes that are part of a cycle,
+        or depend on a node that is, are left out of the order.
+        """
+
+        # Work with list indices, so each node ID and each edge is only hashed once
+
+        node_ids = list(dependencies.keys())
+        node_index = {node_id: index for index, node_id in enumerate(node_ids)}
+
+        remaining = [0] * len(node_ids)
+        dependents: tp.List[tp.List[int]] = [[] for _ in node_ids]
+
+        for index, node_deps in enumerate(dependencies.values()):
+            for dep_id in node_deps:
+                dep_index = node_index.get(dep_id)
+                if dep_index is not None:
+                    dependents[dep_index].append(index)
+                    remaining[index] += 1
+
+        ready = collections.deque(index for index, count in enumerate(remaining) if count == 0)
+        order = []
+
+        while ready:
+
+            index = ready.popleft()
+            order.append(node_ids[index])
+
+            for dependent_index in dependents[index]:
+                remaining[dependent_index] -= 1
+                if remaining[dependent_index] == 0:
+                    ready.append(dependent_index)
+
+        return order
+
+    @staticmethod
+    def _find_cycle(graph: Graph, unsorted_ids: tp.Set[NodeId]) -> tp.List[NodeId]:
+
+        # Every node left out of the order has a dependency that was also left out
+        # Following those dependencies must eventually come back round to a node already on the path
+
+        node_id = next(node_id for node_id in graph.nodes if node_id in unsorted_ids)
+        path = []
+        path_index = dict()
+
+        while node_id not in path_index:
+            path_index[node_id] = len(path)
+            path.append(node_id)
+            node_id = next(dep_id for dep_id in graph.nodes[node_id].dependencies if dep_id in unsorted_ids)
+
+        return path[path_index[node_id]:] + [node_id]
 
     @classmethod
     def build_calculation_job(cls, job_config: config.JobConfig) -> Graph:
 
         job_namespace = NodeNamespace(f"job={job_config.job_id}")
-        null_graph = Graph({}, NodeId('', job_namespace))
+        graph = GraphAccumulator(NodeId('', job_namespace))
 
         # Create a job context with no dependencies and no external data mappings
-        ctx_push_graph = GraphBuilder.build_context_push(
-            job_namespace, null_graph, input_mapping=dict())
+        GraphBuilder.build_context_push(job_namespace, graph, input_mapping=dict())
 
         # Input graph will prepare data views job inputs
-        input_graph = cls.build_job_inputs(job_config, job_namespace, ctx_push_graph)
+        cls.build_job_inputs(job_config, job_namespace, graph)
 
         # Now create the root execution node, which will be either a single model or a flow
         # The root exec node can run directly in the job context, no need to do a context push
         # All input views are already mapped and there is only a single execution target
 
         job_target_obj = job_config.objects.get(job_config.target)
-        job_target_graph = GraphBuilder.build_model_or_flow(
-            job_config, job_namespace, input_graph, job_target_obj)
+        GraphBuilder.build_model_or_flow(job_config, job_namespace, graph, job_target_obj)
+
+        job_target_id = graph.root_id
 
         # Output graph will extract and save data items from job-level output data views
 
-        output_graph = cls.build_job_outputs(job_config, job_namespace, job_target_graph)
+        cls.build_job_outputs(job_config, job_namespace, graph)
 
         # Build job-level metadata outputs
 
         output_metadata_nodes = frozenset(
-            nid for nid, n in output_graph.nodes.items()
+            nid for nid, n in graph.nodes.items()
             if isinstance(n, JobOutputMetadataNode))
 
         job_metadata_id = NodeId("trac_job_metadata", job_namespace)
@@ -67,7 +168,7 @@ class GraphBuilder:
         job_logs_node = None
         job_metrics_node = None
 
-        job_models = [job_target_graph.root_id]
+        job_models = [job_target_id]
         # job_outputs = [view_id for view_id in output_views]
         # job_save_ops = [save_id for save_id in save_physical_outputs]
 
@@ -76,26 +177,108 @@ class GraphBuilder:
         job_node_id = NodeId("trac_job_completion", job_namespace)
         job_node = JobNode(job_node_id, job_metadata_id, explicit_deps=job_models)
 
-        job_graph_nodes = {
-            **output_graph.nodes,
-            job_metadata_id: job_metadata_node,
-            job_node_id: job_node}
-
-        job_graph = Graph(job_graph_nodes, job_node_id)
+        graph.add_node(job_metadata_node)
+        graph.add_node(job_node)
+        graph.root_id = job_node_id
 
         # CTX pop happens last, after the job node is complete
 
-        job_ctx_pop = GraphBuilder.build_context_pop(
-            job_namespace, job_graph, dict())
+        GraphBuilder.build_context_pop(job_namespace, graph, dict())
+
+        return graph.build_graph()
+
+    @classmethod
+    def build_sweep_job(cls, job_config: config.JobConfig) -> Graph:
+
+        """
+        Build a job that runs a single model once for each point in a parameter grid
+
+        Inputs are loaded once in the job context and mapped into a sub-context for each grid point.
+        Grid points run independently and save their own outputs, the output data IDs for each point
+        are given in sweepOutputs (in the same order as the grid points).
+        """
+
+        sweep_points = cls.sweep_points(job_config)
+
+        if len(job_config.sweepOutputs) != len(sweep_points):
+            raise RuntimeError(  # TODO: Error
+                f"Parameter sweep has {len(sweep_points)} grid points " +
+                f"but outputs are given for {len(job_config.sweepOutputs)}")
+
+        job_target_obj = job_config.objects.get(job_config.target)
+
+        if job_target_obj.objectType != meta.ObjectType.MODEL:
+            raise RuntimeError("Parameter sweep is only available for single models")  # TODO: Error
+
+        job_namespace = NodeNamespace(f"job={job_config.job_id}")
+        graph = GraphAccumulator(NodeId('', job_namespace))
+
+        GraphBuilder.build_context_push(job_namespace, graph, input_mapping=dict())
+        cls.build_job_inputs(job_config, job_namespace, graph)
+
+        input_root_id = graph.root_id
+        job_models = []
+
+        for point_index, (parameters, outputs) in enumerate(zip(sweep_points, job_config.sweepOutputs)):
+
+            point_namespace = NodeNamespace(f"sweep={point_index}", job_namespace)
+
+            # Grid points share the job inputs and can run at the same time
+            # Each point gets its own copy of the inputs, in case the model changes them
+
+            for input_name in job_config.inputs:
+                point_input_id = NodeId(input_name, point_namespace)
+                graph.add_node(IdentityNode(point_input_id, NodeId(input_name, job_namespace)))
+
+            graph.root_id = input_root_id
+
+            GraphBuilder.build_model(
+                job_config, point_namespace, graph, job_target_obj.model,
+                parameters=parameters, copy_inputs=True)
+
+            job_models.append(graph.root_id)
+
+            cls.build_job_outputs(job_config, point_namespace, graph, outputs)
 
-        return job_ctx_pop
+        output_metadata_nodes = frozenset(
+            nid for nid, n in graph.nodes.items()
+            if isinstance(n, JobOutputMetadataNode))
+
+        job_metadata_id = NodeId("trac_job_metadata", job_namespace)
+        job_metadata_node = JobResultMetadataNode(job_metadata_id, output_metadata_nodes)
+
+        job_node_id = NodeId("trac_job_completion", job_namespace)
+        job_node = JobNode(job_node_id, job_metadata_id, explicit_deps=job_models)
+
+        graph.add_node(job_metadata_node)
+        graph.add_node(job_node)
+        graph.root_id = job_node_id
+
+        GraphBuilder.build_context_pop(job_namespace, graph, dict())
+
+        return graph.build_graph()
+
+    @staticmethod
+    def sweep_points(job_config: config.JobConfig) -> tp.List[tp.Dict[str, tp.Any]]:
+
+        """
+        Expand the parameter grid for a sweep job into the full set of parameters for each grid point
+
+        Grid points are every combination of the values in the sweep, in the order the values are given.
+        Parameters that are not in the sweep take the same value for every point.
+        """
+
+        param_names = list(job_config.sweep.keys())
+        param_values = [job_config.sweep[name] for name in param_names]
+
+        return [
+            {**job_config.parameters, **dict(zip(param_names, point_values))}
+            for point_values in itertools.product(*param_values)]
 
     @classmethod
     def build_job_inputs(
             cls, job_config: config.JobConfig, namespace: NodeNamespace,
-            graph: Graph) -> Graph:
-
-        nodes = {**graph.nodes}
+            graph: GraphAccumulator):
 
         for input_name, data_id in job_config.inputs.items():
 
@@ -119,20 +302,19 @@ class GraphBuilder:
             data_view_id = NodeId(input_name, namespace)
             data_view_node = DataViewNode(data_view_id, data_def.schema, data_item_id)
 
-            nodes[data_load_id] = data_load_node
-            nodes[data_item_id] = data_item_node
-            nodes[data_view_id] = data_view_node
-
-        return Graph(nodes, graph.root_id)
+            graph.add_node(data_load_node)
+            graph.add_node(data_item_node)
+            graph.add_node(data_view_node)
 
     @classmethod
     def build_job_outputs(
             cls, job_config: config.JobConfig, namespace: NodeNamespace,
-            graph: Graph) -> Graph:
+            graph: GraphAccumulator, outputs: tp.Optional[tp.Dict[str, str]] = None):
 
-        nodes = {**graph.nodes}
+        if outputs is None:
+            outputs = job_config.outputs
 
-        for output_name, data_id in job_config.outputs.items():
+        for output_name, data_id in outputs.items():
 
             data_def = job_config.objects[data_id].data
             storage_def = job_config.objects[data_def.storageId].storage
@@ -158,19 +340,17 @@ class GraphBuilder:
             output_meta_id = NodeId(f"{output_name}:METADATA", namespace)
             output_meta_node = JobOutputMetadataNode(output_meta_id, data_view_id, {data_save_id: data_item})
 
-            nodes[data_item_id] = data_item_node
-            nodes[data_save_id] = data_save_node
-            nodes[output_meta_id] = output_meta_node
-
-        return Graph(nodes, graph.root_id)
+            graph.add_node(data_item_node)
+            graph.add_node(data_save_node)
+            graph.add_node(output_meta_node)
 
     @staticmethod
     def build_model_or_flow_with_context(
             job_config: config.JobConfig,
-            namespace: NodeNamespace, graph: Graph,
+            namespace: NodeNamespace, graph: GraphAccumulator,
             model_or_flow: meta.ObjectDefinition,
             input_mapping: tp.Dict[str, NodeId],
-            output_mapping: tp.Dict[str, NodeId]) -> Graph:
+            output_mapping: tp.Dict[str, NodeId]):
 
         # Generate a name for a new unique sub-context
         model_or_flow_name = "trac_model"  # TODO: unique name
@@ -178,23 +358,21 @@ class GraphBuilder:
         sub_namespace = NodeNamespace(sub_namespace_name, namespace)
 
         # Execute in the sub-context by doing PUSH, EXEC, POP
-        push_graph = GraphBuilder.build_context_push(sub_namespace, graph, input_mapping)
-        exec_graph = GraphBuilder.build_model_or_flow(job_config, sub_namespace, push_graph, model_or_flow)
-        pop_graph = GraphBuilder.build_context_pop(sub_namespace, exec_graph, output_mapping)
-
-        return pop_graph
+        GraphBuilder.build_context_push(sub_namespace, graph, input_mapping)
+        GraphBuilder.build_model_or_flow(job_config, sub_namespace, graph, model_or_flow)
+        GraphBuilder.build_context_pop(sub_namespace, graph, output_mapping)
 
     @staticmethod
     def build_model_or_flow(
             job_config: config.JobConfig,
-            namespace: NodeNamespace, graph: Graph,
-            model_or_flow: meta.ObjectDefinition) -> Graph:
+            namespace: NodeNamespace, graph: GraphAccumulator,
+            model_or_flow: meta.ObjectDefinition):
 
         if model_or_flow.objectType == meta.ObjectType.MODEL:
-            return GraphBuilder.build_model(job_config, namespace, graph, model_or_flow.model)
+            GraphBuilder.build_model(job_config, namespace, graph, model_or_flow.model)
 
         elif model_or_flow.objectType == meta.ObjectType.FLOW:
-            return GraphBuilder.build_flow(job_config, namespace, graph, model_or_flow.flow)
+            GraphBuilder.build_flow(job_config, namespace, graph, model_or_flow.flow)
 
         else:
             raise RuntimeError("Invalid job config given to the execution engine")  # TODO: Error
@@ -202,8 +380,10 @@ class GraphBuilder:
     @staticmethod
     def build_model(
             job_config: config.JobConfig,
-            namespace: NodeNamespace, graph: Graph,
-            model_def: meta.ModelDefinition) -> Graph:
+            namespace: NodeNamespace, graph: GraphAccumulator,
+            model_def: meta.ModelDefinition,
+            parameters: tp.Optional[tp.Dict[str, tp.Any]] = None,
+            copy_inputs: bool = False, cache_result: bool = True):
 
         def node_id_for(node_name):
             return NodeId(node_name, namespace)
@@ -217,7 +397,9 @@ class GraphBuilder:
 
         model_name = model_def.entryPoint.split(".")[-1]  # TODO: Check unique model name
         model_id = node_id_for(model_name)
-        model_node = ModelNode(model_id, model_def, input_ids, explicit_deps=[graph.root_id])
+        model_node = ModelNode(
+            model_id, model_def, input_ids, explicit_deps=[graph.root_id],
+            parameters=parameters, copy_inputs=copy_inputs, cache_result=cache_result)
 
         # Create nodes for each model output
         # The model node itself outputs a bundle (dictionary of named outputs)
@@ -226,30 +408,137 @@ class GraphBuilder:
         # These output mapping nodes are closely tied to the representation of the model itself
         # In the future, we may want models to emit individual outputs before the whole model is complete
 
-        model_node_map = {model_id: model_node}
+        graph.add_node(model_node)
 
         for output_name in model_def.output:
 
             output_id = NodeId(output_name, namespace)
             output_node = KeyedItemNode(output_id, model_id, output_name)
 
-            model_node_map[output_id] = output_node
+            graph.add_node(output_node)
 
-        # Assemble a graph to include the model and its outputs
-        return Graph({**graph.nodes, **model_node_map}, model_id)
+        # The model is the new root, outputs are available once it completes
+        graph.root_id = model_id
 
     @staticmethod
     def build_flow(
             job_config: config.JobConfig,
-            namespace: NodeNamespace, graph: Graph,
-            flow_def: meta.FlowDefinition) -> Graph:
+            namespace: NodeNamespace, graph: GraphAccumulator,
+            flow_def: meta.FlowDefinition):
+
+        """
+        Build the execution graph for a multi-model flow
+
+        Flow inputs and outputs are the data views for the job inputs and outputs in the current context.
+        Each model node runs in its own sub-context, the model to run for each node is given in the job config.
+        Edges run from a tail socket (a flow input or model output) to a head socket (a model input or flow
+        output). They are mapped directly onto model outputs, so intermediate results are passed in memory
+        and never saved. Models only depend on their own inputs, so independent branches can run at the same time.
+        """
+
+        node_types = {node_name: flow_node.nodeType for node_name, flow_node in flow_def.node.items()}
+        model_defs = dict()
+
+        for node_name, node_type in node_types.items():
+
+            if node_type != meta.FlowNodeType.MODEL_NODE:
+                continue
+
+            model_obj = job_config.objects.get(job_config.models.get(node_name))
+
+            if model_obj is None or model_obj.objectType != meta.ObjectType.MODEL:
+                raise RuntimeError(f"No model definition available for flow node '{node_name}'")  # TODO: Error
+
+            model_defs[node_name] = model_obj.model
+
+        def model_namespace(node_name):
+            return NodeNamespace(f"model={node_name}", namespace)
+
+        def socket_id(socket: meta.FlowSocket, is_tail: bool):
+
+            node_type = node_types.get(socket.node)
+
+            if node_type == meta.FlowNodeType.MODEL_NODE:
+
+                model_def = model_defs[socket.node]
+                model_sockets = model_def.output if is_tail else model_def.input
+
+                if socket.socket not in model_sockets:
+                    raise RuntimeError(f"Flow node '{socket.node}' has no socket '{socket.socket}'")  # TODO: Error
+
+                return NodeId(socket.socket, model_namespace(socket.node))
+
+            # Flow inputs can only be the tail of an edge, flow outputs can only be the head
+            io_node_type = meta.FlowNodeType.INPUT_NODE if is_tail else meta.FlowNodeType.OUTPUT_NODE
+
+            if node_type == io_node_type:
+                return NodeId(socket.node, namespace)
+
+            raise RuntimeError(f"Invalid flow edge for node '{socket.node}'")  # TODO: Error
+
+        # Map the head of each edge to its tail, each head socket can only be connected once
+
+        edges: tp.Dict[NodeId, NodeId] = dict()
+
+        for edge in flow_def.edge:
+
+            tail_id = socket_id(edge.tail, is_tail=True)
+            head_id = socket_id(edge.head, is_tail=False)
+
+            if head_id in edges:
+                raise RuntimeError(f"Flow socket '{head_id.name}' is connected more than once")  # TODO: Error
+
+            if tail_id.namespace == namespace and tail_id not in graph.nodes:
+                raise RuntimeError(f"Flow input '{tail_id.name}' is not supplied by the job")  # TODO: Error
+
+            edges[head_id] = tail_id
+
+        for node_name, node_type in node_types.items():
+
+            if node_type == meta.FlowNodeType.MODEL_NODE:
+                for input_name in model_defs[node_name].input:
+                    if NodeId(input_name, model_namespace(node_name)) not in edges:
+                        raise RuntimeError(  # TODO: Error
+                            f"Flow node '{node_name}' has no connection for input '{input_name}'")
+
+            elif node_type == meta.FlowNodeType.OUTPUT_NODE:
+                if NodeId(node_name, namespace) not in edges:
+                    raise RuntimeError(f"Flow output '{node_name}' is not connected")  # TODO: Error
+
+        # Results used in more than one place are copied for each model that uses them,
+        # in case the model changes its inputs while another branch of the flow is using them
+
+        tail_usage = collections.Counter(edges.values())
+
+        for head_id, tail_id in edges.items():
+            graph.add_node(IdentityNode(head_id, tail_id))
+
+        flow_root_id = graph.root_id
+        model_ids = []
+
+        for node_name, model_def in model_defs.items():
+
+            model_input_ids = [NodeId(input_name, model_namespace(node_name)) for input_name in model_def.input]
+            copy_inputs = any(tail_usage[edges[input_id]] > 1 for input_id in model_input_ids)
+
+            # Intermediate results have no stable identity, so results of models in a flow are not cached
+
+            graph.root_id = flow_root_id
+
+            GraphBuilder.build_model(
+                job_config, model_namespace(node_name), graph, model_def,
+                copy_inputs=copy_inputs, cache_result=False)
+
+            model_ids.append(graph.root_id)
 
-        raise NotImplementedError("Runtime execution graph for multi-model flows not implemented yet")
+        flow_id = NodeId("trac_flow", namespace)
+        graph.add_node(FlowResultNode(flow_id, frozenset(model_ids)))
+        graph.root_id = flow_id
 
     @staticmethod
     def build_context_push(
-            namespace: NodeNamespace, graph: Graph,
-            input_mapping: tp.Dict[str, NodeId]) -> Graph:
+            namespace: NodeNamespace, graph: GraphAccumulator,
+            input_mapping: tp.Dict[str, NodeId]):
 
         """
         Create a context push operation, all inputs are mapped by name
@@ -267,18 +556,16 @@ class GraphBuilder:
         push_node = ContextPushNode(push_id, namespace, push_mapping)
 
         # Create an explicit marker for each data node pushed into the new context
-        marker_nodes = {
-            node_id: IdentityNode(node_id, proxy_for=push_id)
-            for node_id in push_mapping.keys()}
+        for node_id in push_mapping.keys():
+            graph.add_node(IdentityNode(node_id, proxy_for=push_id))
 
-        return Graph({
-            **graph.nodes, **marker_nodes,
-            push_id: push_node}, push_id)
+        graph.add_node(push_node)
+        graph.root_id = push_id
 
     @staticmethod
     def build_context_pop(
-            namespace: NodeNamespace, graph: Graph,
-            output_mapping: tp.Dict[str, NodeId]) -> Graph:
+            namespace: NodeNamespace, graph: GraphAccumulator,
+            output_mapping: tp.Dict[str, NodeId]):
 
         """
         Create a context pop operation, all outputs are mapped by name
@@ -296,10 +583,8 @@ class GraphBuilder:
         pop_node = ContextPopNode(pop_id, namespace, pop_mapping, explicit_deps=[graph.root_id])
 
         # Create an explicit marker for each data node popped into the outer context
-        marker_nodes = {
-            node_id: IdentityNode(node_id, proxy_for=pop_id)
-            for node_id in pop_mapping.values()}
+        for node_id in pop_mapping.values():
+            graph.add_node(IdentityNode(node_id, proxy_for=pop_id))
 
-        return Graph({
-            **graph.nodes, **marker_nodes,
-            pop_id: pop_node}, pop_id)
+        graph.add_node(pop_node)
+        graph.root_id = pop_id
@@ -18,6 +18,7 @@ import datetime as dt
 import sys
 import pathlib
 import typing as tp
+import uuid
 
 import trac.rt.api as api
 import trac.rt.config.config as config
@@ -119,8 +120,17 @@ class TracRuntime:
         self._repos = repos.Repositories(self._sys_config)
         self._storage = storage.StorageManager(self._sys_config)
 
+        engine_settings = self._sys_config.engineSettings
+
         self._engine = engine.TracEngine(self._sys_config, self._repos, self._storage, batch_mode=self._batch_mode)
-        self._system = actors.ActorSystem(self._engine, system_thread="engine")
+        # Deep type checking of actor messages is only needed while developing
+        self._system = actors.ActorSystem(
+            self._engine, system_thread="engine",
+            dispatch_threads=engine_settings.actorThreads,
+            check_types=self._dev_mode,
+            dump_metrics=engine_settings.actorMetrics,
+            max_queue_size=engine_settings.actorQueueSize,
+            queue_overflow=actors.OverflowPolicy[engine_settings.actorQueueOverflow.upper()])
 
         self._system.start(wait=wait)
 
@@ -143,12 +153,32 @@ class TracRuntime:
     # Job submission
     # ------------------------------------------------------------------------------------------------------------------
 
-    def submit_job(self, job_config_path: str):
+    def submit_job(self, job_config_path: str) -> str:
 
         if self._batch_mode:
             raise RuntimeError()  # TODO: Error
 
-        self._system.send("submit_job", job_config_path)
+        raw_job_config = cfg.ConfigParser.load_raw_config(job_config_path)
+        job_config = cfg.ConfigParser(config.JobConfig).parse(raw_job_config, job_config_path)
+
+        # Assign the job ID here, so it can be given back to the caller
+        if not job_config.job_id:
+            job_config.job_id = str(uuid.uuid4())
+
+        # Do not give back the ID of a job that will not run
+        existing_job = self._engine.job_status(job_config.job_id)
+
+        if existing_job is not None and existing_job.status == engine.JobStatus.RUNNING:
+            job_id = job_config.job_id
+            raise RuntimeError(f"Job rejected, a job with this ID is already running: {job_id}")  # TODO: Error
+
+        self._system.send("submit_job", job_config)
+
+        return job_config.job_id
+
+    def get_job_status(self, job_id: str) -> tp.Optional[engine.JobState]:
+
+        return self._engine.job_status(job_id)
 
     def submit_batch(self):
 
@@ -0,0 +1,142 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import typing as tp
+import pathlib
+import hashlib
+import pickle
+import json
+import enum
+
+import trac.rt.config as _cfg
+import trac.rt.impl.storage as _storage
+import trac.rt.impl.result_cache as _cache
+import trac.rt.impl.util as _util
+
+
+def job_fingerprint(job_config: _cfg.JobConfig, storage: _storage.StorageManager) -> str:
+
+    """
+    Fingerprint for the parts of a job config that decide the results of the job
+
+    These are the target definition, the models for a flow, the parameters and the input data. Inputs are
+    identified the same way as for the result cache, so the fingerprint does not change when a dev mode job
+    is resubmitted and gets new object IDs. Outputs are identified by name only, for the same reason.
+    """
+
+    fingerprint = {
+        "target": job_config.objects.get(job_config.target),
+        "models": {name: job_config.objects.get(model_id) for name, model_id in job_config.models.items()},
+        "parameters": job_config.parameters,
+        "sweep": job_config.sweep,
+        "inputs": {
+            name: _cache.data_identity(job_config, data_id, storage)
+            for name, data_id in job_config.inputs.items()},
+        "outputs": sorted(job_config.outputs.keys())}
+
+    fingerprint_json = json.dumps(fingerprint, sort_keys=True, default=_json_default)
+
+    return hashlib.sha256(fingerprint_json.encode("utf-8")).hexdigest()
+
+
+def _json_default(obj: tp.Any):
+
+    # Metadata objects are plain classes, enums are written by name
+
+    if isinstance(obj, enum.Enum):
+        return obj.name
+
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+
+    return str(obj)
+
+
+class JobCheckpoint:
+
+    """
+    Saved node results for a single job, so the job can be resumed from where it stopped if it fails
+
+    Each node result is pickled to its own file under a directory for the job, named for a hash of the node ID.
+    A marker file is written after the result, results with no marker are incomplete and are never read.
+    Nodes only write their own files, so results can be saved from several executor threads at once.
+
+    The checkpoint records a fingerprint of the job config it was created for. If the same job ID is
+    resubmitted with a different config, the old checkpoint is discarded and the job starts again.
+    """
+
+    RESULT_SUFFIX = ".pkl"
+    MARKER_SUFFIX = ".done"
+    FINGERPRINT_FILE = "job_fingerprint"
+
+    def __init__(self, settings: _cfg.CheckpointSettings, storage: _storage.StorageManager, job_config: _cfg.JobConfig):
+
+        self._log = _util.logger_for_object(self)
+
+        self._file_storage = storage.get_file_storage(settings.storageKey)
+        self._job_path = pathlib.PurePath(settings.storagePath) / job_config.job_id
+
+        fingerprint = job_fingerprint(job_config, storage)
+        fingerprint_path = str(self._job_path / self.FINGERPRINT_FILE)
+
+        if self._file_storage.exists(str(self._job_path)):
+
+            saved_fingerprint = self._file_storage.read_bytes(fingerprint_path).decode("utf-8") \
+                if self._file_storage.exists(fingerprint_path) else None
+
+            if saved_fingerprint != fingerprint:
+                self._log.warning(f"Job config has changed since checkpoint {job_config.job_id} was saved")
+                self.remove()
+
+        if not self._file_storage.exists(fingerprint_path):
+            self._file_storage.mkdir(str(self._job_path), recursive=True, exists_ok=True)
+            self._file_storage.write_bytes(fingerprint_path, fingerprint.encode("utf-8"))
+
+    def saved_nodes(self, node_ids: tp.Iterable[tp.Any]) -> tp.Set[tp.Any]:
+
+        """
+        Find which of the given nodes have a complete saved result
+        """
+
+        saved_files = set(pathlib.PurePath(path).name for path in self._file_storage.ls(str(self._job_path)))
+
+        return set(
+            node_id for node_id in node_ids
+            if self._node_key(node_id) + self.MARKER_SUFFIX in saved_files)
+
+    def save(self, node_id: tp.Any, result: tp.Any):
+
+        node_key = self._node_key(node_id)
+        result_bytes = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._file_storage.write_bytes(str(self._job_path / (node_key + self.RESULT_SUFFIX)), result_bytes, True)
+        self._file_storage.write_bytes(str(self._job_path / (node_key + self.MARKER_SUFFIX)), b"", True)
+
+    def load(self, node_id: tp.Any) -> tp.Any:
+
+        node_key = self._node_key(node_id)
+        result_bytes = self._file_storage.read_bytes(str(self._job_path / (node_key + self.RESULT_SUFFIX)))
+
+        return pickle.loads(result_bytes)
+
+    def remove(self):
+
+        self._log.info(f"Removing checkpoint {self._job_path.name}")
+        self._file_storage.rm(str(self._job_path), recursive=True)
+
+    @staticmethod
+    def _node_key(node_id: tp.Any) -> str:
+
+        # Node IDs include the namespace, which is not safe to use in a file name
+        return hashlib.sha256(str(node_id).encode("utf-8")).hexdigest()
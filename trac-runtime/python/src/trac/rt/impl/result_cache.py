@@ -0,0 +1,295 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import typing as tp
+import pathlib
+import hashlib
+import inspect
+import json
+import pickle
+import threading
+import time
+
+import trac.rt.metadata as _meta
+import trac.rt.config as _cfg
+import trac.rt.impl.data as _data
+import trac.rt.impl.storage as _storage
+import trac.rt.impl.util as _util
+
+
+ModelOutputs = tp.Dict[str, _data.DataView]
+
+
+def model_fingerprint(
+        model_def: _meta.ModelDefinition, model_class: type,
+        job_config: _cfg.JobConfig, storage: _storage.StorageManager,
+        parameters: tp.Optional[tp.Dict[str, tp.Any]] = None) -> tp.Optional[str]:
+
+    """
+    Fingerprint for a model run, based on the model code, the input data and the job parameters
+
+    Inputs are identified by incarnation and the location of their storage copies, rather than object IDs,
+    which are not stable for the same data in dev mode. A new incarnation of an input gives a new fingerprint.
+    The size and modified time of each copy are included as well, since in dev mode a file can be edited
+    in place without creating a new incarnation.
+    Models with no repository version (e.g. in dev mode) are identified by a hash of their source file.
+    Parameters are taken from the job config, unless they are given explicitly (e.g. for a sweep).
+    Returns None if the run cannot be fingerprinted, in which case the result should not be cached.
+    """
+
+    model_version = model_def.repositoryVersion or _model_source_hash(model_class)
+
+    if model_version is None:
+        return None
+
+    inputs = dict()
+
+    for input_name in sorted(model_def.input or {}):
+
+        input_identity = data_identity(job_config, job_config.inputs.get(input_name), storage)
+
+        if input_identity is None:
+            return None
+
+        inputs[input_name] = input_identity
+
+    fingerprint = {
+        "model": {
+            "language": model_def.language,
+            "repository": model_def.repository,
+            "version": model_version,
+            "path": model_def.path,
+            "entryPoint": model_def.entryPoint},
+        "inputs": inputs,
+        "parameters": parameters if parameters is not None else job_config.parameters}
+
+    # Sorting keys gives the canonical form, parameter values that are not plain JSON are converted to strings
+    fingerprint_json = json.dumps(fingerprint, sort_keys=True, default=str)
+
+    return hashlib.sha256(fingerprint_json.encode("utf-8")).hexdigest()
+
+
+def data_identity(
+        job_config: _cfg.JobConfig, data_id: tp.Optional[str],
+        storage: _storage.StorageManager) -> tp.Optional[tp.Dict[str, tp.Any]]:
+
+    """
+    Identify the data for a data object in the job config, by its latest incarnation and storage copies
+
+    Returns None if the data cannot be identified, e.g. if a storage copy cannot be checked for changes.
+    """
+
+    if data_id not in job_config.objects:
+        return None
+
+    data_def = job_config.objects[data_id].data
+    storage_def = job_config.objects[data_def.storageId].storage
+
+    # TODO: Get this from somewhere
+    root_part_opaque_key = 'part-root'
+    data_item = data_def.parts[root_part_opaque_key].snap.deltas[0].dataItemId
+    storage_item = storage_def.dataItems.get(data_item)
+
+    if storage_item is None or not storage_item.incarnations:
+        return None
+
+    incarnation = storage_item.incarnations[-1]
+    copies = []
+
+    for copy in incarnation.copies:
+
+        copy_stat = _copy_stat(storage, copy)
+
+        if copy_stat is None:
+            return None
+
+        copies.append([copy.storageKey, copy.storagePath, copy_stat.size, copy_stat.mtime.isoformat()])
+
+    copies.sort()
+
+    return {"incarnation": incarnation.incarnationIndex, "copies": copies}
+
+
+def _copy_stat(storage: _storage.StorageManager, copy: _meta.StorageCopy) -> tp.Optional[_storage.FileStat]:
+
+    # Copies that cannot be checked for changes cannot be fingerprinted
+
+    if not storage.has_file_storage(copy.storageKey):
+        return None
+
+    try:
+        copy_stat = storage.get_file_storage(copy.storageKey).stat(copy.storagePath)
+        return copy_stat if copy_stat.mtime is not None else None
+
+    except OSError:
+        return None
+
+
+def _model_source_hash(model_class: type) -> tp.Optional[str]:
+
+    try:
+        source_file = inspect.getsourcefile(model_class)
+        source_bytes = pathlib.Path(source_file).read_bytes()
+        return "source:" + hashlib.sha256(source_bytes).hexdigest()
+
+    except (TypeError, OSError):
+        return None
+
+
+class ResultCache:
+
+    """
+    Cache of model results, addressed by the fingerprint of the model run
+
+    Each entry is a directory in the cache storage location, holding a manifest and one file per data item.
+    Entries are evicted when they are older than the max age, or when the cache is over the max size
+    (least recently used first). Limits set to zero in the config are not applied.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, settings: _cfg.ResultCacheSettings, storage: _storage.StorageManager):
+
+        self._log = _util.logger_for_object(self)
+        self._lock = threading.Lock()
+
+        self._file_storage = storage.get_file_storage(settings.storageKey)
+        self._cache_path = pathlib.PurePath(settings.storagePath)
+        self._max_size = settings.maxSizeMb * 1024 * 1024 or None
+        self._max_age = settings.maxAgeSeconds or None
+
+        self._file_storage.mkdir(str(self._cache_path), recursive=True, exists_ok=True)
+
+    def get(self, fingerprint: str, output_schemas: tp.Dict[str, _meta.TableDefinition]) \
+            -> tp.Optional[ModelOutputs]:
+
+        with self._lock:
+
+            entry_path = self._cache_path / fingerprint
+            manifest_path = str(entry_path / self.MANIFEST_FILE)
+
+            if not self._file_storage.exists(manifest_path):
+                return None
+
+            manifest = json.loads(self._file_storage.read_bytes(manifest_path))
+
+            if self._expired(manifest, time.time()):
+                self._remove_entry(fingerprint)
+                return None
+
+            outputs = dict()
+
+            for output_name, parts in manifest["outputs"].items():
+
+                data_parts = dict()
+
+                for part_key, item_files in parts.items():
+                    data_parts[_data.DataPartKey(part_key)] = [
+                        _data.DataItem(pandas=pickle.loads(self._file_storage.read_bytes(str(entry_path / item_file))))
+                        for item_file in item_files]
+
+                outputs[output_name] = _data.DataView(output_schemas.get(output_name), data_parts)
+
+            # Record the hit, so eviction by size removes the least recently used entries first
+            manifest["last_used"] = time.time()
+            self._file_storage.write_bytes(manifest_path, json.dumps(manifest).encode("utf-8"), overwrite=True)
+
+            return outputs
+
+    def put(self, fingerprint: str, outputs: ModelOutputs):
+
+        with self._lock:
+
+            entry_path = self._cache_path / fingerprint
+
+            if self._file_storage.exists(str(entry_path)):
+                self._remove_entry(fingerprint)
+
+            self._file_storage.mkdir(str(entry_path), recursive=True)
+
+            manifest_outputs = dict()
+            entry_size = 0
+
+            for output_index, (output_name, data_view) in enumerate(outputs.items()):
+
+                manifest_parts = dict()
+
+                for part_index, (part_key, items) in enumerate(data_view.parts.items()):
+
+                    item_files = []
+
+                    for item_index, item in enumerate(items):
+
+                        item_file = f"output_{output_index}_{part_index}_{item_index}.pkl"
+                        item_bytes = pickle.dumps(item.pandas, protocol=pickle.HIGHEST_PROTOCOL)
+
+                        self._file_storage.write_bytes(str(entry_path / item_file), item_bytes)
+                        item_files.append(item_file)
+                        entry_size += len(item_bytes)
+
+                    manifest_parts[part_key.opaque_key] = item_files
+
+                manifest_outputs[output_name] = manifest_parts
+
+            now = time.time()
+            manifest = {"created": now, "last_used": now, "size": entry_size, "outputs": manifest_outputs}
+
+            # Manifest is written last, an entry without a manifest is never read
+            manifest_path = str(entry_path / self.MANIFEST_FILE)
+            self._file_storage.write_bytes(manifest_path, json.dumps(manifest).encode("utf-8"))
+
+            self._evict()
+
+    def _evict(self):
+
+        now = time.time()
+        entries = []
+
+        for entry_path in self._file_storage.ls(str(self._cache_path)):
+
+            fingerprint = pathlib.PurePath(entry_path).name
+            manifest_path = str(self._cache_path / fingerprint / self.MANIFEST_FILE)
+
+            # Entries with no manifest are incomplete, they will be removed if the same result is cached again
+            if not self._file_storage.exists(manifest_path):
+                continue
+
+            manifest = json.loads(self._file_storage.read_bytes(manifest_path))
+
+            if self._expired(manifest, now):
+                self._remove_entry(fingerprint)
+            else:
+                entries.append((manifest["last_used"], manifest["size"], fingerprint))
+
+        if self._max_size is None:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, fingerprint in sorted(entries):
+
+            if total_size <= self._max_size:
+                break
+
+            self._remove_entry(fingerprint)
+            total_size -= size
+
+    def _expired(self, manifest: dict, now: float):
+
+        return self._max_age is not None and now - manifest["created"] > self._max_age
+
+    def _remove_entry(self, fingerprint: str):
+
+        self._log.info(f"Removing cached result {fingerprint}")
+        self._file_storage.rm(str(self._cache_path / fingerprint), recursive=True)
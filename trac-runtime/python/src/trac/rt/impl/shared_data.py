@@ -0,0 +1,183 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import typing as tp
+import dataclasses as dc
+import concurrent.futures as cf
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import trac.rt.config as _cfg
+import trac.rt.impl.util as _util
+
+
+# Data item ID, incarnation index, storage key, storage path and the columns being loaded (None for all columns)
+SharedDataKey = tp.Tuple[str, int, str, str, tp.Optional[tp.Tuple[str, ...]]]
+
+
+@dc.dataclass
+class _SharedEntry:
+
+    future: cf.Future
+    jobs: tp.Set[str] = dc.field(default_factory=set)
+    memory: int = 0
+    last_used: float = 0.0
+
+
+class SharedDataRegistry:
+
+    """
+    Loaded data that is shared between all the jobs running in the engine
+
+    The first job to ask for a data item loads it, other jobs asking for the same item while the load is
+    in progress wait for it instead of loading it again. Each entry counts the jobs using it, jobs release
+    all their entries when they complete. Entries that no job is using are kept for later jobs while the
+    registry is under its memory limit, least recently used entries are evicted first. With no limit set,
+    entries are evicted as soon as no job is using them.
+
+    Shared data frames are read only. Each job gets its own frame object, so adding or replacing columns
+    does not affect other jobs, but trying to update values in place will raise an error. Columns that are
+    not backed by numpy (e.g. categoricals) cannot be made read only, so each job gets its own copy of those.
+    """
+
+    def __init__(self, settings: _cfg.SharedDataSettings):
+
+        self._log = _util.logger_for_object(self)
+        self._lock = threading.Lock()
+
+        self._max_memory = settings.maxMemoryMb * 1024 * 1024 or None
+        self._entries: tp.Dict[SharedDataKey, _SharedEntry] = dict()
+        self._job_entries: tp.Dict[str, tp.Set[SharedDataKey]] = dict()
+        self._memory = 0
+
+    def load(self, key: SharedDataKey, job_key: str, loader: tp.Callable[[], pd.DataFrame]) -> pd.DataFrame:
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+            is_loader = entry is None
+
+            if is_loader:
+                entry = _SharedEntry(cf.Future())
+                self._entries[key] = entry
+
+            entry.jobs.add(job_key)
+            self._job_entries.setdefault(job_key, set()).add(key)
+
+        if is_loader:
+            df = self._load_entry(key, entry, loader)
+        else:
+            if not entry.future.done():
+                self._log.info(f"Waiting for shared data to load: {key[0]}")
+            df = entry.future.result()
+
+        return self._job_copy(df)
+
+    def _load_entry(self, key: SharedDataKey, entry: _SharedEntry, loader: tp.Callable[[], pd.DataFrame]):
+
+        try:
+            df = loader()
+
+            self._freeze(df)
+
+            memory = int(df.memory_usage(index=True, deep=True).sum())
+
+        except Exception as e:
+
+            # Jobs waiting on the load get the same error, the entry is removed so a later job can try again
+            with self._lock:
+                self._entries.pop(key, None)
+                for job_key in entry.jobs:
+                    self._job_entries.get(job_key, set()).discard(key)
+
+            entry.future.set_exception(e)
+            raise
+
+        with self._lock:
+            entry.memory = memory
+            self._memory += memory
+
+        entry.future.set_result(df)
+
+        return df
+
+    @staticmethod
+    def _freeze(df: pd.DataFrame):
+
+        # Block updates in place, so one job cannot change data that other jobs are using
+        # Column values can be a view onto a larger array holding several columns, so the base arrays are frozen too
+
+        for _, column in df.items():
+
+            values = column.values
+
+            while isinstance(values, np.ndarray):
+                values.flags.writeable = False
+                values = values.base
+
+    @staticmethod
+    def _job_copy(df: pd.DataFrame) -> pd.DataFrame:
+
+        job_df = df.copy(deep=False)
+
+        for column_name, column in df.items():
+            if not isinstance(column.values, np.ndarray):
+                job_df[column_name] = column.copy()
+
+        return job_df
+
+    def release_job(self, job_key: str):
+
+        with self._lock:
+
+            now = time.monotonic()
+
+            for key in self._job_entries.pop(job_key, set()):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.jobs.discard(job_key)
+                    entry.last_used = now
+
+            self._evict()
+
+    def memory(self) -> int:
+
+        with self._lock:
+            return self._memory
+
+    def keys(self) -> tp.List[SharedDataKey]:
+
+        with self._lock:
+            return list(self._entries.keys())
+
+    def _evict(self):
+
+        # Entries still loading or in use by a job are never evicted
+
+        unused = sorted(
+            (key for key, entry in self._entries.items() if not entry.jobs and entry.future.done()),
+            key=lambda k: self._entries[k].last_used)
+
+        for key in unused:
+
+            if self._max_memory is not None and self._memory <= self._max_memory:
+                break
+
+            entry = self._entries.pop(key)
+            self._memory -= entry.memory
+
+            self._log.info(f"Evicted shared data: {key[0]}")
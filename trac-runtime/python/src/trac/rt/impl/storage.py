@@ -17,6 +17,7 @@ import typing as tp
 import pathlib
 import io
 import datetime as dt
+import shutil
 import dataclasses as dc
 import enum
 
@@ -305,7 +306,10 @@ class LocalFileStorage(IFileStorage):
 
         return FileStat(
             file_type=file_type,
-            size=os_stat.st_size)
+            size=os_stat.st_size,
+            ctime=dt.datetime.fromtimestamp(os_stat.st_ctime, dt.timezone.utc),
+            mtime=dt.datetime.fromtimestamp(os_stat.st_mtime, dt.timezone.utc),
+            atime=dt.datetime.fromtimestamp(os_stat.st_atime, dt.timezone.utc))
 
     def ls(self, storage_path: str) -> tp.List[str]:
 
@@ -321,7 +325,15 @@ class LocalFileStorage(IFileStorage):
 
     def rm(self, storage_path: str, recursive: bool = False):
 
-        raise NotImplementedError()
+        item_path = self.__root_path / storage_path
+
+        if item_path.is_dir():
+            if recursive:
+                shutil.rmtree(item_path)
+            else:
+                item_path.rmdir()
+        else:
+            item_path.unlink()
 
     def read_bytes(self, storage_path: str) -> bytes:
 
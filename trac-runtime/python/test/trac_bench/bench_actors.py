@@ -0,0 +1,153 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Micro-benchmarks for the actor system message dispatcher
+
+These are not unit tests and are not run as part of the CI build. To run them:
+
+    export PYTHONPATH=trac-runtime/python/generated
+    export PYTHONPATH=trac-runtime/python/src:$PYTHONPATH
+    export PYTHONPATH=trac-runtime/python/test:$PYTHONPATH
+    python -m trac_bench.bench_actors
+"""
+
+import threading
+import time
+import typing as tp
+
+import trac.rt.exec.actors as actors
+
+
+def bench_idle_hop(rounds: int = 200) -> float:
+
+    """
+    Latency for a message sent into an idle actor system to reach its handler (seconds per message)
+    """
+
+    received = threading.Event()
+
+    class Receiver(actors.Actor):
+
+        @actors.Message
+        def ping(self):
+            received.set()
+
+    system = actors.ActorSystem(Receiver())
+    system.start(wait=True)
+
+    # Let the system go idle before each message, so each message has to wake the dispatcher
+    total = 0.0
+
+    for _ in range(rounds):
+
+        time.sleep(0.001)
+        received.clear()
+
+        start = time.perf_counter()
+        system.send("ping")
+        received.wait()
+        total += time.perf_counter() - start
+
+    system.stop()
+    system.wait_for_shutdown()
+
+    return total / rounds
+
+
+def bench_ping_pong(messages: int = 20000) -> float:
+
+    """
+    Time per message for two actors exchanging messages back and forth (seconds per message)
+    """
+
+    class Pong(actors.Actor):
+
+        @actors.Message
+        def ping(self, count: int):
+            self.actors().reply("pong", count)
+
+    class Ping(actors.Actor):
+
+        def __init__(self):
+            super().__init__()
+            self.pong_id: tp.Optional[actors.ActorId] = None
+
+        def on_start(self):
+            self.pong_id = self.actors().spawn(Pong)
+            self.actors().send(self.pong_id, "ping", 0)
+
+        @actors.Message
+        def pong(self, count: int):
+            if count < messages:
+                self.actors().send(self.pong_id, "ping", count + 2)
+            else:
+                self.actors().stop()
+
+    system = actors.ActorSystem(Ping())
+
+    start = time.perf_counter()
+    system.start()
+    system.wait_for_shutdown()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / messages
+
+
+def bench_deep_queue(messages: int = 50000) -> float:
+
+    """
+    Time per message to drain a deep queue of messages, all sent in one burst (seconds per message)
+    """
+
+    class Burst(actors.Actor):
+
+        def __init__(self):
+            super().__init__()
+            self.received = 0
+
+        def on_start(self):
+            for i in range(messages):
+                self.actors().send(self.actors().id, "item", i)
+
+        @actors.Message
+        def item(self, index: int):
+            self.received += 1
+            if self.received == messages:
+                self.actors().stop()
+
+    system = actors.ActorSystem(Burst())
+
+    start = time.perf_counter()
+    system.start()
+    system.wait_for_shutdown()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / messages
+
+
+def main():
+
+    benchmarks = [
+        ("idle hop", bench_idle_hop),
+        ("ping pong", bench_ping_pong),
+        ("deep queue", bench_deep_queue)]
+
+    for name, bench_func in benchmarks:
+        per_message = bench_func()
+        print(f"{name:<12} {per_message * 1000000:10.1f} us / message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Benchmarks for building job execution graphs
+
+These are not unit tests and are not run as part of the CI build. To run them:
+
+    export PYTHONPATH=trac-runtime/python/generated
+    export PYTHONPATH=trac-runtime/python/src:$PYTHONPATH
+    export PYTHONPATH=trac-runtime/python/test:$PYTHONPATH
+    python -m trac_bench.bench_graph
+"""
+
+import time
+
+import trac.rt.config as config
+import trac.rt.metadata as meta
+import trac.rt.exec.graph_builder as graph_builder
+
+
+def flow_chain_job(models: int) -> config.JobConfig:
+
+    """
+    Job config for a flow that runs a chain of models, each model reads the output of the one before it
+    """
+
+    table = meta.TableDefinition(field=[])
+
+    def model_object(entry_point, inputs):
+        return meta.ObjectDefinition(
+            objectType=meta.ObjectType.MODEL,
+            model=meta.ModelDefinition(  # noqa
+                language="python", repository="trac_integrated", entryPoint=entry_point,
+                path="", repositoryVersion="", input=inputs, output={"output": table}, param={}))
+
+    flow_nodes = {f"model_{i}": meta.FlowNode(nodeType=meta.FlowNodeType.MODEL_NODE) for i in range(models)}
+
+    flow_edges = [
+        meta.FlowEdge(
+            head=meta.FlowSocket(node=f"model_{i}", socket="input"),
+            tail=meta.FlowSocket(node=f"model_{i - 1}", socket="output"))
+        for i in range(1, models)]
+
+    # The first model in the chain has no inputs, so the job does not need any input data
+    objects = {
+        "source_model": model_object("trac_bench.SourceModel", {}),
+        "chain_model": model_object("trac_bench.ChainModel", {"input": table}),
+        "chain_flow": meta.ObjectDefinition(
+            objectType=meta.ObjectType.FLOW,
+            flow=meta.FlowDefinition(node=flow_nodes, edge=flow_edges))}
+
+    model_ids = {node_name: "chain_model" for node_name in flow_nodes}
+    model_ids["model_0"] = "source_model"
+
+    return config.JobConfig(
+        job_id="bench_job", target="chain_flow", objects=objects, models=model_ids)
+
+
+def bench_build_flow(nodes: int) -> (int, float):
+
+    """
+    Time to build the graph for a flow job with (roughly) the given number of nodes
+
+    Each model in the chain adds three nodes (the model, its input mapping and its output mapping).
+    The graph is only built, model code is never loaded.
+    Returns the number of nodes actually built and the elapsed time in seconds.
+    """
+
+    job_config = flow_chain_job(nodes // 3)
+
+    start = time.perf_counter()
+    job_graph = graph_builder.GraphBuilder.build_job(job_config)
+    elapsed = time.perf_counter() - start
+
+    return len(job_graph.nodes), elapsed
+
+
+def main():
+
+    for nodes in [10000, 100000, 1000000]:
+        graph_nodes, elapsed = bench_build_flow(nodes)
+        print(f"{graph_nodes:>10} nodes {elapsed:10.2f} s {elapsed / graph_nodes * 1000000:10.1f} us / node")
+
+
+if __name__ == "__main__":
+    main()
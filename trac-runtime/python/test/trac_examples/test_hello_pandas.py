@@ -14,22 +14,79 @@
 
 import unittest
 import importlib.util
+import pathlib
+import shutil
 import sys
+import tempfile
+
+import pandas as pd
+import yaml
 
 import trac.rt.launch as launch
 
 
 class HelloPandasExample(unittest.TestCase):
 
-    def test_hello_pandas(self):
-
-        job_config = 'doc/examples/models/python/hello_pandas/hello_pandas.yaml'
-        sys_config = 'doc/examples/models/python/sys_config.yaml'
+    @staticmethod
+    def load_model_class():
 
         spec = importlib.util.spec_from_file_location("hello_pandas", "doc/examples/models/python/hello_pandas/hello_pandas.py")
         module = importlib.util.module_from_spec(spec)
         sys.modules[spec.name] = module
         spec.loader.exec_module(module)
-        model_class = module.__dict__["HelloPandas"]
+        return module.__dict__["HelloPandas"]
+
+    def test_hello_pandas(self):
+
+        job_config = 'doc/examples/models/python/hello_pandas/hello_pandas.yaml'
+        sys_config = 'doc/examples/models/python/sys_config.yaml'
+
+        model_class = self.load_model_class()
 
         launch.launch_model(model_class, job_config, sys_config)
+
+    def test_hello_pandas_sweep(self):
+
+        job_config = 'doc/examples/models/python/hello_pandas/hello_pandas_sweep.yaml'
+        sys_config = 'doc/examples/models/python/sys_config.yaml'
+
+        # Run against a copy of the example inputs, so outputs are not written into the examples folder
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        data_dir = pathlib.Path(tmp_dir.name).joinpath("data")
+        shutil.copytree("doc/examples/models/python/data/inputs", data_dir.joinpath("inputs"))
+
+        with open(sys_config, "r") as sys_config_file:
+            sys_config_dict = yaml.safe_load(sys_config_file)
+
+        sys_config_dict["storage"]["example_data"]["storageConfig"]["rootPath"] = str(data_dir)
+        tmp_sys_config = pathlib.Path(tmp_dir.name).joinpath("sys_config.yaml")
+
+        with open(tmp_sys_config, "w") as sys_config_file:
+            yaml.safe_dump(sys_config_dict, sys_config_file)
+
+        model_class = self.load_model_class()
+
+        launch.launch_model(model_class, job_config, str(tmp_sys_config))
+
+        # One output for each grid point, points are in the order of the sweep values
+        # (default_weighting = 1.0, 1.5, 2.0) x (filter_defaults = false, true)
+
+        output_dir = data_dir.joinpath("outputs/hello_pandas_sweep")
+        output_files = sorted(f.name for f in output_dir.iterdir())
+
+        self.assertEqual([f"profit_by_region-point-{i}.csv" for i in range(6)], output_files)
+
+        def gross_profit(point: int):
+            output = pd.read_csv(output_dir.joinpath(f"profit_by_region-point-{point}.csv"))
+            return output.sort_values("region")["gross_profit"].round(2).tolist()
+
+        # With defaults included, the weighting changes the results
+        self.assertNotEqual(gross_profit(0), gross_profit(2))
+        self.assertNotEqual(gross_profit(2), gross_profit(4))
+
+        # Filtering defaults changes the results, and then the weighting has no effect
+        self.assertNotEqual(gross_profit(0), gross_profit(1))
+        self.assertEqual(gross_profit(1), gross_profit(3))
@@ -15,6 +15,43 @@
 import trac.rt.impl.util as util
 import trac.rt.exec.actors as actors
 import unittest
+import threading
+import asyncio
+import time
+import os
+import typing as tp
+
+
+# Actors that run in a worker process must be importable, so they are declared at module level
+
+class IsolatedEchoActor(actors.Actor):
+
+    @actors.Message
+    def ping(self, value: int):
+        self.actors().reply("pong", value, os.getpid())
+
+
+class IsolatedClassActor(actors.Actor):
+
+    process_isolated = True
+
+    @actors.Message
+    def ping(self, value: int):
+        self.actors().reply("pong", value, os.getpid())
+
+
+class IsolatedFailingActor(actors.Actor):
+
+    @actors.Message
+    def ping(self, value: int):
+        raise RuntimeError(f"expected_error_{value}")
+
+
+class IsolatedCrashingActor(actors.Actor):
+
+    @actors.Message
+    def ping(self, value: int):
+        os._exit(value)  # noqa
 
 
 class ActorSystemTest(unittest.TestCase):
@@ -158,6 +195,107 @@ class ActorSystemTest(unittest.TestCase):
         # System should have gone down cleanly, errors are caught where they occur
         self.assertEqual(0, system.shutdown_code())
 
+    def test_message_type_hints(self):
+
+        errors = []
+
+        class TargetActor(actors.Actor):
+
+            @actors.Message
+            def optional_value(self, value: tp.Optional[int] = None):
+                pass
+
+            @actors.Message
+            def union_value(self, value: tp.Union[int, str]):
+                pass
+
+            @actors.Message
+            def generic_value(self, value: tp.List[int]):
+                pass
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+
+                target_id = self.actors().spawn(TargetActor)
+
+                # These should all be accepted
+                self.actors().send(target_id, "optional_value", 1)
+                self.actors().send(target_id, "optional_value", value=None)
+                self.actors().send(target_id, "union_value", 1)
+                self.actors().send(target_id, "union_value", "1")
+                self.actors().send(target_id, "generic_value", [1])
+
+                try:
+                    self.actors().send(target_id, "optional_value", "wrong_type")
+                except Exception:  # noqa
+                    errors.append("optional_wrong_type")
+
+                try:
+                    self.actors().send(target_id, "union_value", 1.0)
+                except Exception:  # noqa
+                    errors.append("union_wrong_type")
+
+                try:
+                    self.actors().send(target_id, "generic_value", {})
+                except Exception:  # noqa
+                    errors.append("generic_wrong_type")
+
+                self.actors().stop()
+
+        root = TestActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["optional_wrong_type", "union_wrong_type", "generic_wrong_type"], errors)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_message_type_checks_disabled(self):
+
+        # With type checks turned off, the message signature is still checked but argument types are not
+
+        errors = []
+        results = []
+
+        class TargetActor(actors.Actor):
+
+            @actors.Message
+            def sample_message(self, value: int):
+                results.append(value)
+                self.actors().send_parent("done")
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+
+                target_id = self.actors().spawn(TargetActor)
+
+                try:
+                    self.actors().send(target_id, "unknown_message")
+                except Exception:  # noqa
+                    errors.append("unknown_message")
+
+                try:
+                    self.actors().send(target_id, "sample_message")
+                except Exception:  # noqa
+                    errors.append("missing_param")
+
+                self.actors().send(target_id, "sample_message", "wrong_param_type")
+
+            @actors.Message
+            def done(self):
+                self.actors().stop()
+
+        root = TestActor()
+        system = actors.ActorSystem(root, check_types=False)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["unknown_message", "missing_param"], errors)
+        self.assertEqual(["wrong_param_type"], results)
+        self.assertEqual(0, system.shutdown_code())
+
     def test_explicit_signals_not_allowed(self):
 
         # Actors cannot explicitly send signals (signals are system messages prefixed 'actor:')
@@ -720,3 +858,917 @@ class ActorSystemTest(unittest.TestCase):
 
         # Since the failure signal was handled, there should be a clean shutdown
         self.assertEqual(0, system.shutdown_code())
+
+    def test_spawn_and_stop_many_actors(self):
+
+        # Registry updates are constant time, so a large number of children should not slow down spawn / stop
+
+        n_children = 100000
+        results = {"started": 0, "stopped": 0}
+
+        class ChildActor(actors.Actor):
+
+            def on_start(self):
+                results["started"] += 1
+
+        class ParentActor(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.child_ids = []
+
+            def on_start(self):
+                for _ in range(n_children):
+                    self.child_ids.append(self.actors().spawn(ChildActor))
+                self.actors().send(self.actors().id, "stop_children")
+
+            @actors.Message
+            def stop_children(self):
+                for child_id in self.child_ids:
+                    self.actors().stop(child_id)
+
+            def on_signal(self, signal: actors.Signal):
+
+                if signal.message == actors.SignalNames.STOPPED:
+                    results["stopped"] += 1
+                    if results["stopped"] == n_children:
+                        self.actors().stop()
+
+                return True
+
+        root = ParentActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(n_children, results["started"])
+        self.assertEqual(n_children, results["stopped"])
+        self.assertEqual(0, system.shutdown_code())
+
+        self.assertEqual(n_children, len(set(root.child_ids)))
+        self.assertIsNone(system._lookup_actor_node(root.child_ids[0]))  # noqa
+        self.assertIsNone(system._lookup_actor_node(root.child_ids[-1]))  # noqa
+
+    def test_metrics(self):
+
+        class ChildActor(actors.Actor):
+
+            @actors.Message
+            def ping(self):
+                self.actors().send_parent("pong")
+
+        class ParentActor(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.pong_count = 0
+
+            def on_start(self):
+                for _ in range(2):
+                    child_id = self.actors().spawn(ChildActor)
+                    for _ in range(5):
+                        self.actors().send(child_id, "ping")
+                self.actors().send("/nonexistent/actor", "ping")
+
+            @actors.Message
+            def pong(self):
+                self.pong_count += 1
+                if self.pong_count == 10:
+                    self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, dump_metrics=True)
+        system.start()
+        system.wait_for_shutdown()
+
+        metrics = system.metrics()
+
+        self.assertEqual(0, system.shutdown_code())
+        self.assertEqual(3, metrics.actors_spawned)
+        self.assertEqual(3, metrics.actors_stopped)
+        self.assertEqual(0, metrics.actors_failed)
+        self.assertEqual(1, metrics.dropped_not_found)
+        self.assertEqual(0, metrics.dropped_not_running)
+
+        self.assertEqual(10, metrics.handler_time[("ChildActor", "ping")].count)
+        self.assertEqual(10, metrics.handler_time[("ParentActor", "pong")].count)
+        self.assertEqual(1, metrics.handler_time[("ParentActor", actors.SignalNames.START)].count)
+
+        self.assertGreaterEqual(metrics.messages_posted, metrics.messages_dispatched)
+        self.assertGreaterEqual(metrics.messages_dispatched, metrics.dispatch_latency.count)
+        self.assertGreaterEqual(metrics.queue_depth_peak, 10)
+        self.assertTrue(len(metrics.queue_depth_samples) > 0)
+
+    def test_metrics_async(self):
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+                self.actors().send(self.actors().id, "sample_message")
+
+            @actors.Message
+            async def sample_message(self):
+                await asyncio.sleep(0.01)
+                self.actors().stop()
+
+        root = TestActor()
+        system = actors.AsyncActorSystem(root, collect_metrics=True)
+        system.start()
+        system.wait_for_shutdown()
+
+        handler_time = system.metrics().handler_time[("TestActor", "sample_message")]
+
+        self.assertEqual(0, system.shutdown_code())
+        self.assertEqual(1, handler_time.count)
+        self.assertGreaterEqual(handler_time.total, 0.01)
+
+    def test_metrics_disabled(self):
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+                self.actors().send(self.actors().id, "sample_message")
+
+            @actors.Message
+            def sample_message(self):
+                self.actors().stop()
+
+        # Metrics are only collected if they are turned on
+
+        root = TestActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(0, system.shutdown_code())
+        self.assertRaises(RuntimeError, system.metrics)
+
+    def test_stop_after_queued_messages(self):
+
+        # A normal stop waits for messages that are already queued
+
+        for dispatch_threads in [1, 4]:
+
+            results = []
+            parent_done = threading.Event()
+
+            class ChildActor(actors.Actor):
+
+                def on_start(self):
+                    # With multiple threads, hold the child until everything is queued
+                    parent_done.wait()
+
+                def on_stop(self):
+                    results.append("child_stop")
+
+                @actors.Message
+                def sample_message(self, value):
+                    results.append(value)
+
+            class ParentActor(actors.Actor):
+
+                def on_start(self):
+                    child_id = self.actors().spawn(ChildActor)
+                    for i in range(1000):
+                        self.actors().send(child_id, "sample_message", i)
+                    self.actors().stop(child_id)
+                    parent_done.set()
+
+                def on_signal(self, signal: actors.Signal):
+                    if signal.message == actors.SignalNames.STOPPED:
+                        self.actors().stop()
+                    return True
+
+            root = ParentActor()
+            system = actors.ActorSystem(root, dispatch_threads=dispatch_threads)
+            system.start()
+            system.wait_for_shutdown()
+
+            self.assertEqual(list(range(1000)) + ["child_stop"], results)
+            self.assertEqual(0, system.shutdown_code())
+
+    def test_failure_overtakes_messages(self):
+
+        # When an actor fails, it is stopped ahead of any messages that are already queued
+        # Those messages are dropped because the actor is gone, not delivered to the failed actor first
+
+        for dispatch_threads in [1, 4]:
+
+            results = []
+            parent_done = threading.Event()
+
+            class ChildActor(actors.Actor):
+
+                def on_start(self):
+                    parent_done.wait()
+
+                def on_stop(self):
+                    results.append("child_stop")
+
+                @actors.Message
+                def sample_message(self, value):
+                    results.append(value)
+                    raise RuntimeError("expected error")
+
+            class ParentActor(actors.Actor):
+
+                def on_start(self):
+                    child_id = self.actors().spawn(ChildActor)
+                    for i in range(1000):
+                        self.actors().send(child_id, "sample_message", i)
+                    parent_done.set()
+
+                def on_signal(self, signal: actors.Signal):
+                    if signal.message == actors.SignalNames.FAILED:
+                        results.append(signal.message)
+                        self.actors().stop()
+                    return True
+
+            root = ParentActor()
+            system = actors.ActorSystem(root, dispatch_threads=dispatch_threads, collect_metrics=True)
+            system.start()
+            system.wait_for_shutdown()
+
+            self.assertEqual([0, "child_stop", actors.SignalNames.FAILED], results)
+            self.assertEqual(0, system.metrics().dropped_not_running)
+            self.assertEqual(0, system.shutdown_code())
+
+    def test_spawn_then_fail(self):
+
+        # An urgent stop does not overtake the START for a child that was only just spawned
+        # The child starts and stops normally, only the actor that failed is reported as failed
+
+        for dispatch_threads in [1, 4]:
+
+            results = []
+
+            class ChildActor(actors.Actor):
+
+                def on_start(self):
+                    results.append("child_start")
+
+                def on_stop(self):
+                    results.append("child_stop")
+
+            class TestActor(actors.Actor):
+
+                def on_start(self):
+                    self.actors().send(self.actors().id, "sample_message")
+
+                @actors.Message
+                def sample_message(self):
+                    self.actors().spawn(ChildActor)
+                    self.actors().fail(RuntimeError("expected error"))
+
+                def on_signal(self, signal: actors.Signal):
+                    if signal.message == actors.SignalNames.FAILED:
+                        results.append(signal.message)
+
+            root = TestActor()
+            system = actors.ActorSystem(root, dispatch_threads=dispatch_threads)
+            system.start()
+            system.wait_for_shutdown()
+
+            self.assertEqual(["child_start", "child_stop"], results)
+            self.assertEqual("expected error", str(system.shutdown_error()))
+
+    def test_send_after(self):
+
+        system_types = [
+            lambda root: actors.ActorSystem(root),
+            lambda root: actors.ActorSystem(root, dispatch_threads=4),
+            lambda root: actors.AsyncActorSystem(root)]
+
+        for new_system in system_types:
+
+            results = []
+
+            class TestActor(actors.Actor):
+
+                def __init__(self):
+                    super().__init__()
+                    self.start_time = None
+
+                def on_start(self):
+                    self.start_time = time.monotonic()
+                    self.actors().send_after(0.05, self.actors().id, "sample_message", "later")
+                    self.actors().send(self.actors().id, "sample_message", "now")
+
+                @actors.Message
+                def sample_message(self, value: str):
+                    results.append(value)
+                    if value == "later":
+                        results.append(time.monotonic() - self.start_time)
+                        self.actors().stop()
+
+            root = TestActor()
+            system = new_system(root)
+            system.start()
+            system.wait_for_shutdown()
+
+            self.assertEqual(["now", "later"], results[:2])
+            self.assertGreaterEqual(results[2], 0.05)
+            self.assertEqual(0, system.shutdown_code())
+
+    def test_send_after_bad_params(self):
+
+        errors = []
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+
+                for args in [(-1, "sample_message", 1), (0.01, "sample_message"), (0.01, "unknown_message")]:
+                    try:
+                        self.actors().send_after(args[0], self.actors().id, *args[1:])
+                    except RuntimeError as e:
+                        errors.append(e)
+
+                self.actors().stop()
+
+            @actors.Message
+            def sample_message(self, value):
+                pass
+
+        root = TestActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(3, len(errors))
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_schedule_repeating(self):
+
+        for dispatch_threads in [1, 4]:
+
+            results = []
+
+            class TestActor(actors.Actor):
+
+                def __init__(self):
+                    super().__init__()
+                    self.timer_id = None
+
+                def on_start(self):
+                    self.timer_id = self.actors().schedule_repeating(0.01, self.actors().id, "tick")
+
+                @actors.Message
+                def tick(self):
+                    results.append("tick")
+                    if len(results) == 5:
+                        self.actors().cancel_timer(self.timer_id)
+                        self.actors().send_after(0.05, self.actors().id, "done")
+
+                @actors.Message
+                def done(self):
+                    self.actors().stop()
+
+            root = TestActor()
+            system = actors.ActorSystem(root, dispatch_threads=dispatch_threads)
+            system.start()
+            system.wait_for_shutdown()
+
+            # No more ticks after the timer is cancelled
+            self.assertEqual(["tick"] * 5, results)
+            self.assertEqual(0, system.shutdown_code())
+
+    def test_timer_removed_with_actor(self):
+
+        results = []
+
+        class ChildActor(actors.Actor):
+
+            def on_start(self):
+                self.actors().schedule_repeating(0.01, self.actors().parent, "tick")
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+                self.actors().spawn(ChildActor)
+                self.actors().send_after(0.1, self.actors().id, "done")
+
+            @actors.Message
+            def tick(self):
+                results.append("tick")
+                if len(results) == 3:
+                    self.actors().stop(self.actors().sender)
+
+            @actors.Message
+            def done(self):
+                self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        # The child's timer stops firing once the child is stopped
+        self.assertEqual(["tick"] * 3, results)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_process_isolated_actor(self):
+
+        results = []
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+                self.actors().send(self.actors().spawn_isolated(IsolatedEchoActor), "ping", 1)
+                self.actors().send(self.actors().spawn(IsolatedClassActor), "ping", 2)
+
+            @actors.Message
+            def pong(self, value: int, pid: int):
+                results.append((value, pid, self.actors().sender))
+                if len(results) == 2:
+                    self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(0, system.shutdown_code())
+        self.assertEqual([1, 2], sorted(r[0] for r in results))
+
+        # Each actor ran in its own process, replies come from the actor IDs of the real actor classes
+        pids = set(r[1] for r in results)
+        self.assertEqual(2, len(pids))
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual(
+            ["/parentactor/isolatedclassactor-1", "/parentactor/isolatedechoactor-0"],
+            sorted(r[2] for r in results))
+
+    def test_process_isolated_failure(self):
+
+        for child_class in [IsolatedFailingActor, IsolatedCrashingActor]:
+
+            results = []
+
+            class ParentActor(actors.Actor):
+
+                def __init__(self):
+                    super().__init__()
+                    self.child_id = None
+
+                def on_start(self):
+                    self.child_id = self.actors().spawn_isolated(child_class)
+                    self.actors().send(self.child_id, "ping", 3)
+
+                def on_signal(self, signal: actors.Signal):
+
+                    if signal.sender == self.child_id:
+                        results.append(signal.message)
+                        results.append(str(signal.error))
+
+                    self.actors().stop()
+                    return True
+
+            root = ParentActor()
+            system = actors.ActorSystem(root)
+            system.start()
+            system.wait_for_shutdown()
+
+            # Handled errors and crashes in the worker process both show up as a failure in the parent
+            self.assertEqual(actors.SignalNames.FAILED, results[0])
+            self.assertIn("3", results[1])
+            self.assertEqual(0, system.shutdown_code())
+
+    def test_mailbox_reject(self):
+
+        results = []
+        errors = []
+        depth = []
+
+        class ChildActor(actors.Actor):
+
+            mailbox_size = 5
+
+            @actors.Message
+            def sample_message(self, value: int):
+                results.append(value)
+                self.actors().send_parent("done")
+
+        class ParentActor(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.done_count = 0
+
+            def on_start(self):
+
+                child_id = self.actors().spawn(ChildActor)
+
+                for i in range(10):
+                    try:
+                        self.actors().send(child_id, "sample_message", i)
+                    except RuntimeError as e:
+                        errors.append(e)
+
+                depth.append(system.metrics().mailbox_depth.get(child_id))
+
+            @actors.Message
+            def done(self):
+                self.done_count += 1
+                if self.done_count == 5:
+                    self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, collect_metrics=True)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual([0, 1, 2, 3, 4], results)
+        self.assertEqual(5, len(errors))
+        self.assertEqual([5], depth)
+        self.assertEqual(5, system.metrics().messages_rejected)
+        self.assertEqual({}, system.metrics().mailbox_depth)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_mailbox_coalesce(self):
+
+        results = []
+        errors = []
+
+        class ChildActor(actors.Actor):
+
+            mailbox_size = 1
+            mailbox_overflow = actors.OverflowPolicy.COALESCE
+
+            @actors.Message
+            def sample_message(self, value: str):
+                results.append(value)
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+
+                child_id = self.actors().spawn(ChildActor)
+
+                for value in ["a", "a", "a", "a", "b"]:
+                    try:
+                        self.actors().send(child_id, "sample_message", value)
+                    except RuntimeError as e:
+                        errors.append(e)
+
+                self.actors().send(self.actors().id, "finish")
+
+            @actors.Message
+            def finish(self):
+                self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, collect_metrics=True)
+        system.start()
+        system.wait_for_shutdown()
+
+        # Duplicates are coalesced, a different message is still rejected when the mailbox is full
+        self.assertEqual(["a"], results)
+        self.assertEqual(1, len(errors))
+        self.assertEqual(3, system.metrics().messages_coalesced)
+        self.assertEqual(1, system.metrics().messages_rejected)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_system_queue_block(self):
+
+        results = []
+
+        class TestActor(actors.Actor):
+
+            @actors.Message
+            def sample_message(self, value: int):
+                time.sleep(0.001)
+                results.append(value)
+                if len(results) == 50:
+                    self.actors().stop()
+
+        root = TestActor()
+        system = actors.ActorSystem(
+            root, collect_metrics=True,
+            max_queue_size=5, queue_overflow=actors.OverflowPolicy.BLOCK)
+        system.start(wait=True)
+
+        # External senders wait for space in the queue, nothing is lost
+        for i in range(50):
+            system.send("sample_message", i)
+
+        system.wait_for_shutdown()
+
+        self.assertEqual(list(range(50)), results)
+        self.assertGreater(system.metrics().senders_blocked, 0)
+        self.assertEqual(0, system.metrics().messages_rejected)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_thread_pool_concurrency(self):
+
+        # With a thread pool dispatcher, different actors can process messages at the same time
+        # Both children must be inside their handler at once to get past the barrier
+
+        results = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        class ChildActor(actors.Actor):
+
+            @actors.Message
+            def do_work(self):
+                barrier.wait()
+                self.actors().send_parent("work_done")
+
+        class ParentActor(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.done_count = 0
+
+            def on_start(self):
+                child_1 = self.actors().spawn(ChildActor)
+                child_2 = self.actors().spawn(ChildActor)
+                self.actors().send(child_1, "do_work")
+                self.actors().send(child_2, "do_work")
+
+            @actors.Message
+            def work_done(self):
+                results.append("work_done")
+                self.done_count += 1
+                if self.done_count == 2:
+                    self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, dispatch_threads=4)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["work_done", "work_done"], results)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_thread_pool_message_order(self):
+
+        # Each actor still processes one message at a time, in the order the messages were sent
+
+        results = []
+        active = []
+
+        class ChildActor(actors.Actor):
+
+            @actors.Message
+            def item(self, index: int):
+
+                active.append(index)
+                if len(active) > 1:
+                    results.append("overlap")
+
+                results.append(index)
+                active.remove(index)
+
+                if index == 99:
+                    self.actors().send_parent("all_done")
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+                child_id = self.actors().spawn(ChildActor)
+                for index in range(100):
+                    self.actors().send(child_id, "item", index)
+
+            @actors.Message
+            def all_done(self):
+                self.actors().stop()
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, dispatch_threads=4)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(list(range(100)), results)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_thread_pool_shutdown_order(self):
+
+        # Children still stop before their parents when the dispatcher is multi-threaded
+
+        results = []
+
+        class Grandchild(actors.Actor):
+
+            def on_start(self):
+                self.actors().send_parent("grandchild_started")
+
+            def on_stop(self):
+                results.append("grandchild_stop")
+
+        class Child(actors.Actor):
+
+            def on_start(self):
+                self.actors().spawn(Grandchild)
+
+            def on_stop(self):
+                results.append("child_stop")
+
+            @actors.Message
+            def grandchild_started(self):
+                self.actors().send_parent("child_ready")
+
+        class Parent(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.ready_count = 0
+
+            def on_start(self):
+                for _ in range(3):
+                    self.actors().spawn(Child)
+
+            def on_stop(self):
+                results.append("parent_stop")
+
+            @actors.Message
+            def child_ready(self):
+                self.ready_count += 1
+                if self.ready_count == 3:
+                    self.actors().stop()
+
+        root = Parent()
+        system = actors.ActorSystem(root, dispatch_threads=4)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(7, len(results))
+        self.assertEqual("parent_stop", results[-1])
+
+        # Each child stops after its own grandchild, so at no point can there be more child stops than grandchild stops
+        for i in range(len(results)):
+            stops_so_far = results[:i + 1]
+            self.assertLessEqual(stops_so_far.count("child_stop"), stops_so_far.count("grandchild_stop"))
+
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_thread_pool_child_failure(self):
+
+        # Errors propagate the same way with a multi-threaded dispatcher
+
+        results = []
+
+        class ChildActor(actors.Actor):
+
+            def on_stop(self):
+                results.append("child_stop")
+
+            @actors.Message
+            def sample_message(self, value):
+                raise RuntimeError("err_code_1")
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+                child_id = self.actors().spawn(ChildActor)
+                self.actors().send(child_id, "sample_message", 1)
+
+            def on_stop(self):
+                results.append("parent_stop")
+
+        root = ParentActor()
+        system = actors.ActorSystem(root, dispatch_threads=4)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["child_stop", "parent_stop"], results)
+
+        code = system.shutdown_code()
+        error = system.shutdown_error()
+        self.assertNotEqual(0, code)
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual("err_code_1", error.args[0])
+
+    def test_async_lifecycle(self):
+
+        # Regular actors work the same way on the asyncio actor system
+
+        results = []
+
+        class TestActor(actors.Actor):
+
+            def on_start(self):
+                results.append("on_start")
+
+            def on_stop(self):
+                results.append("on_stop")
+
+            @actors.Message
+            def sample_message(self, value):
+                results.append("sample_message")
+                results.append(value)
+                self.actors().stop()
+
+        root = TestActor()
+        system = actors.AsyncActorSystem(root)
+        system.start()
+        system.send("sample_message", 1)
+        system.wait_for_shutdown()
+
+        self.assertEqual(["on_start", "sample_message", 1, "on_stop"], results)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_async_handlers(self):
+
+        # While one actor is waiting in a coroutine handler, other actors can still process messages
+        # The waiting child can only finish once its sibling has handled a message
+
+        results = []
+        sibling_done: tp.List[asyncio.Event] = []
+
+        class WaitingChild(actors.Actor):
+
+            @actors.Message
+            async def wait_for_sibling(self):
+                results.append("waiting")
+                await sibling_done[0].wait()
+                results.append("wait_complete")
+                self.actors().send_parent("child_done")
+
+        class OtherChild(actors.Actor):
+
+            @actors.Message
+            def do_work(self):
+                results.append("do_work")
+                sibling_done[0].set()
+
+        class ParentActor(actors.Actor):
+
+            def __init__(self):
+                super().__init__()
+                self.done_count = 0
+
+            def on_start(self):
+                sibling_done.append(asyncio.Event())
+                waiting_id = self.actors().spawn(WaitingChild)
+                other_id = self.actors().spawn(OtherChild)
+                self.actors().send(waiting_id, "wait_for_sibling")
+                self.actors().send(other_id, "do_work")
+
+            @actors.Message
+            def child_done(self):
+                self.actors().stop()
+
+        root = ParentActor()
+        system = actors.AsyncActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["waiting", "do_work", "wait_complete"], results)
+        self.assertEqual(0, system.shutdown_code())
+
+    def test_async_handler_failure(self):
+
+        # Errors raised after an await propagate like any other actor error
+
+        results = []
+
+        class ChildActor(actors.Actor):
+
+            def on_stop(self):
+                results.append("child_stop")
+
+            @actors.Message
+            async def sample_message(self):
+                await asyncio.sleep(0)
+                raise RuntimeError("err_code_1")
+
+        class ParentActor(actors.Actor):
+
+            def on_start(self):
+                child_id = self.actors().spawn(ChildActor)
+                self.actors().send(child_id, "sample_message")
+
+            def on_stop(self):
+                results.append("parent_stop")
+
+        root = ParentActor()
+        system = actors.AsyncActorSystem(root)
+        system.start()
+        system.wait_for_shutdown()
+
+        self.assertEqual(["child_stop", "parent_stop"], results)
+
+        error = system.shutdown_error()
+        self.assertNotEqual(0, system.shutdown_code())
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual("err_code_1", error.args[0])
+
+    def test_async_handler_needs_async_system(self):
+
+        # Coroutine handlers are an error on the regular, thread based actor system
+
+        class TestActor(actors.Actor):
+
+            @actors.Message
+            async def sample_message(self):
+                pass
+
+        root = TestActor()
+        system = actors.ActorSystem(root)
+        system.start()
+        system.send("sample_message")
+        system.wait_for_shutdown()
+
+        self.assertNotEqual(0, system.shutdown_code())
+        self.assertIsInstance(system.shutdown_error(), RuntimeError)
@@ -0,0 +1,1297 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import dataclasses as dc
+import gc
+import re
+import tempfile
+import threading
+import time
+import typing as tp
+import unittest
+import weakref
+
+import pandas as pd
+
+import trac.rt.api as api
+import trac.rt.config as config
+import trac.rt.metadata as meta
+import trac.rt.impl.util as util
+import trac.rt.impl.data as data
+import trac.rt.impl.repositories as repos
+import trac.rt.impl.storage as storage
+import trac.rt.impl.checkpoint as checkpoint
+import trac.rt.exec.actors as actors
+import trac.rt.exec.engine as engine
+import trac.rt.exec.graph as graph
+import trac.rt.exec.graph_builder as graph_builder
+import trac.rt.exec.functions as functions
+import trac.rt.exec.dev_mode as dev_mode
+
+
+@dc.dataclass(frozen=True)
+class SampleNode(graph.Node):
+
+    deps: dc.InitVar[tp.Dict[graph.NodeId, graph.DependencyType]] = None
+
+    def __post_init__(self, deps):
+        object.__setattr__(self, 'dependencies', deps or {})
+
+
+class LockResultFunc(functions.NodeFunction):
+
+    # Node function that can be sent to a worker process, but its result cannot be sent back
+
+    def __call__(self, ctx: functions.NodeContext) -> functions.NodeResult:
+        return threading.Lock()
+
+
+class GraphHarness(actors.Actor):
+
+    def __init__(
+            self, graph_ctx: engine.GraphContext, executor: engine.NodeExecutor,
+            release_results: bool, cost_model: tp.Optional[engine.NodeCostModel],
+            budget: tp.Optional[engine.ResourceBudget],
+            job_checkpoint: tp.Optional[checkpoint.JobCheckpoint]):
+
+        super().__init__()
+        self.graph_ctx = graph_ctx
+        self.executor = executor
+        self.release_results = release_results
+        self.cost_model = cost_model
+        self.budget = budget
+        self.job_checkpoint = job_checkpoint
+        self.result = None
+
+    def on_start(self):
+        self.actors().spawn(
+            engine.GraphProcessor, self.graph_ctx, self.executor,
+            self.release_results, self.cost_model, self.budget, self.job_checkpoint)
+
+    @actors.Message
+    def job_succeeded(self):
+        self.result = True
+        self.actors().stop()
+
+    @actors.Message
+    def job_failed(self, error: Exception):
+        self.result = error
+        self.actors().stop()
+
+
+class FixedCostModel(engine.NodeCostModel):
+
+    def __init__(self, costs: tp.Dict[str, float] = None, memory: tp.Dict[str, int] = None):
+        super().__init__()
+        self.costs = costs or {}
+        self.memory = memory or {}
+
+    def estimate(self, node: engine.GraphContextNode) -> float:
+        return self.costs.get(node.node.id.name, 0.0)
+
+    def estimate_memory(self, node: engine.GraphContextNode) -> int:
+        return self.memory.get(node.node.id.name, 0)
+
+
+class GraphProcessorTest(unittest.TestCase):
+
+    NAMESPACE = graph.NodeNamespace("test")
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        util.configure_logging()
+
+    def setUp(self) -> None:
+        self.executed = []
+        self.nodes: tp.Dict[graph.NodeId, engine.GraphContextNode] = dict()
+
+    def node_id(self, name: str) -> graph.NodeId:
+        return graph.NodeId(name, self.NAMESPACE)
+
+    def add_node(
+            self, name: str, deps: tp.List[str] = None, tolerant: tp.List[str] = None,
+            fail: bool = False, result: tp.Any = None):
+
+        node_deps = {self.node_id(d): graph.DependencyType.HARD for d in deps or []}
+        node_deps.update({self.node_id(d): graph.DependencyType.TOLERANT for d in tolerant or []})
+
+        def node_func(_):
+            self.executed.append(name)
+            if fail:
+                raise RuntimeError(f"{name} failed")
+            return result if result is not None else name
+
+        node_id = self.node_id(name)
+        node = SampleNode(node_id, node_deps)
+        self.nodes[node_id] = engine.GraphContextNode(node, {}, node_func)
+
+    def run_graph(
+            self, executor: engine.NodeExecutor = None, release_results: bool = True,
+            cost_model: engine.NodeCostModel = None, budget: engine.ResourceBudget = None,
+            job_checkpoint: checkpoint.JobCheckpoint = None):
+
+        graph_ctx = engine.GraphContext(dict(self.nodes), pending_nodes=set(self.nodes.keys()))
+        self.graph_ctx = graph_ctx
+
+        if executor is None:
+            executor = engine.InlineExecutor()
+
+        root = GraphHarness(graph_ctx, executor, release_results, cost_model, budget, job_checkpoint)
+        system = actors.ActorSystem(root, collect_metrics=True)
+        system.start()
+        system.wait_for_shutdown()
+        executor.shutdown()
+
+        self.assertEqual(0, system.shutdown_code())
+        self.metrics = system.metrics()
+
+        return root.result
+
+    def test_dependency_order(self):
+
+        self.add_node("d", ["b", "c"])
+        self.add_node("b", ["a"])
+        self.add_node("c", ["a"])
+        self.add_node("a")
+
+        result = self.run_graph()
+
+        self.assertIs(True, result)
+        self.assertEqual(4, len(self.executed))
+        self.assertEqual("a", self.executed[0])
+        self.assertEqual("d", self.executed[-1])
+
+    def test_upstream_failure(self):
+
+        self.add_node("a", fail=True)
+        self.add_node("b", ["a"])
+        self.add_node("c", ["b"])
+        self.add_node("d", tolerant=["a"])
+        self.add_node("e")
+
+        result = self.run_graph()
+
+        # Hard dependents of the failed node are skipped, tolerant dependents still run
+        self.assertIsInstance(result, RuntimeError)
+        self.assertEqual("a failed", str(result))
+        self.assertEqual(["a", "d", "e"], sorted(self.executed))
+
+    def test_missing_dependency(self):
+
+        self.add_node("a")
+        self.add_node("b", ["a", "missing"])
+
+        result = self.run_graph()
+
+        self.assertIsInstance(result, RuntimeError)
+        self.assertEqual(["a"], self.executed)
+
+    def test_large_graph(self):
+
+        # Wide fan-out and fan-in, scheduling should not rescan the whole graph after each node
+
+        n_nodes = 2000
+
+        self.add_node("root")
+
+        for i in range(n_nodes):
+            self.add_node(f"node_{i}", ["root"])
+
+        self.add_node("final", [f"node_{i}" for i in range(n_nodes)])
+
+        result = self.run_graph()
+
+        self.assertIs(True, result)
+        self.assertEqual(n_nodes + 2, len(self.executed))
+        self.assertEqual("final", self.executed[-1])
+
+    def test_thread_executor(self):
+
+        # Nodes "b" and "c" can only both finish if they run at the same time, off the engine thread
+
+        barrier = threading.Barrier(2, timeout=5)
+
+        self.add_node("a")
+        self.add_node("b", ["a"])
+        self.add_node("c", ["a"])
+        self.add_node("d", ["b", "c"])
+
+        for name in ["b", "c"]:
+            node_id = self.node_id(name)
+            node = self.nodes[node_id]
+            self.nodes[node_id] = engine.GraphContextNode(node.node, {}, self._wait_at(barrier, node.function))
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=2))
+
+        self.assertIs(True, result)
+        self.assertEqual(["a", "b", "c", "d"], sorted(self.executed))
+        self.assertEqual("d", self.executed[-1])
+
+    def test_thread_executor_failure(self):
+
+        self.add_node("a")
+        self.add_node("b", ["a"], fail=True)
+        self.add_node("c", ["b"])
+
+        result = self.run_graph(engine.ThreadPoolExecutor())
+
+        self.assertIsInstance(result, RuntimeError)
+        self.assertEqual("b failed", str(result))
+        self.assertEqual(["a", "b"], self.executed)
+
+    def test_process_executor_fallback(self):
+
+        # Test node functions are closures and cannot be pickled, they should still run on the fallback threads
+
+        self.add_node("a")
+        self.add_node("b", ["a"])
+
+        result = self.run_graph(engine.ProcessPoolExecutor(max_workers=1))
+
+        self.assertIs(True, result)
+        self.assertEqual(["a", "b"], self.executed)
+
+    def test_process_executor_inputs_fallback(self):
+
+        # The node function can be pickled but its input cannot, the pool fails to send the call
+        # The node should still run on the fallback threads, with the original inputs
+
+        a_id = self.node_id("a")
+        b_id = self.node_id("b")
+        a_result = threading.Lock()
+
+        ctx = {a_id: engine.GraphContextNode(SampleNode(a_id, {}), {}, result=a_result)}
+        function = functions.IdentityFunc(graph.IdentityNode(b_id, a_id))
+
+        executor = engine.ProcessPoolExecutor(max_workers=1)
+        done = threading.Event()
+        results = []
+
+        def callback(result, error):
+            results.append((result, error))
+            done.set()
+
+        try:
+            executor.submit(function, ctx, callback)
+            self.assertTrue(done.wait(30))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual([(a_result, None)], results)
+
+    def test_process_executor_result_not_sent(self):
+
+        # The call is sent and the function runs in the worker, but its result cannot be sent back
+        # The node should fail, it must not run a second time on the fallback threads
+
+        executor = engine.ProcessPoolExecutor(max_workers=1)
+        done = threading.Event()
+        results = []
+
+        def callback(result, error):
+            results.append((result, error))
+            done.set()
+
+        try:
+            executor.submit(LockResultFunc(), {}, callback)
+            self.assertTrue(done.wait(30))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(1, len(results))
+        self.assertIsNone(results[0][0])
+        self.assertIsInstance(results[0][1], RuntimeError)
+        self.assertIn("cannot be sent back", str(results[0][1]))
+
+    def test_mapping_nodes_inline(self):
+
+        # Mapping and no-op nodes are evaluated by the graph processor, only "a" and "d" need node processors
+
+        self.add_node("a")
+
+        b_id = self.node_id("b")
+        b_node = graph.IdentityNode(b_id, self.node_id("a"))
+        self.nodes[b_id] = engine.GraphContextNode(b_node, {}, functions.IdentityFunc(b_node))
+
+        c_id = self.node_id("c")
+        c_node = graph.IdentityNode(c_id, b_id)
+        self.nodes[c_id] = engine.GraphContextNode(c_node, {}, functions.IdentityFunc(c_node))
+
+        self.add_node("d", ["c"])
+
+        e_id = self.node_id("e")
+        e_node = SampleNode(e_id, {self.node_id("d"): graph.DependencyType.HARD})
+        self.nodes[e_id] = engine.GraphContextNode(e_node, {}, functions.NoopNode())
+
+        result = self.run_graph()
+
+        self.assertIs(True, result)
+        self.assertEqual(["a", "d"], self.executed)
+        self.assertEqual("a", self.nodes[c_id].result)
+
+        # Harness, graph processor and one node processor each for "a" and "d"
+        self.assertEqual(4, self.metrics.actors_spawned)
+
+    def test_mapping_node_failure(self):
+
+        # Node "a" returns a string, so looking up a keyed item in its result fails
+
+        self.add_node("a")
+
+        b_id = self.node_id("b")
+        b_node = graph.KeyedItemNode(b_id, self.node_id("a"), "x")
+        self.nodes[b_id] = engine.GraphContextNode(b_node, {}, functions.KeyedItemFunc(b_node))
+
+        self.add_node("c", ["b"])
+        self.add_node("d", tolerant=["b"])
+
+        result = self.run_graph()
+
+        self.assertIsInstance(result, AttributeError)
+        self.assertEqual(["a", "d"], self.executed)
+
+    def test_release_results(self):
+
+        self.add_node("a")
+        self.add_node("b", ["a"])
+        self.add_node("c", ["a", "b"])
+        self.add_node("d", tolerant=["c"])
+
+        result = self.run_graph()
+
+        self.assertIs(True, result)
+
+        # Results are released once all their consumers are complete, terminal nodes keep their results
+        self.assertIsNone(self.graph_ctx.nodes[self.node_id("a")].result)
+        self.assertIsNone(self.graph_ctx.nodes[self.node_id("b")].result)
+        self.assertIsNone(self.graph_ctx.nodes[self.node_id("c")].result)
+        self.assertEqual("d", self.graph_ctx.nodes[self.node_id("d")].result)
+
+    def test_released_results_collected(self):
+
+        # Released results must not be held anywhere else, e.g. by the node processors that produced them
+
+        class SampleResult:
+            pass
+
+        result_refs = dict()
+        collected = []
+
+        def make_result(name):
+            def node_func(_):
+                result = SampleResult()
+                result_refs[name] = weakref.ref(result)
+                return result
+            return node_func
+
+        def check_collected(_):
+            # The test still holds the nodes it built, only the graph processor should see the results
+            self.nodes.clear()
+            gc.collect()
+            collected.extend(sorted(name for name, ref in result_refs.items() if ref() is None))
+            return "c"
+
+        self.add_node("a")
+        self.add_node("b", ["a"])
+        self.add_node("c", ["b"])
+
+        self.nodes[self.node_id("a")].function = make_result("a")
+        self.nodes[self.node_id("b")].function = make_result("b")
+        self.nodes[self.node_id("c")].function = check_collected
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=2))
+
+        # When "c" runs, "a" is released and "b" is still needed
+        self.assertIs(True, result)
+        self.assertEqual(["a"], collected)
+
+    def test_release_results_disabled(self):
+
+        self.add_node("a")
+        self.add_node("b", ["a"])
+
+        result = self.run_graph(release_results=False)
+
+        self.assertIs(True, result)
+        self.assertEqual("a", self.graph_ctx.nodes[self.node_id("a")].result)
+        self.assertEqual("b", self.graph_ctx.nodes[self.node_id("b")].result)
+
+    def test_release_after_failure(self):
+
+        # Node "c" is skipped because "b" fails, "a" and "b" run at the same time so either can finish first
+        # The result of "a" should be released, whether it arrives before or after "c" is skipped
+
+        barrier = threading.Barrier(2, timeout=5)
+
+        self.add_node("a")
+        self.add_node("b", fail=True)
+        self.add_node("c", ["a", "b"])
+
+        a_id = self.node_id("a")
+        a_node = self.nodes[a_id]
+        self.nodes[a_id] = engine.GraphContextNode(a_node.node, {}, self._wait_at(barrier, a_node.function))
+
+        b_id = self.node_id("b")
+        b_node = self.nodes[b_id]
+        self.nodes[b_id] = engine.GraphContextNode(b_node.node, {}, self._wait_at(barrier, b_node.function))
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=2))
+
+        self.assertIsInstance(result, RuntimeError)
+        self.assertIsNone(self.graph_ctx.nodes[a_id].result)
+
+    def test_result_memory_report(self):
+
+        # Chain of three nodes, each producing a new frame, only two frames should be held at any time
+
+        def data_item():
+            return data.DataItem(pandas=pd.DataFrame({"x": range(100000)}))
+
+        self.add_node("a", result=data_item())
+        self.add_node("b", ["a"], result=data_item())
+        self.add_node("c", ["b"], result=data_item())
+
+        with self.assertLogs("trac.rt.exec.engine.GraphProcessor", "INFO") as logs:
+            result = self.run_graph()
+
+        self.assertIs(True, result)
+
+        report = next(filter(lambda msg: "Result memory" in msg, logs.output))
+        match = re.search(r"peak = ([\d.]+) MB, without release = ([\d.]+) MB, released 2 of 3", report)
+
+        self.assertIsNotNone(match)
+        self.assertAlmostEqual(float(match.group(1)) * 3, float(match.group(2)) * 2, delta=0.2)
+
+    def test_critical_path_first(self):
+
+        # With one worker, the node at the start of the longest chain should run first
+
+        for i in range(5):
+            self.add_node(f"short_{i}")
+
+        self.add_node("chain_0")
+        self.add_node("chain_1", ["chain_0"])
+        self.add_node("chain_2", ["chain_1"])
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=1))
+
+        self.assertIs(True, result)
+        self.assertEqual("chain_0", self.executed[0])
+
+    def test_cost_weighted_priority(self):
+
+        # Node "b" has the longest chain, but "a" is the most expensive path
+
+        self.add_node("a")
+        self.add_node("a_final", ["a"])
+        self.add_node("b")
+        self.add_node("b_1", ["b"])
+        self.add_node("b_2", ["b_1"])
+
+        cost_model = FixedCostModel({"a": 10.0, "b": 1.0, "b_1": 1.0, "b_2": 1.0})
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=1), cost_model=cost_model)
+
+        # Once "a" is complete, the "b" chain is the longest remaining path
+        self.assertIs(True, result)
+        self.assertEqual(["a", "b", "b_1", "b_2", "a_final"], self.executed)
+
+    def test_worker_slots(self):
+
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def track_running(func):
+
+            def run_node(ctx):
+                with lock:
+                    running[0] += 1
+                    running[1] = max(running[0], running[1])
+                time.sleep(0.01)
+                with lock:
+                    running[0] -= 1
+                return func(ctx)
+
+            return run_node
+
+        for i in range(10):
+            self.add_node(f"node_{i}")
+            node_id = self.node_id(f"node_{i}")
+            node = self.nodes[node_id]
+            self.nodes[node_id] = engine.GraphContextNode(node.node, {}, track_running(node.function))
+
+        self.add_node("final", [f"node_{i}" for i in range(10)])
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=3))
+
+        self.assertIs(True, result)
+        self.assertEqual(11, len(self.executed))
+        self.assertLessEqual(running[1], 3)
+
+    def test_model_cost_history(self):
+
+        def model_node(entry_point: str):
+            model_def = meta.ModelDefinition(entryPoint=entry_point)
+            node = graph.ModelNode(self.node_id(entry_point), model_def, frozenset())
+            return engine.GraphContextNode(node, {})
+
+        cost_model = engine.NodeCostModel()
+        node_a = model_node("model_a")
+        node_b = model_node("model_b")
+
+        self.assertEqual(engine.NodeCostModel.DEFAULT_MODEL_COST, cost_model.estimate(node_a))
+
+        cost_model.record(node_a, 2.0)
+        cost_model.record(node_a, 4.0)
+
+        self.assertEqual(3.0, cost_model.estimate(node_a))
+        self.assertEqual(engine.NodeCostModel.DEFAULT_MODEL_COST, cost_model.estimate(node_b))
+
+    def add_resource_node(self, name: str, kind: str, deps: tp.List[str] = None, on_run=None):
+
+        # Load and model nodes with a test function, so they are scheduled against the resource budget
+
+        self.add_node(name, deps)
+
+        node_id = self.node_id(name)
+        test_func = self.nodes[node_id].function
+        node_deps = {self.node_id(d): graph.DependencyType.HARD for d in deps or []}
+
+        if kind == engine.ResourceBudget.LOAD:
+            node = graph.LoadDataNode(node_id, name, meta.DataDefinition(), meta.StorageDefinition(), list(node_deps))
+        else:
+            node = graph.ModelNode(node_id, meta.ModelDefinition(entryPoint=name), frozenset(node_deps))
+
+        def run_node(ctx):
+            if on_run is not None:
+                on_run(name)
+            return test_func(ctx)
+
+        self.nodes[node_id] = engine.GraphContextNode(node, {}, run_node)
+
+    def test_budget_concurrent_loads(self):
+
+        lock = threading.Lock()
+        running = {"current": 0, "max": 0}
+
+        def track_loads(_):
+            with lock:
+                running["current"] += 1
+                running["max"] = max(running["current"], running["max"])
+            time.sleep(0.01)
+            with lock:
+                running["current"] -= 1
+
+        for i in range(6):
+            self.add_resource_node(f"load_{i}", engine.ResourceBudget.LOAD, on_run=track_loads)
+
+        settings = config.ResourceSettings(maxConcurrentLoads=2)
+        budget = engine.ResourceBudget(settings)
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=6), budget=budget)
+
+        self.assertIs(True, result)
+        self.assertEqual(6, len(self.executed))
+        self.assertLessEqual(running["max"], 2)
+        self.assertEqual(0, budget.running(engine.ResourceBudget.LOAD))
+
+    def test_budget_memory_ceiling(self):
+
+        # Each load uses 60 MB against a ceiling of 100 MB, only one load result can be held at a time
+        # Load results are released when the model that uses them is complete
+
+        lock = threading.Lock()
+        held = {"current": 0, "max": 0}
+
+        def track_memory(name: str):
+            with lock:
+                if name.startswith("load"):
+                    held["current"] += 1
+                    held["max"] = max(held["current"], held["max"])
+                else:
+                    held["current"] -= 1
+
+        for i in range(4):
+            self.add_resource_node(f"load_{i}", engine.ResourceBudget.LOAD, on_run=track_memory)
+            self.add_resource_node(f"model_{i}", engine.ResourceBudget.MODEL, [f"load_{i}"], on_run=track_memory)
+
+        cost_model = FixedCostModel(memory={f"load_{i}": 60 * 1024 * 1024 for i in range(4)})
+        budget = engine.ResourceBudget(config.ResourceSettings(maxMemoryMb=100))
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=4), cost_model=cost_model, budget=budget)
+
+        self.assertIs(True, result)
+        self.assertEqual(8, len(self.executed))
+        self.assertEqual(1, held["max"])
+        self.assertEqual(0, budget.memory())
+
+    def test_budget_memory_overcommit(self):
+
+        # The model needs both loads, which do not fit in the budget together
+        # Once the first load is complete the graph has nothing running, so the second is allowed to go over
+
+        self.add_resource_node("load_a", engine.ResourceBudget.LOAD)
+        self.add_resource_node("load_b", engine.ResourceBudget.LOAD)
+        self.add_resource_node("model", engine.ResourceBudget.MODEL, ["load_a", "load_b"])
+
+        cost_model = FixedCostModel(memory={"load_a": 60 * 1024 * 1024, "load_b": 60 * 1024 * 1024})
+        budget = engine.ResourceBudget(config.ResourceSettings(maxMemoryMb=100))
+
+        result = self.run_graph(engine.ThreadPoolExecutor(max_workers=2), cost_model=cost_model, budget=budget)
+
+        self.assertIs(True, result)
+        self.assertEqual("model", self.executed[-1])
+        self.assertEqual(0, budget.memory())
+
+    def create_checkpoint(self, job_config: config.JobConfig) -> checkpoint.JobCheckpoint:
+
+        if getattr(self, "checkpoint_storage", None) is None:
+
+            tmp_dir = tempfile.TemporaryDirectory()
+            self.addCleanup(tmp_dir.cleanup)
+
+            storage_config = config.StorageConfig("LOCAL_STORAGE", {"rootPath": tmp_dir.name})
+            storage_sys_config = config.SystemConfig(storage={"checkpoint_storage": storage_config})
+            self.checkpoint_storage = storage.StorageManager(storage_sys_config)
+
+        settings = config.CheckpointSettings("checkpoint_storage")
+
+        return checkpoint.JobCheckpoint(settings, self.checkpoint_storage, job_config)
+
+    def add_checkpoint_graph(self, fail_save: bool):
+
+        self.executed = []
+        self.nodes = dict()
+        self.save_inputs = []
+
+        self.add_resource_node("load_a", engine.ResourceBudget.LOAD)
+        self.add_resource_node("load_b", engine.ResourceBudget.LOAD)
+        self.add_resource_node("model", engine.ResourceBudget.MODEL, ["load_a", "load_b"])
+        self.add_node("save", ["model"], fail=fail_save)
+        self.add_node("final", ["save"])
+
+        save_node = self.nodes[self.node_id("save")]
+        save_func = save_node.function
+
+        def record_input(ctx):
+            self.save_inputs.append(ctx[self.node_id("model")].result)
+            return save_func(ctx)
+
+        save_node.function = record_input
+
+    def test_checkpoint_resume(self):
+
+        job_checkpoint = self.create_checkpoint(config.JobConfig(job_id="test_job"))
+
+        self.add_checkpoint_graph(fail_save=True)
+        result = self.run_graph(job_checkpoint=job_checkpoint)
+
+        self.assertIsInstance(result, RuntimeError)
+        self.assertEqual(["load_a", "load_b", "model", "save"], sorted(self.executed))
+
+        # Loads and the model do not run again, the model result is restored for the save node
+
+        self.add_checkpoint_graph(fail_save=False)
+        result = self.run_graph(job_checkpoint=job_checkpoint)
+
+        self.assertIs(True, result)
+        self.assertEqual(["save", "final"], self.executed)
+        self.assertEqual(["model"], self.save_inputs)
+
+    def test_checkpoint_incomplete_result(self):
+
+        job_checkpoint = self.create_checkpoint(config.JobConfig(job_id="test_job"))
+
+        self.add_checkpoint_graph(fail_save=True)
+        self.run_graph(job_checkpoint=job_checkpoint)
+
+        # Results without a marker are incomplete, so the model runs again
+        # The loads do not run again, their saved results are restored as inputs for the model
+
+        model_key = job_checkpoint._node_key(self.node_id("model"))  # noqa
+        job_path = job_checkpoint._job_path  # noqa
+        job_checkpoint._file_storage.rm(str(job_path / (model_key + checkpoint.JobCheckpoint.MARKER_SUFFIX)))  # noqa
+
+        self.add_checkpoint_graph(fail_save=False)
+        result = self.run_graph(job_checkpoint=job_checkpoint)
+
+        self.assertIs(True, result)
+        self.assertEqual(["model", "save", "final"], self.executed)
+
+    def test_checkpoint_config_changed(self):
+
+        job_config = config.JobConfig(job_id="test_job", parameters={"param_1": "a"})
+        job_checkpoint = self.create_checkpoint(job_config)
+
+        self.add_checkpoint_graph(fail_save=True)
+        self.run_graph(job_checkpoint=job_checkpoint)
+
+        # Resuming with the same config keeps the saved results
+
+        model_id = self.node_id("model")
+        job_checkpoint = self.create_checkpoint(job_config)
+        self.assertEqual({model_id}, job_checkpoint.saved_nodes([model_id]))
+
+        # Resuming with different parameters discards them, so the whole job runs again
+
+        changed_config = dc.replace(job_config, parameters={"param_1": "b"})
+        job_checkpoint = self.create_checkpoint(changed_config)
+        self.assertEqual(set(), job_checkpoint.saved_nodes([model_id]))
+
+        self.add_checkpoint_graph(fail_save=False)
+        result = self.run_graph(job_checkpoint=job_checkpoint)
+
+        self.assertIs(True, result)
+        self.assertEqual(["final", "load_a", "load_b", "model", "save"], sorted(self.executed))
+
+    @staticmethod
+    def _wait_at(barrier: threading.Barrier, func):
+
+        def wait_and_run(ctx):
+            barrier.wait()
+            return func(ctx)
+
+        return wait_and_run
+
+
+class ResourceBudgetTest(unittest.TestCase):
+
+    def test_slot_limits(self):
+
+        budget = engine.ResourceBudget(config.ResourceSettings(maxConcurrentLoads=1, maxConcurrentModels=2))
+
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.LOAD))
+        self.assertFalse(budget.try_acquire(engine.ResourceBudget.LOAD))
+
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.MODEL))
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.MODEL))
+        self.assertFalse(budget.try_acquire(engine.ResourceBudget.MODEL))
+
+        # Other nodes are not limited
+        for _ in range(10):
+            self.assertTrue(budget.try_acquire(engine.ResourceBudget.OTHER))
+
+        budget.release_slot(engine.ResourceBudget.LOAD)
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.LOAD))
+
+    def test_memory_limit(self):
+
+        mb = 1024 * 1024
+        budget = engine.ResourceBudget(config.ResourceSettings(maxMemoryMb=100))
+
+        # A single item over the limit can run if nothing else is using memory
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.LOAD, 150 * mb))
+        self.assertFalse(budget.try_acquire(engine.ResourceBudget.LOAD, 10 * mb))
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.LOAD, 10 * mb, overcommit=True))
+
+        budget.release_memory(150 * mb)
+        self.assertTrue(budget.try_acquire(engine.ResourceBudget.LOAD, 80 * mb))
+        self.assertEqual(90 * mb, budget.memory())
+
+    def test_waiters_notified(self):
+
+        budget = engine.ResourceBudget(config.ResourceSettings(maxConcurrentLoads=1))
+        notified = []
+
+        def waiter():
+            notified.append(True)
+
+        budget.try_acquire(engine.ResourceBudget.LOAD)
+        budget.add_waiter(waiter)
+        budget.add_waiter(waiter)
+
+        budget.release_slot(engine.ResourceBudget.LOAD)
+
+        # Waiters are called once per registration, even if they registered more than once
+        self.assertEqual([True], notified)
+
+        budget.try_acquire(engine.ResourceBudget.LOAD)
+        budget.release_slot(engine.ResourceBudget.LOAD)
+        self.assertEqual([True], notified)
+
+    def test_fair_share(self):
+
+        other = engine.ResourceBudget.OTHER
+        budget = engine.ResourceBudget(worker_slots=4)
+
+        budget.register_job("big_job")
+        budget.register_job("small_job")
+
+        # Nobody else is waiting, so the big job can take all the slots
+        for _ in range(4):
+            self.assertTrue(budget.try_acquire(other, job_key="big_job"))
+
+        self.assertFalse(budget.try_acquire(other, job_key="small_job"))
+
+        # Now the small job is waiting, the big job cannot go over its share when a slot is released
+        budget.release_slot(other, "big_job")
+        self.assertFalse(budget.try_acquire(other, job_key="big_job"))
+        self.assertTrue(budget.try_acquire(other, job_key="small_job"))
+
+        budget.release_slot(other, "big_job")
+        self.assertTrue(budget.try_acquire(other, job_key="small_job"))
+
+        self.assertEqual(2, budget.job_workers("big_job"))
+        self.assertEqual(2, budget.job_workers("small_job"))
+
+        # Once the small job is finished, the big job can use all the slots again
+        budget.release_slot(other, "small_job")
+        budget.release_slot(other, "small_job")
+        budget.unregister_job("small_job")
+
+        self.assertTrue(budget.try_acquire(other, job_key="big_job"))
+        self.assertTrue(budget.try_acquire(other, job_key="big_job"))
+        self.assertFalse(budget.try_acquire(other, job_key="big_job"))
+
+
+class EngineTestModel(api.TracModel):
+
+    runs: tp.List[int] = []
+
+    def define_parameters(self) -> tp.Dict[str, api.ModelParameter]:
+        return api.define_parameters(api.P("param", api.BasicType.INTEGER, label="Test param"))
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+    def run_model(self, ctx: api.TracContext):
+        ctx.log().info(f"Test model running, param = {ctx.get_parameter('param')}")
+        self.runs.append(ctx.get_parameter("param"))
+
+
+class BlockingTestModel(EngineTestModel):
+
+    """Holds its job in the running state until the test releases it"""
+
+    runs: tp.List[int] = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_model(self, ctx: api.TracContext):
+        self.runs.append(ctx.get_parameter("param"))
+        self.started.set()
+        self.release.wait(timeout=10)
+
+
+class FlowTestModel(api.TracModel):
+
+    """Base for models in the test flow, branches of the flow meet at the barrier to show they run together"""
+
+    barrier: tp.Optional[threading.Barrier] = None
+    results: tp.Dict[str, pd.DataFrame] = {}
+
+    @staticmethod
+    def _table():
+        return api.define_table(api.F("value", api.BasicType.INTEGER, label="Test value"))
+
+    def define_parameters(self) -> tp.Dict[str, api.ModelParameter]:
+        return {}
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+
+class FlowSourceModel(FlowTestModel):
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"values": self._table()}
+
+    def run_model(self, ctx: api.TracContext):
+        ctx.put_pandas_table("values", pd.DataFrame({"value": [1, 2, 3]}))
+
+
+class FlowDoubleModel(FlowTestModel):
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"values": self._table()}
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"doubled": self._table()}
+
+    def run_model(self, ctx: api.TracContext):
+        self.barrier.wait()
+        values = ctx.get_pandas_table("values")
+        values["value"] = values["value"] * 2
+        ctx.put_pandas_table("doubled", values)
+
+
+class FlowSquareModel(FlowTestModel):
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"values": self._table()}
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"squared": self._table()}
+
+    def run_model(self, ctx: api.TracContext):
+        self.barrier.wait()
+        values = ctx.get_pandas_table("values")
+        ctx.put_pandas_table("squared", values * values)
+
+
+class FlowCombineModel(FlowTestModel):
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {"first": self._table(), "second": self._table()}
+
+    def run_model(self, ctx: api.TracContext):
+        FlowTestModel.results["first"] = ctx.get_pandas_table("first")
+        FlowTestModel.results["second"] = ctx.get_pandas_table("second")
+
+
+def flow_model_object(model_class: api.TracModel.__class__) -> meta.ObjectDefinition:
+
+    model = model_class()
+
+    return meta.ObjectDefinition(
+        objectType=meta.ObjectType.MODEL,
+        model=meta.ModelDefinition(  # noqa
+            language="python", repository="trac_integrated",
+            entryPoint=f"{model_class.__module__}.{model_class.__name__}",
+            path="", repositoryVersion="",
+            input=model.define_inputs(), output=model.define_outputs(), param=model.define_parameters()))
+
+
+def flow_edge(tail_node: str, tail_socket: str, head_node: str, head_socket: str) -> meta.FlowEdge:
+
+    return meta.FlowEdge(
+        head=meta.FlowSocket(node=head_node, socket=head_socket),
+        tail=meta.FlowSocket(node=tail_node, socket=tail_socket))
+
+
+def flow_job_config(edges: tp.List[meta.FlowEdge]) -> config.JobConfig:
+
+    model_classes = {
+        "source": FlowSourceModel, "double": FlowDoubleModel,
+        "square": FlowSquareModel, "combine": FlowCombineModel}
+
+    flow_def = meta.FlowDefinition(
+        node={name: meta.FlowNode(nodeType=meta.FlowNodeType.MODEL_NODE) for name in model_classes},
+        edge=edges)
+
+    objects = {f"model_{name}": flow_model_object(model_class) for name, model_class in model_classes.items()}
+    objects["test_flow"] = meta.ObjectDefinition(objectType=meta.ObjectType.FLOW, flow=flow_def)
+
+    return config.JobConfig(
+        job_id="flow_job", target="test_flow", objects=objects,
+        models={name: f"model_{name}" for name in model_classes})
+
+
+DIAMOND_FLOW = [
+    flow_edge("source", "values", "double", "values"),
+    flow_edge("source", "values", "square", "values"),
+    flow_edge("double", "doubled", "combine", "first"),
+    flow_edge("square", "squared", "combine", "second")]
+
+CYCLIC_FLOW = [
+    flow_edge("source", "values", "combine", "first"),
+    flow_edge("source", "values", "combine", "second"),
+    flow_edge("double", "doubled", "square", "values"),
+    flow_edge("square", "squared", "double", "values")]
+
+
+class TracEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        util.configure_logging()
+
+    def submit_and_wait(self, trac_engine: engine.TracEngine, system: actors.ActorSystem, *job_configs):
+
+        # The engine records every change in job status through _update_job
+        # Hook it to wake up the test when a job completes, instead of polling the job status
+
+        job_updated = threading.Condition()
+        update_job = trac_engine._update_job  # noqa
+
+        def update_and_notify(job_state: engine.JobState):
+            update_job(job_state)
+            with job_updated:
+                job_updated.notify_all()
+
+        trac_engine._update_job = update_and_notify
+
+        def all_jobs_complete():
+            jobs = trac_engine.engine_ctx.jobs
+            return len(jobs) >= len(job_configs) and all(j.status != engine.JobStatus.RUNNING for j in jobs.values())
+
+        for job_config in job_configs:
+            system.send("submit_job", job_config)
+
+        with job_updated:
+            self.assertTrue(job_updated.wait_for(all_jobs_complete, timeout=10))
+
+    def test_concurrent_jobs(self):
+
+        job_config = config.JobConfig(parameters={"param": 1})
+        job_config, sys_config = dev_mode.DevModeTranslator.translate_dev_mode_config(
+            job_config, config.SystemConfig(), EngineTestModel)
+
+        job_ids = ["job_a", "job_b", None]
+        job_configs = [dc.replace(job_config, job_id=job_id) for job_id in job_ids]
+
+        trac_engine = engine.TracEngine(sys_config, repos.Repositories(sys_config), storage.StorageManager(sys_config))
+        system = actors.ActorSystem(trac_engine, dispatch_threads=2)
+        system.start(wait=True)
+
+        # All the jobs must be complete before the engine is stopped
+        self.submit_and_wait(trac_engine, system, *job_configs)
+
+        system.stop()
+        system.wait_for_shutdown()
+
+        self.assertEqual(0, system.shutdown_code())
+
+        # Each job has its own ID and status, the job with no ID in its config was given one
+        jobs = trac_engine.engine_ctx.jobs
+        self.assertEqual(3, len(jobs))
+        self.assertIn("job_a", jobs)
+        self.assertIn("job_b", jobs)
+
+        for job_id in jobs:
+            job_state = trac_engine.job_status(job_id)
+            self.assertEqual(engine.JobStatus.SUCCEEDED, job_state.status)
+            self.assertIsNone(job_state.actor_id)
+
+        self.assertIsNone(trac_engine.job_status("unknown_job"))
+
+    def test_duplicate_job_id(self):
+
+        job_config = config.JobConfig(job_id="job_a", parameters={"param": 1})
+        job_config, sys_config = dev_mode.DevModeTranslator.translate_dev_mode_config(
+            job_config, config.SystemConfig(), BlockingTestModel)
+
+        duplicate_config = dc.replace(job_config, parameters={"param": 2})
+        other_config = dc.replace(job_config, job_id="job_b", parameters={"param": 3})
+
+        BlockingTestModel.runs.clear()
+        BlockingTestModel.started.clear()
+        BlockingTestModel.release.clear()
+
+        trac_engine = engine.TracEngine(sys_config, repos.Repositories(sys_config), storage.StorageManager(sys_config))
+        system = actors.ActorSystem(trac_engine, dispatch_threads=2)
+        system.start(wait=True)
+
+        system.send("submit_job", job_config)
+        self.assertTrue(BlockingTestModel.started.wait(timeout=10))
+        running_state = trac_engine.job_status("job_a")
+
+        # Messages to the engine are processed in order, so the duplicate is handled before job_b is submitted
+        # Only release the models once both are running
+        BlockingTestModel.started.clear()
+        system.send("submit_job", duplicate_config)
+        system.send("submit_job", other_config)
+        self.assertTrue(BlockingTestModel.started.wait(timeout=10))
+
+        self.assertIs(running_state, trac_engine.job_status("job_a"))
+
+        BlockingTestModel.release.set()
+        self.submit_and_wait(trac_engine, system)
+
+        system.stop()
+        system.wait_for_shutdown()
+
+        # The duplicate never ran, and did not change the state of the job it clashed with
+        self.assertEqual(0, system.shutdown_code())
+        self.assertEqual([1, 3], BlockingTestModel.runs)
+        self.assertEqual(engine.JobStatus.SUCCEEDED, trac_engine.job_status("job_a").status)
+        self.assertEqual(engine.JobStatus.SUCCEEDED, trac_engine.job_status("job_b").status)
+
+    def test_sweep_job(self):
+
+        job_config = config.JobConfig(job_id="sweep_job", parameters={"param": 1}, sweep={"param": [10, 20, 30]})
+        job_config, sys_config = dev_mode.DevModeTranslator.translate_dev_mode_config(
+            job_config, config.SystemConfig(), EngineTestModel)
+
+        # The test model has no outputs, so each grid point has an empty set of outputs
+        self.assertEqual([{}, {}, {}], job_config.sweepOutputs)
+
+        EngineTestModel.runs.clear()
+
+        trac_engine = engine.TracEngine(sys_config, repos.Repositories(sys_config), storage.StorageManager(sys_config))
+        system = actors.ActorSystem(trac_engine)
+        system.start(wait=True)
+        self.submit_and_wait(trac_engine, system, job_config)
+
+        system.stop()
+        system.wait_for_shutdown()
+
+        self.assertEqual(engine.JobStatus.SUCCEEDED, trac_engine.job_status("sweep_job").status)
+        self.assertEqual([10, 20, 30], sorted(EngineTestModel.runs))
+
+    def test_flow_job(self):
+
+        job_config = flow_job_config(DIAMOND_FLOW)
+
+        sys_config = config.SystemConfig(
+            repositories={"trac_integrated": config.RepositoryConfig("integrated")},
+            engineSettings=config.EngineSettings(nodeExecutor="thread", nodeWorkers=2))
+
+        # Double and square are independent branches, they must both be running to get past the barrier
+        FlowTestModel.barrier = threading.Barrier(2, timeout=5)
+        FlowTestModel.results.clear()
+
+        trac_engine = engine.TracEngine(sys_config, repos.Repositories(sys_config), storage.StorageManager(sys_config))
+        system = actors.ActorSystem(trac_engine)
+        system.start(wait=True)
+        self.submit_and_wait(trac_engine, system, job_config)
+
+        system.stop()
+        system.wait_for_shutdown()
+
+        self.assertEqual(engine.JobStatus.SUCCEEDED, trac_engine.job_status("flow_job").status)
+
+        # Double updates its input in place, square must still see the original values
+        self.assertEqual([2, 4, 6], FlowTestModel.results["first"]["value"].tolist())
+        self.assertEqual([1, 4, 9], FlowTestModel.results["second"]["value"].tolist())
+
+    def test_invalid_graph(self):
+
+        job_config = flow_job_config(CYCLIC_FLOW)
+
+        sys_config = config.SystemConfig(repositories={"trac_integrated": config.RepositoryConfig("integrated")})
+
+        FlowTestModel.results.clear()
+
+        trac_engine = engine.TracEngine(sys_config, repos.Repositories(sys_config), storage.StorageManager(sys_config))
+        system = actors.ActorSystem(trac_engine)
+        system.start(wait=True)
+        self.submit_and_wait(trac_engine, system, job_config)
+
+        system.stop()
+        system.wait_for_shutdown()
+
+        # The cycle is found when the graph is built, so even models outside the cycle never run
+        job_state = trac_engine.job_status("flow_job")
+        self.assertEqual(engine.JobStatus.FAILED, job_state.status)
+        self.assertIn("Cyclic dependency", str(job_state.error))
+        self.assertEqual({}, FlowTestModel.results)
+
+
+class GraphBuilderTest(unittest.TestCase):
+
+    def test_sweep_points(self):
+
+        job_config = config.JobConfig(
+            parameters={"rate": 1.0, "weight": 1.5, "fixed": "a"},
+            sweep={"rate": [1.0, 2.0], "weight": [0.5, 1.0, 1.5]})
+
+        points = graph_builder.GraphBuilder.sweep_points(job_config)
+
+        # Every combination of the sweep values, fixed parameters are the same for all points
+        self.assertEqual(6, len(points))
+        self.assertEqual({"rate": 1.0, "weight": 0.5, "fixed": "a"}, points[0])
+        self.assertEqual({"rate": 2.0, "weight": 1.5, "fixed": "a"}, points[-1])
+        self.assertEqual(6, len(set((p["rate"], p["weight"]) for p in points)))
+
+    def test_sweep_outputs_mismatch(self):
+
+        job_config = config.JobConfig(job_id="sweep_job", sweep={"param": [1, 2]}, sweepOutputs=[{}])
+
+        with self.assertRaises(RuntimeError):
+            graph_builder.GraphBuilder.build_sweep_job(job_config)
+
+    def test_flow_graph(self):
+
+        job_graph = graph_builder.GraphBuilder.build_job(flow_job_config(DIAMOND_FLOW))
+        job_namespace = graph.NodeNamespace("job=flow_job")
+
+        def flow_node_id(name, model):
+            return graph.NodeId(name, graph.NodeNamespace(f"model={model}", job_namespace))
+
+        # Model outputs are mapped straight onto the inputs of downstream models
+        combine_input = job_graph.nodes[flow_node_id("first", "combine")]
+        self.assertIsInstance(combine_input, graph.IdentityNode)
+        self.assertEqual(flow_node_id("doubled", "double"), combine_input.src_id)
+
+        # Only models reading a result that is used in more than one place get their own copy
+        double_model = job_graph.nodes[flow_node_id("FlowDoubleModel", "double")]
+        combine_model = job_graph.nodes[flow_node_id("FlowCombineModel", "combine")]
+        self.assertTrue(double_model.copy_inputs)
+        self.assertFalse(combine_model.copy_inputs)
+        self.assertFalse(combine_model.cache_result)
+
+        # Neither branch depends on the other
+        square_model = job_graph.nodes[flow_node_id("FlowSquareModel", "square")]
+        self.assertNotIn(flow_node_id("doubled", "double"), square_model.dependencies)
+
+        flow_result = job_graph.nodes[graph.NodeId("trac_flow", job_namespace)]
+        self.assertEqual(4, len(flow_result.model_ids))
+
+    def test_flow_invalid_edges(self):
+
+        unconnected = DIAMOND_FLOW[:-1]
+        unknown_socket = DIAMOND_FLOW[:-1] + [flow_edge("square", "unknown", "combine", "second")]
+        connected_twice = DIAMOND_FLOW + [flow_edge("double", "doubled", "combine", "second")]
+        missing_input = DIAMOND_FLOW + [flow_edge("missing_input", "", "double", "values")]
+
+        for edges in [unconnected, unknown_socket, connected_twice, missing_input]:
+            with self.assertRaises(RuntimeError):
+                graph_builder.GraphBuilder.build_job(flow_job_config(edges))
+
+    def test_validate_order(self):
+
+        job_graph = graph_builder.GraphBuilder.build_job(flow_job_config(DIAMOND_FLOW))
+
+        # Every node is in the order, after all of its dependencies
+        self.assertEqual(set(job_graph.nodes), set(job_graph.order))
+
+        position = {node_id: index for index, node_id in enumerate(job_graph.order)}
+
+        for node_id, node in job_graph.nodes.items():
+            for dep_id in node.dependencies:
+                self.assertLess(position[dep_id], position[node_id])
+
+    def test_validate_missing_dependency(self):
+
+        def node_id(name):
+            return graph.NodeId(name, graph.NodeNamespace("test"))
+
+        nodes = {
+            node_id("a"): graph.IdentityNode(node_id("a"), node_id("missing")),
+            node_id("b"): graph.IdentityNode(node_id("b"), node_id("a"))}
+
+        with self.assertRaisesRegex(RuntimeError, re.escape(f"[{node_id('missing')}] needed by [{node_id('a')}]")):
+            graph_builder.GraphBuilder.validate_graph(graph.Graph(nodes, node_id("b")))
+
+    def test_validate_cycle(self):
+
+        def node_id(name):
+            return graph.NodeId(name, graph.NodeNamespace("test"))
+
+        # Node "d" depends on the cycle but is not part of it, so it should not be in the error
+
+        nodes = {
+            node_id("d"): graph.IdentityNode(node_id("d"), node_id("a")),
+            node_id("a"): graph.IdentityNode(node_id("a"), node_id("c")),
+            node_id("b"): graph.IdentityNode(node_id("b"), node_id("a")),
+            node_id("c"): graph.IdentityNode(node_id("c"), node_id("b"))}
+
+        cycle = " -> ".join(f"[{node_id(name)}]" for name in ["a", "c", "b", "a"])
+
+        with self.assertRaises(RuntimeError) as error_ctx:
+            graph_builder.GraphBuilder.validate_graph(graph.Graph(nodes, node_id("d")))
+
+        self.assertTrue(str(error_ctx.exception).endswith(cycle))
+
+    def test_validate_cyclic_flow(self):
+
+        with self.assertRaisesRegex(RuntimeError, "Cyclic dependency"):
+            graph_builder.GraphBuilder.build_job(flow_job_config(CYCLIC_FLOW))
@@ -0,0 +1,87 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pathlib
+import tempfile
+import threading
+import typing as tp
+import unittest
+
+import trac.rt.api as api
+import trac.rt.config as config
+import trac.rt.exec.engine as engine
+import trac.rt.exec.runtime as runtime
+import trac.rt.exec.dev_mode as dev_mode
+
+
+class BlockingModel(api.TracModel):
+
+    """Holds its job in the running state until the test releases it"""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def define_parameters(self) -> tp.Dict[str, api.ModelParameter]:
+        return {}
+
+    def define_inputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+    def define_outputs(self) -> tp.Dict[str, api.TableDefinition]:
+        return {}
+
+    def run_model(self, ctx: api.TracContext):
+        self.started.set()
+        self.release.wait(timeout=10)
+
+
+class TracRuntimeTest(unittest.TestCase):
+
+    def test_submit_duplicate_job_id(self):
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        sys_config_path = pathlib.Path(tmp_dir.name).joinpath("sys_config.yaml")
+        sys_config_path.write_text("repositories: {}\n")
+
+        job_config_path = pathlib.Path(tmp_dir.name).joinpath("job_config.yaml")
+        job_config_path.write_text("job_id: job_a\n")
+
+        BlockingModel.started.clear()
+        BlockingModel.release.clear()
+
+        trac_runtime = runtime.TracRuntime(str(sys_config_path))
+        trac_runtime.pre_start()
+
+        # Service mode does not translate dev mode jobs, so set up the model here and send the job straight in
+        job_config, sys_config = dev_mode.DevModeTranslator.translate_dev_mode_config(
+            config.JobConfig(job_id="job_a"), trac_runtime._sys_config, BlockingModel)  # noqa
+
+        trac_runtime._sys_config = sys_config  # noqa
+        trac_runtime.start(wait=True)
+        trac_runtime._system.send("submit_job", job_config)  # noqa
+
+        try:
+            self.assertTrue(BlockingModel.started.wait(timeout=10))
+            self.assertEqual(engine.JobStatus.RUNNING, trac_runtime.get_job_status("job_a").status)
+
+            # The caller is told the job was rejected, rather than getting back an ID for a job that will not run
+            with self.assertRaises(RuntimeError):
+                trac_runtime.submit_job(str(job_config_path))
+
+        finally:
+            BlockingModel.release.set()
+            trac_runtime.stop()
+            trac_runtime.wait_for_shutdown()
@@ -0,0 +1,234 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import trac.rt.api as api
+import trac.rt.metadata as meta
+import trac.rt.config as config
+import trac.rt.impl.data as _data
+import trac.rt.impl.storage as _storage
+import trac.rt.impl.result_cache as _cache
+import trac.rt.exec.dev_mode as dev_mode
+import trac.rt.exec.graph as graph
+import trac.rt.exec.functions as functions
+
+import unittest
+import tempfile
+import pathlib
+import os
+import uuid
+import time
+
+import pandas as pd
+
+
+class CachedModel:
+    pass
+
+
+class NoInputsModel(api.TracModel):
+
+    runs = 0
+
+    def define_parameters(self):
+        return {}
+
+    def define_inputs(self):
+        return {}
+
+    def define_outputs(self):
+        return {}
+
+    def run_model(self, ctx: api.TracContext):
+        NoInputsModel.runs += 1
+
+
+class BrokenCache:
+
+    def get(self, *args, **kwargs):
+        raise OSError("Cache storage is not available")
+
+    def put(self, *args, **kwargs):
+        raise OSError("Cache storage is not available")
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        storage_config = config.StorageConfig("LOCAL_STORAGE", {"rootPath": self.tmp_dir.name})
+        sys_config = config.SystemConfig(storage={"cache_storage": storage_config, "example_data": storage_config})
+
+        self.storage = _storage.StorageManager(sys_config)
+
+        self.inputs_dir = pathlib.Path(self.tmp_dir.name).joinpath("inputs")
+        self.inputs_dir.mkdir()
+
+        for input_file in ["input_1.csv", "input_2.csv"]:
+            self.inputs_dir.joinpath(input_file).write_text("a,b\n1,2\n")
+
+    def tearDown(self):
+
+        self.tmp_dir.cleanup()
+
+    def create_cache(self, max_size_mb: int = 0, max_age_seconds: int = 0):
+
+        settings = config.ResultCacheSettings("cache_storage", maxSizeMb=max_size_mb, maxAgeSeconds=max_age_seconds)
+        return _cache.ResultCache(settings, self.storage)
+
+    @staticmethod
+    def model_outputs(rows: int = 10):
+
+        df = pd.DataFrame({"a": range(rows), "b": [float(i) * 1.5 for i in range(rows)]})
+        item = _data.DataItem(pandas=df)
+
+        return {"output_1": _data.DataView(meta.TableDefinition(), {_data.DataPartKey("part-root"): [item]})}
+
+    @staticmethod
+    def job_config(storage_path: str = "inputs/input_1.csv", incarnation: int = 0, param_value: int = 1):
+
+        data_id, storage_id = uuid.uuid4(), uuid.uuid4()
+
+        data_obj, storage_obj = dev_mode.DevModeTranslator._generate_input_definition(  # noqa
+            data_id, storage_id, "example_data", storage_path, "CSV",
+            snap_index=1, delta_index=1, incarnation_index=incarnation)
+
+        return config.JobConfig(
+            parameters={"param_1": param_value},
+            inputs={"input_1": str(data_id)},
+            objects={str(data_id): data_obj, str(storage_id): storage_obj})
+
+    @staticmethod
+    def model_def(version: str = "v1.0.0"):
+
+        return meta.ModelDefinition(
+            language="python", repository="trac_test", repositoryVersion=version,
+            path="src", entryPoint="test_result_cache.CachedModel",
+            input={"input_1": meta.TableDefinition()})
+
+    def fingerprint(self, job_config: config.JobConfig, model_version: str = "v1.0.0"):
+
+        return _cache.model_fingerprint(self.model_def(model_version), CachedModel, job_config, self.storage)
+
+    def test_fingerprint_stable(self):
+
+        # Same data in a different job gets new object IDs, the fingerprint should not change
+
+        fingerprint_1 = self.fingerprint(self.job_config())
+        fingerprint_2 = self.fingerprint(self.job_config())
+
+        self.assertIsNotNone(fingerprint_1)
+        self.assertEqual(fingerprint_1, fingerprint_2)
+
+    def test_fingerprint_changes(self):
+
+        fingerprint = self.fingerprint(self.job_config())
+
+        new_version = self.fingerprint(self.job_config(), "v1.0.1")
+        new_input = self.fingerprint(self.job_config("inputs/input_2.csv"))
+        new_incarnation = self.fingerprint(self.job_config(incarnation=1))
+        new_param = self.fingerprint(self.job_config(param_value=2))
+
+        self.assertEqual(5, len({fingerprint, new_version, new_input, new_incarnation, new_param}))
+
+    def test_fingerprint_input_changed(self):
+
+        job_config = self.job_config()
+        fingerprint = self.fingerprint(job_config)
+
+        # Input file is edited in place, with no new incarnation, the cached result should not be used
+        input_file = self.inputs_dir.joinpath("input_1.csv")
+        input_file.write_text("a,b\n1,3\n")
+        os.utime(input_file, (time.time() + 10, time.time() + 10))
+
+        new_fingerprint = self.fingerprint(job_config)
+
+        self.assertIsNotNone(new_fingerprint)
+        self.assertNotEqual(fingerprint, new_fingerprint)
+
+        # Input files that cannot be found cannot be fingerprinted
+        input_file.unlink()
+
+        self.assertIsNone(self.fingerprint(job_config))
+
+    def test_fingerprint_missing_input(self):
+
+        job_config = self.job_config()
+        job_config.inputs = {}
+
+        self.assertIsNone(self.fingerprint(job_config))
+
+    def test_put_and_get(self):
+
+        cache = self.create_cache()
+        outputs = self.model_outputs()
+
+        self.assertIsNone(cache.get("fingerprint_1", {}))
+
+        cache.put("fingerprint_1", outputs)
+        cached = cache.get("fingerprint_1", {"output_1": meta.TableDefinition()})
+
+        self.assertEqual({"output_1"}, set(cached.keys()))
+
+        original_df = outputs["output_1"].parts[_data.DataPartKey("part-root")][0].pandas
+        cached_df = cached["output_1"].parts[_data.DataPartKey("part-root")][0].pandas
+
+        pd.testing.assert_frame_equal(original_df, cached_df)
+
+    def test_evict_by_age(self):
+
+        cache = self.create_cache(max_age_seconds=1)
+
+        cache.put("fingerprint_1", self.model_outputs())
+        self.assertIsNotNone(cache.get("fingerprint_1", {}))
+
+        time.sleep(1.5)
+
+        self.assertIsNone(cache.get("fingerprint_1", {}))
+
+    def test_evict_by_size(self):
+
+        cache = self.create_cache(max_size_mb=1)
+
+        # Each entry is around 0.4 MB, so only two will fit in the cache
+        rows = 24 * 1024
+
+        cache.put("fingerprint_1", self.model_outputs(rows))
+        cache.put("fingerprint_2", self.model_outputs(rows))
+
+        # Reading entry 1 makes entry 2 the least recently used
+        self.assertIsNotNone(cache.get("fingerprint_1", {}))
+
+        cache.put("fingerprint_3", self.model_outputs(rows))
+
+        self.assertIsNotNone(cache.get("fingerprint_1", {}))
+        self.assertIsNone(cache.get("fingerprint_2", {}))
+        self.assertIsNotNone(cache.get("fingerprint_3", {}))
+
+    def test_cache_errors_ignored(self):
+
+        model_def = meta.ModelDefinition(
+            language="python", repository="trac_test", repositoryVersion="v1.0.0",
+            path="src", entryPoint="test_result_cache.NoInputsModel", input={}, output={}, param={})
+
+        model_node = graph.ModelNode(graph.NodeId("model", graph.NodeNamespace("test")), model_def, frozenset())
+        model_func = functions.ModelFunc(
+            model_node, config.JobConfig(), NoInputsModel, self.storage, BrokenCache())  # noqa
+
+        # Errors reading and writing the cache are logged, the model still runs and returns its result
+        NoInputsModel.runs = 0
+
+        self.assertEqual({}, model_func({}))
+        self.assertEqual(1, NoInputsModel.runs)
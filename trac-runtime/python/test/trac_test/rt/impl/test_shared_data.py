@@ -0,0 +1,197 @@
+#  Copyright 2021 Accenture Global Solutions Limited
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import trac.rt.config as config
+import trac.rt.impl.shared_data as _shared
+
+import unittest
+import threading
+
+import pandas as pd
+
+
+class SharedDataRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.load_count = 0
+
+    @staticmethod
+    def data_key(item: str):
+
+        return f"DATA:{item}:part-root:1:1", 0, "example_data", f"inputs/{item}.csv", None
+
+    def loader(self, rows: int = 10, wait_for: threading.Event = None):
+
+        def load():
+            if wait_for is not None:
+                wait_for.wait(5)
+            self.load_count += 1
+            return pd.DataFrame({"a": range(rows), "b": [float(i) for i in range(rows)]})
+
+        return load
+
+    def test_load_shared(self):
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        df_1 = registry.load(key, "job_1", self.loader())
+        df_2 = registry.load(key, "job_2", self.loader())
+
+        self.assertEqual(1, self.load_count)
+        self.assertIsNot(df_1, df_2)
+        pd.testing.assert_frame_equal(df_1, df_2)
+
+    def test_load_in_flight(self):
+
+        # The second job asks for the data while the first job is still loading it
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        started = threading.Event()
+        loading = threading.Event()
+        results = dict()
+
+        def load_job_1():
+            load = self.loader(wait_for=loading)
+            results["job_1"] = registry.load(key, "job_1", lambda: started.set() or load())
+
+        job_1 = threading.Thread(target=load_job_1)
+        job_1.start()
+        started.wait(5)
+
+        # Job 1 is blocked in its loader, release it once job 2 is waiting for the same data
+        timer = threading.Timer(0.2, loading.set)
+        timer.start()
+
+        results["job_2"] = registry.load(key, "job_2", self.loader())
+
+        job_1.join()
+        timer.join()
+
+        self.assertEqual(1, self.load_count)
+        pd.testing.assert_frame_equal(results["job_1"], results["job_2"])
+
+    def test_shared_data_read_only(self):
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        df_1 = registry.load(key, "job_1", self.loader())
+        df_2 = registry.load(key, "job_2", self.loader())
+
+        # New columns are only added for one job, updates in place are not allowed
+
+        df_1["c"] = df_1["a"] * 2
+        self.assertNotIn("c", df_2.columns)
+
+        with self.assertRaises(ValueError):
+            df_1.loc[0, "a"] = 100
+
+        self.assertEqual(0, df_2.loc[0, "a"])
+
+    def test_shared_data_mixed_types(self):
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        def load_mixed():
+            return pd.DataFrame({
+                "int_col": [1, 2, 3],
+                "float_col": [1.0, 2.0, 3.0],
+                "str_col": ["a", "b", "c"],
+                "cat_col": pd.Categorical(["x", "y", "x"])})
+
+        df_1 = registry.load(key, "job_1", load_mixed)
+        df_2 = registry.load(key, "job_2", load_mixed)
+
+        for column_name, value in [("int_col", 10), ("float_col", 10.0), ("str_col", "z")]:
+            with self.assertRaises(ValueError):
+                df_1.loc[0, column_name] = value
+
+        # Categoricals cannot be made read only, but each job has its own copy
+        df_1.loc[0, "cat_col"] = "y"
+
+        pd.testing.assert_frame_equal(load_mixed(), df_2)
+
+    def test_release_no_limit(self):
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        registry.load(key, "job_1", self.loader())
+        registry.load(key, "job_2", self.loader())
+
+        # With no memory limit, data is kept only while a job is using it
+
+        registry.release_job("job_1")
+        self.assertEqual([key], registry.keys())
+
+        registry.release_job("job_2")
+        self.assertEqual([], registry.keys())
+        self.assertEqual(0, registry.memory())
+
+    def test_evict_over_limit(self):
+
+        # Each item is around 0.4 MB, only two can be kept with a limit of 1 MB
+        rows = 24 * 1024
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings(maxMemoryMb=1))
+        key_1, key_2, key_3 = self.data_key("item_1"), self.data_key("item_2"), self.data_key("item_3")
+
+        registry.load(key_1, "job_1", self.loader(rows))
+        registry.load(key_2, "job_2", self.loader(rows))
+        registry.release_job("job_2")
+        registry.release_job("job_1")
+
+        # Item 2 is the least recently used, so it is evicted first
+        registry.load(key_3, "job_3", self.loader(rows))
+        registry.release_job("job_3")
+
+        self.assertEqual({key_1, key_3}, set(registry.keys()))
+        self.assertLessEqual(registry.memory(), 1024 * 1024)
+
+    def test_entries_in_use_not_evicted(self):
+
+        rows = 24 * 1024
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings(maxMemoryMb=1))
+        keys = [self.data_key(f"item_{i}") for i in range(4)]
+
+        for key in keys:
+            registry.load(key, "job_1", self.loader(rows))
+
+        # The job is still using all its data, so the registry is allowed to go over the limit
+        registry.release_job("job_2")
+
+        self.assertEqual(set(keys), set(registry.keys()))
+
+    def test_load_failed(self):
+
+        registry = _shared.SharedDataRegistry(config.SharedDataSettings())
+        key = self.data_key("item_1")
+
+        def failed_load():
+            raise RuntimeError("load failed")
+
+        with self.assertRaises(RuntimeError):
+            registry.load(key, "job_1", failed_load)
+
+        # Failed loads are not kept, the next job tries again
+        self.assertEqual([], registry.keys())
+
+        registry.load(key, "job_2", self.loader())
+        self.assertEqual(1, self.load_count)